@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from board.hotness import decay_hot_scores, rebuild_hot_scores
+
+
+class Command(BaseCommand):
+    help = '핫글 점수를 지금 시점으로 줄이고 거의 0이 된 글을 지웁니다. (주기적으로 실행)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true', help='좋아요/댓글 기록으로 점수를 처음부터 다시 계산합니다.')
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            created = rebuild_hot_scores()
+            self.stdout.write(self.style.SUCCESS(f'🎉 게시글 {created}개의 핫글 점수를 다시 계산했습니다.'))
+            return
+        updated, pruned = decay_hot_scores()
+        self.stdout.write(self.style.SUCCESS(f'🎉 핫글 점수 {updated}개를 줄이고 {pruned}개를 지웠습니다.'))
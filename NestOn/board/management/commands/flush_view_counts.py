@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from board.viewcounts import flush_view_counts
+
+
+class Command(BaseCommand):
+    help = '캐시에 모인 게시글 조회수를 DB에 반영합니다. (공유 캐시를 쓸 때 주기적으로 실행)'
+
+    def handle(self, *args, **options):
+        views = flush_view_counts()
+        self.stdout.write(self.style.SUCCESS(f'🎉 조회 {views}회를 반영했습니다.'))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from board.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = '게시글/댓글 전문 검색 색인을 처음부터 다시 만듭니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='한 번에 저장할 행 수')
+
+    def handle(self, *args, **options):
+        total = rebuild_search_index(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'🎉 게시글/댓글 {total}개를 색인했습니다.'))
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from board.models import Comment, Like, Post
+
+
+def actual_like_count():
+    likes = Like.objects.filter(post=OuterRef('pk')).values('post').annotate(total=Count('id')).values('total')
+    return Coalesce(Subquery(likes), 0)
+
+
+def actual_comment_count():
+    comments = Comment.objects.filter(post=OuterRef('pk')).values('post').annotate(total=Count('id')).values('total')
+    return Coalesce(Subquery(comments), 0)
+
+
+class Command(BaseCommand):
+    help = '게시글의 좋아요/댓글 수를 실제 좋아요·댓글 행 수와 맞춥니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='고치지 않고 어긋난 게시글만 보여줍니다.')
+        parser.add_argument('--batch-size', type=int, default=500, help='한 번에 고칠 게시글 수')
+
+    def handle(self, *args, **options):
+        drifted = (
+            Post.objects.annotate(actual_likes=actual_like_count(), actual_comments=actual_comment_count())
+            .filter(~Q(like_count=F('actual_likes')) | ~Q(comment_count=F('actual_comments')))
+            .values_list('id', 'like_count', 'actual_likes', 'comment_count', 'actual_comments')
+        )
+        post_ids = []
+        for post_id, like_count, actual_likes, comment_count, actual_comments in drifted.iterator():
+            self.stdout.write(
+                f'  게시글 {post_id}: 좋아요 {like_count} → {actual_likes}, 댓글 {comment_count} → {actual_comments}'
+            )
+            post_ids.append(post_id)
+
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(f'어긋난 게시글 {len(post_ids)}개를 찾았습니다. (수정하지 않음)'))
+            return
+
+        # 조회한 뒤에 들어온 좋아요/댓글까지 반영되도록 값을 UPDATE 문 안에서 다시 셉니다.
+        batch_size = options['batch_size']
+        for start in range(0, len(post_ids), batch_size):
+            Post.objects.filter(pk__in=post_ids[start:start + batch_size]).update(
+                like_count=actual_like_count(),
+                comment_count=actual_comment_count(),
+            )
+        self.stdout.write(self.style.SUCCESS(f'🎉 게시글 {len(post_ids)}개의 좋아요/댓글 수를 고쳤습니다.'))
@@ -0,0 +1,47 @@
+# Generated by Django 4.2.23 on 2026-10-18 10:43
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_post_counters(apps, schema_editor):
+    """기존 게시글의 좋아요/댓글 수를 채웁니다."""
+    Post = apps.get_model('board', 'Post')
+    Like = apps.get_model('board', 'Like')
+    Comment = apps.get_model('board', 'Comment')
+    likes = Like.objects.filter(post=OuterRef('pk')).values('post').annotate(total=Count('id')).values('total')
+    comments = Comment.objects.filter(post=OuterRef('pk')).values('post').annotate(total=Count('id')).values('total')
+    Post.objects.update(
+        like_count=Coalesce(Subquery(likes), 0),
+        comment_count=Coalesce(Subquery(comments), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('board', '0004_post_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='like_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-like_count', '-created_at', '-id'], name='board_post_likes_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['category', '-like_count', '-created_at', '-id'], name='board_post_cat_likes_idx'),
+        ),
+        migrations.RunPython(fill_post_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.23 on 2026-10-18 10:47
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('board', '0005_post_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostHotScore',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='hot_score', serialize=False, to='board.post')),
+                ('category', models.CharField(choices=[('disaster', '자연재해'), ('accident', '사고'), ('traffic', '교통'), ('safety', '치안'), ('facility', '시설고장'), ('etc', '기타')], max_length=20)),
+                ('score', models.FloatField(default=0)),
+                ('decayed_at', models.DateTimeField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-score', '-post'], name='board_hot_score_idx'), models.Index(fields=['category', '-score', '-post'], name='board_hot_cat_score_idx')],
+            },
+        ),
+    ]
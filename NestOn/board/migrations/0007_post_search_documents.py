@@ -0,0 +1,78 @@
+# Generated by Django 4.2.23 on 2026-10-18 10:49
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# SQLite는 FTS5 가상 테이블을 외부 콘텐츠 방식으로 두고 트리거로 동기화합니다.
+SQLITE_CREATE = [
+    """CREATE VIRTUAL TABLE board_postsearchdocument_fts USING fts5(
+        title_terms, body_terms, content='board_postsearchdocument', content_rowid='id', tokenize='unicode61'
+    )""",
+    """CREATE TRIGGER board_postsearchdocument_ai AFTER INSERT ON board_postsearchdocument BEGIN
+        INSERT INTO board_postsearchdocument_fts(rowid, title_terms, body_terms)
+        VALUES (new.id, new.title_terms, new.body_terms);
+    END""",
+    """CREATE TRIGGER board_postsearchdocument_ad AFTER DELETE ON board_postsearchdocument BEGIN
+        INSERT INTO board_postsearchdocument_fts(board_postsearchdocument_fts, rowid, title_terms, body_terms)
+        VALUES ('delete', old.id, old.title_terms, old.body_terms);
+    END""",
+    """CREATE TRIGGER board_postsearchdocument_au AFTER UPDATE ON board_postsearchdocument BEGIN
+        INSERT INTO board_postsearchdocument_fts(board_postsearchdocument_fts, rowid, title_terms, body_terms)
+        VALUES ('delete', old.id, old.title_terms, old.body_terms);
+        INSERT INTO board_postsearchdocument_fts(rowid, title_terms, body_terms)
+        VALUES (new.id, new.title_terms, new.body_terms);
+    END""",
+]
+SQLITE_DROP = [
+    "DROP TRIGGER IF EXISTS board_postsearchdocument_au",
+    "DROP TRIGGER IF EXISTS board_postsearchdocument_ad",
+    "DROP TRIGGER IF EXISTS board_postsearchdocument_ai",
+    "DROP TABLE IF EXISTS board_postsearchdocument_fts",
+]
+
+# PostgreSQL은 제목(A)과 본문(B)에 가중치를 준 tsvector 식 인덱스(GIN)를 사용합니다.
+POSTGRES_CREATE = [
+    "CREATE INDEX board_postsearchdocument_terms_gin ON board_postsearchdocument USING GIN ("
+    "(setweight(to_tsvector('simple', title_terms), 'A') || setweight(to_tsvector('simple', body_terms), 'B')))",
+]
+POSTGRES_DROP = [
+    "DROP INDEX IF EXISTS board_postsearchdocument_terms_gin",
+]
+
+
+def _run(statements_by_vendor):
+    def run(apps, schema_editor):
+        for statement in statements_by_vendor.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+    return run
+
+
+create_fulltext_index = _run({'sqlite': SQLITE_CREATE, 'postgresql': POSTGRES_CREATE})
+drop_fulltext_index = _run({'sqlite': SQLITE_DROP, 'postgresql': POSTGRES_DROP})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('board', '0006_post_hot_scores'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostSearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('post', '게시글'), ('comment', '댓글')], max_length=10)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('category', models.CharField(choices=[('disaster', '자연재해'), ('accident', '사고'), ('traffic', '교통'), ('safety', '치안'), ('facility', '시설고장'), ('etc', '기타')], max_length=20)),
+                ('title_terms', models.TextField(blank=True)),
+                ('body_terms', models.TextField()),
+                ('created_at', models.DateTimeField()),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_documents', to='board.post')),
+            ],
+            options={
+                'unique_together': {('kind', 'object_id')},
+            },
+        ),
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import Q
 from User.models import CustomUser
 from public_data.models import PublicAlert # 카테고리 정보를 가져오기 위함
 
@@ -14,11 +15,57 @@ class Post(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     view_count = models.PositiveIntegerField(default=0)
+    # 좋아요/댓글 수 (목록에서 글마다 COUNT하지 않도록 F()로 함께 갱신, reconcile_post_counters로 보정)
+    like_count = models.PositiveIntegerField(default=0)
+    comment_count = models.PositiveIntegerField(default=0)
     is_active = models.BooleanField(default=True) # 신고 누적 시 False로 변경됨
 
+    class Meta:
+        indexes = [
+            # 게시글 목록 커서 페이지네이션 (전체 / 카테고리별 최신순, 좋아요순, 활성 글만)
+            models.Index(fields=['-created_at', '-id'], name='board_post_recent_idx', condition=Q(is_active=True)),
+            models.Index(fields=['category', '-created_at', '-id'], name='board_post_cat_recent_idx', condition=Q(is_active=True)),
+            models.Index(fields=['-like_count', '-created_at', '-id'], name='board_post_likes_idx', condition=Q(is_active=True)),
+            models.Index(fields=['category', '-like_count', '-created_at', '-id'], name='board_post_cat_likes_idx', condition=Q(is_active=True)),
+        ]
+
     def __str__(self):
         return f'[{self.get_category_display()}] {self.title}'
 
+# --- 핫글 점수 모델 ---
+class PostHotScore(models.Model):
+    # 시간이 지나면 줄어드는 핫글 점수 (board.hotness에서 갱신, 점수가 있는 활성 글만 행이 있음)
+    post = models.OneToOneField(Post, on_delete=models.CASCADE, primary_key=True, related_name='hot_score')
+    category = models.CharField(max_length=20, choices=Post.CATEGORY_CHOICES) # 카테고리별 핫글 인덱스용 (Post.category 복사)
+    score = models.FloatField(default=0)
+    decayed_at = models.DateTimeField() # score가 어느 시점 기준의 점수인지
+
+    class Meta:
+        indexes = [
+            # 핫글 목록 커서 페이지네이션 (전체 / 카테고리별 점수순)
+            models.Index(fields=['-score', '-post'], name='board_hot_score_idx'),
+            models.Index(fields=['category', '-score', '-post'], name='board_hot_cat_score_idx'),
+        ]
+
+# --- 게시판 검색 색인 모델 ---
+class PostSearchDocument(models.Model):
+    # 게시글/댓글의 전문 검색용 검색어 (board.search에서 갱신, 활성 글과 그 활성 댓글만 행이 있음)
+    KIND_CHOICES = [
+        ('post', '게시글'),
+        ('comment', '댓글'),
+    ]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField() # 게시글 또는 댓글 id
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='search_documents')
+    category = models.CharField(max_length=20, choices=Post.CATEGORY_CHOICES) # 카테고리 필터용 (Post.category 복사)
+    title_terms = models.TextField(blank=True) # 2글자 단위로 나눈 제목 (댓글은 비어 있음)
+    body_terms = models.TextField() # 2글자 단위로 나눈 본문/댓글 내용
+    created_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('kind', 'object_id')
+
 # --- 댓글 모델 ---
 class Comment(models.Model):
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='comments')
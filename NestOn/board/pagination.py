@@ -0,0 +1,108 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """정렬 키 값으로 다음 페이지를 찾는 커서(keyset) 페이지네이션
+
+    OFFSET 없이 "마지막으로 본 글보다 뒤" 조건으로 조회하므로 몇 페이지를 넘기든 첫 페이지와
+    같은 비용이 듭니다. ordering은 모두 내림차순인 필드 이름 목록이고, 마지막 필드는 값이
+    겹치지 않아야 합니다. (보통 id)
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    max_page_size = 50
+    invalid_cursor_message = '잘못된 커서입니다.'
+
+    def __init__(self, name, ordering):
+        self.name = name
+        self.ordering = [field.lstrip('-') for field in ordering]
+        self.page_size = api_settings.PAGE_SIZE or 10
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def encode_cursor(self, obj):
+        values = []
+        for field in self.ordering:
+            value = getattr(obj, field)
+            values.append(value.isoformat() if hasattr(value, 'isoformat') else value)
+        # 정렬이 다른 목록의 커서를 섞어 쓰지 못하도록 정렬 이름을 함께 넣습니다.
+        payload = json.dumps({'o': self.name, 'v': values}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, model, cursor):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+            if payload['o'] != self.name or len(payload['v']) != len(self.ordering):
+                raise ValueError
+            values = []
+            for field, value in zip(self.ordering, payload['v']):
+                try:
+                    values.append(model._meta.get_field(field).to_python(value))
+                except FieldDoesNotExist:
+                    # annotate로 만든 값(숫자)은 JSON 값 그대로 씁니다.
+                    values.append(value)
+            return values
+        except (binascii.Error, UnicodeDecodeError, ValueError, TypeError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def after(self, values):
+        """(a, b, c) < (va, vb, vc) 조건을 Q로 만듭니다. (모두 내림차순)
+
+        OR 조건만으로는 DB가 인덱스 범위를 잡지 못하므로 첫 번째 키의 a <= va 조건을 함께 붙입니다.
+        """
+        condition = Q()
+        for index, field in enumerate(self.ordering):
+            prefix = {name: value for name, value in zip(self.ordering[:index], values)}
+            condition |= Q(**prefix, **{f'{field}__lt': values[index]})
+        return Q(**{f'{self.ordering[0]}__lte': values[0]}) & condition
+
+    def paginate_queryset(self, queryset, request, view=None):
+        def fetch(values, limit):
+            page = queryset.filter(self.after(values)) if values else queryset
+            return page.order_by(*[f'-{field}' for field in self.ordering])[:limit]
+        return self.paginate_fetch(fetch, queryset.model, request)
+
+    def paginate_fetch(self, fetch, model, request):
+        """쿼리셋으로 나타낼 수 없는 목록(raw SQL 검색 결과 등)을 같은 커서 형식으로 나눕니다.
+
+        fetch(values, limit)는 정렬 키가 values보다 뒤인 항목(values가 None이면 처음부터)을
+        ordering 순서로 limit개까지 반환해야 합니다.
+        """
+        self.request = request
+        cursor = request.query_params.get(self.cursor_query_param)
+        values = self.decode_cursor(model, cursor) if cursor else None
+        page_size = self.get_page_size(request)
+        items = list(fetch(values, page_size + 1))
+        self.has_next = len(items) > page_size
+        items = items[:page_size]
+        self.next_cursor = self.encode_cursor(items[-1]) if self.has_next else None
+        return items
+
+    def get_next_link(self):
+        if not self.next_cursor:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'next_cursor': self.next_cursor,
+            'results': data,
+        })
@@ -0,0 +1,190 @@
+"""게시글 제목/본문과 댓글의 전문 검색
+
+챗봇 근거 데이터 색인(chatbot.fulltext)과 같은 방식으로 모든 단어를 2글자 단위(bigram)로 나눠
+PostSearchDocument에 저장하고, SQLite에서는 FTS5 가상 테이블, PostgreSQL에서는 제목에 가중치를
+준 tsvector GIN 인덱스로 순위를 매깁니다. 게시글/댓글이 저장되거나 삭제될 때 signals가 그 글이나
+댓글의 행만 갱신합니다.
+
+검색 결과는 (score, id) 내림차순이라 KeysetPagination의 커서로 이어서 조회할 수 있습니다.
+"""
+from django.db import connection, transaction
+from django.db.models import FloatField, Q, Value
+
+from chatbot.fulltext import (
+    fts5_match_expression, make_snippet, split_words, to_index_terms, tsquery_expression, word_bigrams
+)
+
+from .models import Comment, Post, PostSearchDocument
+
+HIGHLIGHT = ('<mark>', '</mark>')
+SNIPPET_WIDTH = 120
+TITLE_WEIGHT = 3.0  # SQLite bm25에서 제목 일치에 주는 가중치 (본문은 1)
+
+
+def _post_fields(post):
+    return {
+        'post': post,
+        'category': post.category,
+        'title_terms': to_index_terms(post.title),
+        'body_terms': to_index_terms(post.content),
+        'created_at': post.created_at,
+    }
+
+
+def _comment_fields(comment, post):
+    return {
+        'post': post,
+        'category': post.category,
+        'title_terms': '',
+        'body_terms': to_index_terms(comment.content),
+        'created_at': comment.created_at,
+    }
+
+
+def index_post(post):
+    """게시글의 검색 행을 갱신합니다. 비활성 글이면 그 글의 댓글까지 색인에서 뺍니다."""
+    if not post.is_active:
+        PostSearchDocument.objects.filter(post=post).delete()
+        return
+    with transaction.atomic():
+        _, created = PostSearchDocument.objects.update_or_create(
+            kind='post', object_id=post.pk, defaults=_post_fields(post)
+        )
+        if created:
+            # 다시 공개된 글이면 빠져 있던 댓글도 함께 색인합니다. (새 글은 댓글이 없음)
+            PostSearchDocument.objects.bulk_create([
+                PostSearchDocument(kind='comment', object_id=comment.pk, **_comment_fields(comment, post))
+                for comment in post.comments.filter(is_active=True)
+            ], ignore_conflicts=True)
+        else:
+            PostSearchDocument.objects.filter(post=post, kind='comment').exclude(category=post.category).update(
+                category=post.category
+            )
+
+
+def index_comment(comment):
+    post = comment.post
+    if not (comment.is_active and post.is_active):
+        remove_comment(comment)
+        return
+    PostSearchDocument.objects.update_or_create(
+        kind='comment', object_id=comment.pk, defaults=_comment_fields(comment, post)
+    )
+
+
+def remove_comment(comment):
+    PostSearchDocument.objects.filter(kind='comment', object_id=comment.pk).delete()
+
+
+def rebuild_search_index(batch_size=500):
+    """검색 색인을 처음부터 다시 만들고 색인한 행 수를 반환합니다."""
+    documents = []
+    for post in Post.objects.filter(is_active=True).iterator(chunk_size=batch_size):
+        documents.append(PostSearchDocument(kind='post', object_id=post.pk, **_post_fields(post)))
+    comments = Comment.objects.filter(is_active=True, post__is_active=True).select_related('post')
+    for comment in comments.iterator(chunk_size=batch_size):
+        documents.append(PostSearchDocument(kind='comment', object_id=comment.pk, **_comment_fields(comment, comment.post)))
+    with transaction.atomic():
+        PostSearchDocument.objects.all().delete()
+        PostSearchDocument.objects.bulk_create(documents, batch_size=batch_size)
+    return len(documents)
+
+
+def _page(sql, params, after, limit):
+    """순위 쿼리를 감싸 (score, id)가 after보다 뒤인 행을 limit개 가져옵니다."""
+    sql = f'SELECT * FROM ({sql}) m'
+    if after:
+        score, document_id = after
+        sql += ' WHERE m.score < %s OR (m.score = %s AND m.id < %s)'
+        params = params + [score, score, document_id]
+    sql += ' ORDER BY m.score DESC, m.id DESC LIMIT %s'
+    return PostSearchDocument.objects.raw(sql, params + [limit])
+
+
+def _search_sqlite(words, category, after, limit):
+    # bm25()는 낮을수록 관련이 높으므로 부호를 바꿔 다른 DB와 같이 내림차순으로 정렬합니다.
+    sql = (
+        f'SELECT d.*, -bm25(board_postsearchdocument_fts, {TITLE_WEIGHT}, 1.0) AS score '
+        'FROM board_postsearchdocument_fts '
+        'JOIN board_postsearchdocument d ON d.id = board_postsearchdocument_fts.rowid '
+        'WHERE board_postsearchdocument_fts MATCH %s'
+    )
+    params = [fts5_match_expression(words)]
+    if category:
+        sql += ' AND d.category = %s'
+        params.append(category)
+    return _page(sql, params, after, limit)
+
+
+def _search_postgresql(words, category, after, limit):
+    # 마이그레이션의 GIN 인덱스와 같은 식이어야 인덱스를 씁니다.
+    vector = (
+        "setweight(to_tsvector('simple', d.title_terms), 'A') || "
+        "setweight(to_tsvector('simple', d.body_terms), 'B')"
+    )
+    sql = (
+        f'SELECT d.*, ts_rank({vector}, q) AS score '
+        "FROM board_postsearchdocument d, to_tsquery('simple', %s) q "
+        f'WHERE ({vector}) @@ q'
+    )
+    params = [tsquery_expression(words)]
+    if category:
+        sql += ' AND d.category = %s'
+        params.append(category)
+    return _page(sql, params, after, limit)
+
+
+def _search_fallback(words, category, after, limit):
+    """전문 검색을 지원하지 않는 DB에서는 bigram 문자열 부분 일치로 찾고 최신순으로 정렬합니다."""
+    query = Q()
+    for word in words:
+        phrase = ' '.join(word_bigrams(word))
+        query |= Q(title_terms__contains=phrase) | Q(body_terms__contains=phrase)
+    documents = PostSearchDocument.objects.filter(query).annotate(score=Value(0.0, output_field=FloatField()))
+    if category:
+        documents = documents.filter(category=category)
+    if after:
+        documents = documents.filter(id__lt=after[1])
+    return documents.order_by('-id')[:limit]
+
+
+def search_documents(query, category=None, after=None, limit=10):
+    """검색어와 관련된 검색 행을 순위순으로 가져옵니다.
+
+    after는 이전 페이지 마지막 행의 (score, id)입니다. 반환된 행에는 score가 붙어 있습니다.
+    """
+    words = split_words(query)
+    if not words:
+        return []
+    if connection.vendor == 'sqlite':
+        return _search_sqlite(words, category, after, limit)
+    if connection.vendor == 'postgresql':
+        return _search_postgresql(words, category, after, limit)
+    return _search_fallback(words, category, after, limit)
+
+
+def search_results(documents, query):
+    """검색 행을 게시글 제목과 검색어를 강조한 스니펫이 붙은 응답 항목으로 바꿉니다."""
+    words = split_words(query)
+    posts = Post.objects.in_bulk({document.post_id for document in documents})
+    comments = Comment.objects.in_bulk([document.object_id for document in documents if document.kind == 'comment'])
+    results = []
+    for document in documents:
+        post = posts.get(document.post_id)
+        comment = comments.get(document.object_id) if document.kind == 'comment' else None
+        if post is None or (document.kind == 'comment' and comment is None):
+            continue
+        text = comment.content if comment else post.content
+        results.append({
+            'type': document.kind,
+            'post_id': post.id,
+            'comment_id': comment.id if comment else None,
+            'title': post.title,
+            # 원문은 이스케이프되므로 강조 태그 말고는 HTML이 들어가지 않습니다.
+            'snippet': make_snippet(text, words, width=SNIPPET_WIDTH, highlight=HIGHLIGHT),
+            'category': post.category,
+            'category_display': post.get_category_display(),
+            'created_at': document.created_at,
+            'score': document.score,
+        })
+    return results
@@ -21,8 +21,8 @@ class CommentSerializer(serializers.ModelSerializer):
 
 class PostListSerializer(serializers.ModelSerializer):
     author_username = serializers.CharField(source='author.username', read_only=True)
-    comment_count = serializers.IntegerField(source='comments.count', read_only=True)
-    like_count = serializers.IntegerField(source='likes.count', read_only=True)
+    comment_count = serializers.IntegerField(read_only=True)
+    like_count = serializers.IntegerField(read_only=True)
     category_display = serializers.CharField(source='get_category_display', read_only=True)
 
     class Meta:
@@ -52,6 +52,13 @@ class PostCreateUpdateSerializer(serializers.ModelSerializer):
         model = Post
         fields = ['title', 'content', 'category']
 
+    def update(self, instance, validated_data):
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        # 좋아요/댓글 수는 F()로 따로 갱신되므로 수정한 필드만 저장합니다.
+        instance.save(update_fields=[*validated_data, 'updated_at'])
+        return instance
+
 class CommentCreateUpdateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Comment
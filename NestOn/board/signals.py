@@ -0,0 +1,23 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Comment, Post
+from .search import index_comment, index_post, remove_comment
+
+
+@receiver(post_save, sender=Post)
+def update_post_search_index(sender, instance, **kwargs):
+    """게시글이 저장되면 검색 색인을 갱신합니다. (삭제되면 검색 행은 CASCADE로 함께 지워짐)"""
+    index_post(instance)
+
+
+@receiver(post_save, sender=Comment)
+def update_comment_search_index(sender, instance, **kwargs):
+    """댓글이 저장되면 검색 색인을 갱신합니다."""
+    index_comment(instance)
+
+
+@receiver(post_delete, sender=Comment)
+def remove_comment_from_search_index(sender, instance, **kwargs):
+    """댓글이 삭제되면 검색 색인에서도 지웁니다."""
+    remove_comment(instance)
@@ -1,3 +1,175 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from chatbot.fulltext import make_snippet
+from User.models import CustomUser
+
+from .hotness import HOT_HALF_LIFE, LIKE_WEIGHT, bump_hot_score, decay_hot_scores
+from .models import Comment, Like, Post, PostHotScore
+from .search import HIGHLIGHT
+from .viewcounts import KEY_PREFIX, flush_view_counts, pending_views, record_view
+
+
+class SnippetHighlightTests(TestCase):
+    def test_escapes_text_and_highlights_outside_entities(self):
+        snippet = make_snippet('Tom & Jerry <b>amp</b>', ['amp'], highlight=HIGHLIGHT)
+        self.assertEqual(snippet, 'Tom &amp; Jerry &lt;b&gt;<mark>amp</mark>&lt;/b&gt;')
+
+    def test_matches_case_insensitively_and_keeps_original_case(self):
+        snippet = make_snippet('Seoul 강남구 침수', ['seoul', '침수'], highlight=HIGHLIGHT)
+        self.assertEqual(snippet, '<mark>Seoul</mark> 강남구 <mark>침수</mark>')
+
+    def test_plain_snippet_is_not_escaped(self):
+        self.assertEqual(make_snippet('a < b & c', ['b']), 'a < b & c')
+
+
+class PostSearchViewTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='searcher', password='pw', phone_number='010-0000-0001')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_snippet_is_escaped_and_highlighted(self):
+        Post.objects.create(author=self.user, title='Seoul 소식', content='<script> & Seoul 침수', category='disaster')
+        response = self.client.get('/api/board/posts/search/', {'q': 'SEOUL'})
+        self.assertEqual(response.status_code, 200)
+        [result] = response.data['results']
+        self.assertEqual(result['snippet'], '&lt;script&gt; &amp; <mark>Seoul</mark> 침수')
+
+
+    def test_single_character_query_matches_inside_words(self):
+        first = Post.objects.create(author=self.user, title='한강 산책', content='저녁', category='disaster')
+        second = Post.objects.create(author=self.user, title='강남 소식', content='축제', category='disaster')
+        Post.objects.create(author=self.user, title='다른 글', content='내용', category='disaster')
+        response = self.client.get('/api/board/posts/search/', {'q': '강'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({result['post_id'] for result in response.data['results']}, {first.id, second.id})
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='pager', password='pw', phone_number='010-0000-0004')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        created_at = timezone.now()
+        self.posts = [Post.objects.create(author=self.user, title=f'글 {i}', content='내용') for i in range(5)]
+        # 작성 시각이 같은 글은 id로 순서를 정하므로 페이지 경계에서 빠지거나 겹치지 않아야 합니다.
+        Post.objects.update(created_at=created_at)
+
+    def _collect(self, params):
+        ids = []
+        cursor = None
+        while True:
+            query = dict(params, page_size=2)
+            if cursor:
+                query['cursor'] = cursor
+            response = self.client.get('/api/board/posts/', query)
+            self.assertEqual(response.status_code, 200)
+            ids += [post['id'] for post in response.data['results']]
+            cursor = response.data['next_cursor']
+            if not cursor:
+                return ids
+
+    def test_cursor_round_trip_visits_every_post_once(self):
+        expected = [post.id for post in reversed(self.posts)]
+        self.assertEqual(self._collect({}), expected)
+
+    def test_cursor_round_trip_with_like_ordering(self):
+        Post.objects.filter(pk=self.posts[1].pk).update(like_count=3)
+        expected = [self.posts[1].id] + [post.id for post in reversed(self.posts) if post != self.posts[1]]
+        self.assertEqual(self._collect({'ordering': 'likes'}), expected)
+
+    def test_cursor_from_other_ordering_is_rejected(self):
+        response = self.client.get('/api/board/posts/', {'page_size': 2})
+        cursor = response.data['next_cursor']
+        response = self.client.get('/api/board/posts/', {'page_size': 2, 'ordering': 'likes', 'cursor': cursor})
+        self.assertEqual(response.status_code, 404)
+
+
+class HotScoreTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='hot', password='pw', phone_number='010-0000-0002')
+        self.post = Post.objects.create(author=self.user, title='핫글', content='내용')
+
+    def test_removing_old_like_subtracts_only_its_decayed_weight(self):
+        now = timezone.now()
+        old_like = now - HOT_HALF_LIFE * 2
+        for _ in range(3):
+            bump_hot_score(self.post, LIKE_WEIGHT, now=old_like)
+        decay_hot_scores(now=now)
+        for _ in range(10):
+            bump_hot_score(self.post, LIKE_WEIGHT, now=now)
+
+        # 두 반감기가 지난 좋아요는 0.25점만 남아 있으므로 그만큼만 뺍니다.
+        bump_hot_score(self.post, -LIKE_WEIGHT, now=now, created_at=old_like)
+        self.assertAlmostEqual(PostHotScore.objects.get(pk=self.post.pk).score, 10.5)
+
+
+class ViewCountFlushTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user(username='viewer', password='pw', phone_number='010-0000-0003')
+        self.post = Post.objects.create(author=self.user, title='조회', content='내용')
+
+    def test_deferred_flush_keeps_latest_generation_for_next_flush(self):
+        record_view(self.post.pk, 'a')
+        record_view(self.post.pk, 'b')
+        self.assertEqual(flush_view_counts(defer_latest=True), 0)
+        # 세대가 바뀌기 전에 세대 번호를 읽은 요청이 닫힌 세대에 늦게 써도 다음 반영에 더해집니다.
+        cache.incr(f'{KEY_PREFIX}1:post:{self.post.pk}')
+        record_view(self.post.pk, 'c')
+        self.assertEqual(pending_views(self.post.pk), 4)
+
+        self.assertEqual(flush_view_counts(defer_latest=True), 3)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.view_count, 3)
+        self.assertEqual(pending_views(self.post.pk), 1)
+
+        self.assertEqual(flush_view_counts(grace=0), 1)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.view_count, 4)
+        self.assertEqual(pending_views(self.post.pk), 0)
+
+
+class PostCounterTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='counter', password='pw', phone_number='010-0000-0005')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.post = Post.objects.create(author=self.user, title='카운터', content='본문')
+
+    def test_like_unlike_round_trip(self):
+        url = f'/api/board/posts/{self.post.pk}/like/'
+        self.assertEqual(self.client.post(url).data, {'is_liked': True, 'like_count': 1})
+        self.assertEqual(self.client.post(url).data, {'is_liked': False, 'like_count': 0})
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 0)
+
+    def test_comment_create_and_delete(self):
+        response = self.client.post(f'/api/board/posts/{self.post.pk}/comments/', {'content': '댓글'})
+        self.assertEqual(response.status_code, 201)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 1)
+
+        comment = Comment.objects.get(post=self.post)
+        self.client.delete(f'/api/board/comments/{comment.pk}/')
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 0)
+
+    def test_reconcile_fixes_drifted_counters(self):
+        Like.objects.create(post=self.post, user=self.user)
+        Comment.objects.create(post=self.post, author=self.user, content='댓글')
+        Post.objects.filter(pk=self.post.pk).update(like_count=5, comment_count=0)
+
+        call_command('reconcile_post_counters', dry_run=True, stdout=StringIO())
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.like_count, self.post.comment_count), (5, 0))
 
-# Create your tests here.
+        call_command('reconcile_post_counters', stdout=StringIO())
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.like_count, self.post.comment_count), (1, 1))
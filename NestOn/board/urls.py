@@ -8,6 +8,7 @@ from .views import (
     post_like_view,
     report_post_view,
     hot_posts_view,
+    post_search_view,
     my_posts_view,
     my_comments_view,
     reported_posts_view,
@@ -20,6 +21,7 @@ urlpatterns = [
     # 게시글
     path('posts/', post_list_create_view, name='post-list-create'),
     path('posts/hot/', hot_posts_view, name='hot-posts'),
+    path('posts/search/', post_search_view, name='post-search'),
     path('posts/my/', my_posts_view, name='my-posts'),
     path('posts/<int:post_id>/', post_detail_manage_view, name='post-detail-manage'),
     
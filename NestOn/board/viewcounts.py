@@ -0,0 +1,147 @@
+"""게시글 조회수를 캐시에 모았다가 한꺼번에 DB에 반영합니다.
+
+상세 조회마다 게시글 행을 저장하면 동시에 들어온 조회가 서로를 덮어써 사라지고 updated_at도
+바뀝니다. record_view()는 같은 사용자의 반복 조회를 일정 시간 동안 한 번으로 세고, 캐시의
+카운터만 올립니다. flush_view_counts()는 모인 조회수를 게시글마다
+UPDATE ... SET view_count = view_count + n 한 번으로 반영합니다.
+
+카운터는 세대(generation) 번호가 붙은 키에 쌓입니다. 반영할 때 세대를 먼저 올려 새 조회는
+새 세대로 보내고, 이전 세대의 카운터만 읽어 지우므로 반영하는 동안 들어온 조회가 사라지지 않습니다.
+조회 요청 안에서 반영할 때는 기다리지 않는 대신 방금 닫은 세대를 다음 반영으로 미뤄, 그 세대에
+늦게 쓰던 요청의 조회도 잃지 않습니다.
+여러 프로세스가 같은 카운터를 쓰려면 공유 캐시(Redis 등)를 설정하고 flush_view_counts 명령을
+주기적으로 실행하세요. 프로세스 내 캐시(LocMem)에서는 조회 요청이 FLUSH_INTERVAL마다 직접 반영합니다.
+"""
+import time
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+
+from .models import Post
+
+VIEW_DEDUP_SECONDS = 30 * 60  # 같은 사용자가 이 시간 안에 다시 본 조회는 세지 않음
+FLUSH_INTERVAL = 60  # 조회 요청이 직접 반영할 때의 최소 간격(초)
+FLUSH_GRACE_SECONDS = 1  # 세대를 올린 뒤 이전 세대에 쓰던 요청이 끝나기를 기다리는 시간
+BUFFER_TIMEOUT = 24 * 60 * 60  # 반영되지 못한 카운터를 캐시에 남겨 둘 시간
+
+KEY_PREFIX = 'board:views:'
+GENERATION_KEY = KEY_PREFIX + 'generation'
+FLUSHED_KEY = KEY_PREFIX + 'flushed'  # 마지막으로 반영을 끝낸 세대
+FLUSH_DUE_KEY = KEY_PREFIX + 'flush_due'
+FLUSH_LOCK_KEY = KEY_PREFIX + 'flush_lock'
+FLUSH_LOCK_TIMEOUT = 60
+
+
+def _generation():
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        cache.add(GENERATION_KEY, 1, None)
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+def _incr(key, delta=1):
+    try:
+        return cache.incr(key, delta)
+    except ValueError:
+        if cache.add(key, delta, BUFFER_TIMEOUT):
+            return delta
+        return cache.incr(key, delta)
+
+
+def record_view(post_id, viewer):
+    """조회 한 번을 기록합니다. 같은 viewer의 반복 조회면 False를 반환합니다."""
+    if not cache.add(f'{KEY_PREFIX}seen:{post_id}:{viewer}', 1, VIEW_DEDUP_SECONDS):
+        return False
+
+    generation = _generation()
+    counter_key = f'{KEY_PREFIX}{generation}:post:{post_id}'
+    if cache.add(counter_key, 0, BUFFER_TIMEOUT):
+        # 이 세대에서 처음 조회된 글이면 반영할 글 목록에 올립니다.
+        slot = _incr(f'{KEY_PREFIX}{generation}:slots')
+        cache.set(f'{KEY_PREFIX}{generation}:slot:{slot}', post_id, BUFFER_TIMEOUT)
+    _incr(counter_key)
+    return True
+
+
+def pending_views(post_id):
+    """아직 DB에 반영되지 않은 조회수 (상세 화면에 더해 보여주기 위함)"""
+    generation = _generation()
+    flushed = cache.get(FLUSHED_KEY, 0)
+    keys = [f'{KEY_PREFIX}{g}:post:{post_id}' for g in range(flushed + 1, generation + 1)]
+    return sum(cache.get_many(keys).values())
+
+
+def _collect(generation):
+    """세대 하나의 카운터를 모아 ({post_id: 조회수}, 반영 뒤 지울 키 목록)으로 반환합니다."""
+    prefix = f'{KEY_PREFIX}{generation}:'
+    slots = cache.get(prefix + 'slots', 0)
+    slot_keys = [f'{prefix}slot:{slot}' for slot in range(1, slots + 1)]
+    post_ids = set(cache.get_many(slot_keys).values())
+    counter_keys = {f'{prefix}post:{post_id}': post_id for post_id in post_ids}
+    counts = {
+        counter_keys[key]: count
+        for key, count in cache.get_many(list(counter_keys)).items()
+        if count
+    }
+    return counts, slot_keys + list(counter_keys) + [prefix + 'slots']
+
+
+def flush_view_counts(grace=FLUSH_GRACE_SECONDS, defer_latest=False):
+    """쌓인 조회수를 DB에 반영하고 반영한 조회 수를 반환합니다.
+
+    defer_latest이면 grace만큼 기다리지 않고, 방금 닫은 세대는 남겨 두었다가 다음 반영 때 더합니다.
+    다른 곳에서 이미 반영 중이면 같은 카운터를 두 번 더하지 않도록 아무것도 하지 않고 0을 반환합니다.
+    """
+    if not cache.add(FLUSH_LOCK_KEY, 1, FLUSH_LOCK_TIMEOUT):
+        return 0
+    try:
+        return _flush(grace, defer_latest)
+    finally:
+        cache.delete(FLUSH_LOCK_KEY)
+
+
+def _flush(grace, defer_latest):
+    current = _generation()
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.add(GENERATION_KEY, current + 1, None)
+    if defer_latest:
+        # 이전 반영 때 닫은 세대까지만 반영합니다. 그 세대에 쓰던 요청은 이미 끝났습니다.
+        current -= 1
+    elif grace:
+        time.sleep(grace)
+
+    flushed = cache.get(FLUSHED_KEY, 0)
+    if current <= flushed:
+        return 0
+    totals = defaultdict(int)
+    used_keys = []
+    for generation in range(flushed + 1, current + 1):
+        counts, keys = _collect(generation)
+        for post_id, count in counts.items():
+            totals[post_id] += count
+        used_keys += keys
+
+    # 같은 조회수를 받은 글끼리 묶어 UPDATE 문 수를 줄입니다.
+    by_count = defaultdict(list)
+    for post_id, count in totals.items():
+        by_count[count].append(post_id)
+    with transaction.atomic():
+        for count, post_ids in by_count.items():
+            Post.objects.filter(pk__in=post_ids).update(view_count=F('view_count') + count)
+
+    # DB에 반영한 뒤에 카운터를 지우므로, 반영에 실패하면 다음 번에 다시 반영합니다.
+    cache.set(FLUSHED_KEY, current, None)
+    cache.delete_many(used_keys)
+    return sum(totals.values())
+
+
+def flush_if_due():
+    """마지막 반영 뒤 FLUSH_INTERVAL이 지났으면 (프로세스 중 하나만) 바로 반영합니다."""
+    if cache.add(FLUSH_DUE_KEY, 1, FLUSH_INTERVAL):
+        # 요청 안에서는 기다리지 않고, 방금 닫은 세대는 다음 반영으로 미룹니다.
+        flush_view_counts(defer_latest=True)
@@ -1,10 +1,16 @@
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated, AllowAny, IsAdminUser
+from rest_framework.exceptions import NotFound
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
-from django.db.models import Count
-from .models import Post, Comment, Like, Report
+from django.db import transaction
+from django.db.models import Count, F
+from .models import Post, PostHotScore, PostSearchDocument, Comment, Like, Report
+from .hotness import COMMENT_WEIGHT, HOT_MIN_SCORE, LIKE_WEIGHT, bump_hot_score, sync_hot_post
+from .pagination import KeysetPagination
+from .search import search_documents, search_results
+from .viewcounts import flush_if_due, pending_views, record_view
 from .serializers import (
     PostListSerializer, PostDetailSerializer, PostCreateUpdateSerializer,
     CommentSerializer, CommentCreateUpdateSerializer, ReportSerializer
@@ -26,18 +32,20 @@ def post_list_create_view(request):
         category = request.query_params.get('category')
         ordering = request.query_params.get('ordering', '-created_at')
 
-        posts = Post.objects.filter(is_active=True)
+        posts = Post.objects.filter(is_active=True).select_related('author')
         
         if category:
             posts = posts.filter(category=category)
         
+        # 마지막으로 본 글의 정렬 키 다음부터 가져오므로 깊은 페이지도 첫 페이지와 비용이 같습니다.
         if ordering == 'likes':
-            posts = posts.annotate(like_count=Count('likes')).order_by('-like_count', '-created_at')
+            paginator = KeysetPagination('likes', ['-like_count', '-created_at', '-id'])
         else:
-            posts = posts.order_by('-created_at')
+            paginator = KeysetPagination('recent', ['-created_at', '-id'])
 
-        serializer = PostListSerializer(posts, many=True)
-        return Response(serializer.data)
+        page = paginator.paginate_queryset(posts, request)
+        serializer = PostListSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
     
     elif request.method == 'POST':
         serializer = PostCreateUpdateSerializer(data=request.data)
@@ -49,16 +57,22 @@ def post_list_create_view(request):
 @api_view(['GET', 'PATCH', 'DELETE'])
 @permission_classes([IsAuthenticated])
 def post_detail_manage_view(request, post_id):
+    if request.method == 'GET':
+        # 캐시에 모인 조회수를 반영할 때가 되었으면 먼저 반영합니다. (FLUSH_INTERVAL마다 한 번)
+        flush_if_due()
+
     post = get_object_or_404(Post, id=post_id)
 
     if not post.is_active and post.author != request.user:
         return Response({"error": "삭제되었거나 비공개 처리된 게시글입니다."}, status=status.HTTP_404_NOT_FOUND)
 
     if request.method == 'GET':
-        post.view_count += 1
-        post.save()
+        # 조회수는 캐시 카운터만 올리고 게시글 행은 쓰지 않습니다.
+        record_view(post.id, request.user.id)
         serializer = PostDetailSerializer(post, context={'request': request})
-        return Response(serializer.data)
+        data = serializer.data
+        data['view_count'] += pending_views(post.id)
+        return Response(data)
 
     if post.author != request.user:
         return Response({"message": "권한이 없습니다."}, status=status.HTTP_403_FORBIDDEN)
@@ -67,6 +81,7 @@ def post_detail_manage_view(request, post_id):
         serializer = PostCreateUpdateSerializer(post, data=request.data, partial=True)
         if serializer.is_valid(raise_exception=True):
             updated_post = serializer.save()
+            sync_hot_post(updated_post)
             return Response(PostDetailSerializer(updated_post, context={'request': request}).data)
     
     elif request.method == 'DELETE':
@@ -80,7 +95,10 @@ def comment_create_view(request, post_id):
     post = get_object_or_404(Post, id=post_id)
     serializer = CommentCreateUpdateSerializer(data=request.data)
     if serializer.is_valid(raise_exception=True):
-        serializer.save(author=request.user, post=post)
+        with transaction.atomic():
+            serializer.save(author=request.user, post=post)
+            Post.objects.filter(pk=post.pk).update(comment_count=F('comment_count') + 1)
+            bump_hot_score(post, COMMENT_WEIGHT)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 # 5. 댓글 수정, 삭제
@@ -99,7 +117,11 @@ def comment_manage_view(request, comment_id):
             return Response(CommentSerializer(comment, context={'request': request}).data)
     
     elif request.method == 'DELETE':
-        comment.delete()
+        with transaction.atomic():
+            deleted, _ = Comment.objects.filter(pk=comment.pk).delete()
+            if deleted:
+                Post.objects.filter(pk=comment.post_id).update(comment_count=F('comment_count') - 1)
+                bump_hot_score(comment.post, -COMMENT_WEIGHT, created_at=comment.created_at)
         return Response({"message": "댓글이 성공적으로 삭제되었습니다."}, status=status.HTTP_200_OK)
 
 # 6. 게시글 좋아요 / 좋아요 취소
@@ -107,10 +129,19 @@ def comment_manage_view(request, comment_id):
 @permission_classes([IsAuthenticated])
 def post_like_view(request, post_id):
     post = get_object_or_404(Post, id=post_id)
-    like, created = Like.objects.get_or_create(post=post, user=request.user)
-    if not created:
-        like.delete()
-    return Response({'is_liked': created, 'like_count': post.likes.count()})
+    with transaction.atomic():
+        like, created = Like.objects.get_or_create(post=post, user=request.user)
+        if created:
+            Post.objects.filter(pk=post.pk).update(like_count=F('like_count') + 1)
+            bump_hot_score(post, LIKE_WEIGHT)
+        else:
+            # 동시에 들어온 취소 요청이 두 번 빼지 않도록 실제로 지운 경우에만 줄입니다.
+            deleted, _ = Like.objects.filter(pk=like.pk).delete()
+            if deleted:
+                Post.objects.filter(pk=post.pk).update(like_count=F('like_count') - 1)
+                bump_hot_score(post, -LIKE_WEIGHT, created_at=like.created_at)
+    post.refresh_from_db(fields=['like_count'])
+    return Response({'is_liked': created, 'like_count': post.like_count})
 
 # 7. 게시글 신고
 @api_view(['POST'])
@@ -125,30 +156,33 @@ def report_post_view(request, post_id):
         report_count = Report.objects.filter(post=post).count()
         if report_count >= 10:
             post.is_active = False
-            post.save()
+            post.save(update_fields=['is_active'])
+            sync_hot_post(post)
         return Response({"message": "신고가 정상적으로 접수되었습니다."}, status=status.HTTP_201_CREATED)
 
 # 8. 핫글 목록 조회
-api_view(['GET'])
+@api_view(['GET'])
 @permission_classes([AllowAny])
 def hot_posts_view(request):
     try:
         # URL의 쿼리 파라미터에서 'category' 값을 가져옵니다.
         category = request.query_params.get('category')
 
-        # 기본 쿼리셋: 활성화된 글, 좋아요 30개 이상
-        posts = Post.objects.filter(is_active=True).annotate(like_count=Count('likes')).filter(like_count__gte=30)
+        # 미리 계산해 둔 핫글 점수 테이블 (활성 글만 행이 있음), 기준 점수 이상
+        scores = PostHotScore.objects.filter(score__gte=HOT_MIN_SCORE).select_related('post__author')
         
         # category 값이 있다면, 해당 카테고리로 추가 필터링
         if category:
-            posts = posts.filter(category=category)
+            scores = scores.filter(category=category)
             
-        # 최신순으로 정렬
-        posts = posts.order_by('-created_at')
-        
-        serializer = PostListSerializer(posts, many=True)
-        return Response(serializer.data)
+        # 점수순으로 (category, -score) 인덱스를 앞에서부터 읽습니다.
+        paginator = KeysetPagination('hot', ['-score', '-post_id'])
+        page = paginator.paginate_queryset(scores, request)
+        serializer = PostListSerializer([hot.post for hot in page], many=True)
+        return paginator.get_paginated_response(serializer.data)
         
+    except NotFound:
+        raise
     except Exception as e:
         return Response({"error": "핫 게시글을 불러오는 데 실패했습니다."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -156,7 +190,7 @@ def hot_posts_view(request):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def my_posts_view(request):
-    posts = Post.objects.filter(author=request.user)
+    posts = Post.objects.filter(author=request.user).select_related('author')
     serializer = PostListSerializer(posts, many=True)
     return Response(serializer.data)
 
@@ -172,6 +206,23 @@ def my_comments_view(request):
 @api_view(['GET'])
 @permission_classes([IsAdminUser])
 def reported_posts_view(request):
-    reported_posts = Post.objects.annotate(report_count=Count('reports')).filter(report_count__gte=10)
+    reported_posts = Post.objects.annotate(report_count=Count('reports')).filter(report_count__gte=10).select_related('author')
     serializer = PostListSerializer(reported_posts, many=True)
-    return Response(serializer.data)
\ No newline at end of file
+    return Response(serializer.data)
+
+# 12. 게시글/댓글 검색
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def post_search_view(request):
+    query = request.query_params.get('q', '').strip()
+    if not query:
+        return Response({"error": "검색어를 입력해주세요."}, status=status.HTTP_400_BAD_REQUEST)
+    category = request.query_params.get('category')
+
+    # 관련도(score)순이며, 커서에는 마지막 결과의 점수와 id가 들어갑니다.
+    paginator = KeysetPagination('search', ['-score', '-id'])
+    documents = paginator.paginate_fetch(
+        lambda after, limit: search_documents(query, category=category, after=after, limit=limit),
+        PostSearchDocument, request,
+    )
+    return paginator.get_paginated_response(search_results(documents, query))
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import ChatSession, ChatMessage, BotResponse
+from .models import ChatSession, ChatMessage, BotResponse, RegionDigest
 
 @admin.register(ChatSession)
 class ChatSessionAdmin(admin.ModelAdmin):
@@ -21,3 +21,9 @@ class BotResponseAdmin(admin.ModelAdmin):
     list_filter = ['is_active', 'created_at']
     search_fields = ['keyword', 'response']
     readonly_fields = ['created_at']
+
+@admin.register(RegionDigest)
+class RegionDigestAdmin(admin.ModelAdmin):
+    list_display = ['region', 'data_version', 'built_at']
+    search_fields = ['region']
+    readonly_fields = ['built_at']
@@ -0,0 +1,81 @@
+"""여러 키워드를 한 번의 문자열 순회로 찾는 Aho-Corasick 오토마톤"""
+from collections import deque
+
+
+class AhoCorasick:
+    """패턴을 모두 add()한 뒤 build()를 호출해야 검색할 수 있습니다."""
+
+    def __init__(self):
+        self._goto = [{}]
+        self._fail = [0]
+        self._terminal = [[]]  # 노드에서 끝나는 (패턴 길이, 값) 목록
+        self._output = []
+        self._built = False
+        self.pattern_count = 0
+
+    def add(self, pattern, value):
+        """패턴과 매칭 시 돌려줄 값을 등록합니다."""
+        if not pattern:
+            return
+        node = 0
+        for char in pattern:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._terminal.append([])
+            node = next_node
+        self._terminal[node].append((len(pattern), value))
+        self.pattern_count += 1
+        self._built = False
+
+    def build(self):
+        """BFS로 실패 링크를 계산하고 접미사 노드의 출력을 합칩니다."""
+        self._output = [list(terminal) for terminal in self._terminal]
+        queue = deque(self._goto[0].values())
+        for node in queue:
+            self._fail[node] = 0
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                candidate = self._goto[fail].get(char, 0)
+                self._fail[child] = candidate if candidate != child else 0
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+        self._built = True
+        return self
+
+    def iter_matches(self, text):
+        """(시작 위치, 끝 위치, 값)을 끝 위치 순서로 내보냅니다."""
+        if not self._built:
+            raise RuntimeError("build()를 먼저 호출해야 합니다.")
+        node = 0
+        goto, fail, output = self._goto, self._fail, self._output
+        for index, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for length, value in output[node]:
+                yield index - length + 1, index + 1, value
+
+    def find_longest(self, text, accept=None):
+        """겹치는 매칭은 왼쪽에서부터 가장 긴 것만 남겨 (시작, 끝, 값) 목록으로 반환합니다.
+
+        accept(시작, 끝, 값)를 주면 False인 매칭은 고르기 전에 버립니다.
+        """
+        matches = self.iter_matches(text)
+        if accept is not None:
+            matches = (match for match in matches if accept(*match))
+        matches = sorted(matches, key=lambda m: (m[0], -(m[1] - m[0])))
+        selected = []
+        last_end = 0
+        for start, end, value in matches:
+            if start >= last_end:
+                selected.append((start, end, value))
+                last_end = end
+        return selected
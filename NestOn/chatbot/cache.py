@@ -0,0 +1,136 @@
+"""정규화한 질문, 지역, 데이터 버전으로 챗봇 답변을 재사용하는 캐시
+
+답변 캐시는 프로세스마다 따로지만 데이터 버전은 DB에 있으므로, 어느 프로세스에서 데이터가
+바뀌어도 다른 프로세스의 캐시된 답변은 길어도 version_check_interval초 뒤에는 쓰이지 않습니다.
+"""
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .config import CHATBOT_CONFIG
+from .gazetteer import get_gazetteer
+from .models import DataVersion
+
+ALL_REGIONS = "*"  # 어떤 지역이든 데이터가 바뀌면 함께 올라가는 전체 버전
+DATA_VERSION_PREFIX = "data:"
+
+_punctuation_re = re.compile(r"[\W_]+", re.UNICODE)
+
+
+def normalize_question(text):
+    """대소문자, 공백, 문장부호, 이모지 차이를 없앤 질문 문자열을 만듭니다."""
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    return _punctuation_re.sub("", text)
+
+
+class VersionStore:
+    """DataVersion 테이블의 버전 번호를 잠깐씩 기억해 두고 읽습니다.
+
+    기본 캐시(LocMem)는 프로세스마다 따로라 다른 워커나 cron 명령이 올린 버전을 볼 수 없으므로,
+    버전은 DB에 두고 프로세스마다 check_interval초 동안만 기억합니다. 다른 프로세스의 변경은
+    길어도 check_interval초 뒤에 보이고, 버전을 올린 프로세스는 바로 봅니다.
+    """
+
+    def __init__(self, check_interval):
+        self.check_interval = check_interval
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._versions.get(name)
+        if entry is not None and entry[0] > now:
+            return entry[1]
+        version = DataVersion.objects.filter(name=name).values_list("version", flat=True).first() or 0
+        with self._lock:
+            self._versions[name] = (now + self.check_interval, version)
+        return version
+
+    def bump(self, names):
+        for name in names:
+            if not DataVersion.objects.filter(name=name).update(version=F("version") + 1):
+                try:
+                    with transaction.atomic():
+                        DataVersion.objects.create(name=name, version=1)
+                except IntegrityError:
+                    # 동시에 다른 프로세스가 만들었으면 그 행을 올립니다.
+                    DataVersion.objects.filter(name=name).update(version=F("version") + 1)
+        with self._lock:
+            for name in names:
+                self._versions.pop(name, None)
+
+
+versions = VersionStore(CHATBOT_CONFIG.get("version_check_interval", 5))
+
+
+def get_data_version(region):
+    """지역의 데이터 버전을 반환합니다."""
+    return versions.get(DATA_VERSION_PREFIX + (region or ALL_REGIONS))
+
+
+def bump_data_versions(regions):
+    """지역들과 전체 버전을 올려 해당 지역의 캐시된 답변을 무효화합니다."""
+    versions.bump([DATA_VERSION_PREFIX + region for region in set(regions) | {ALL_REGIONS}])
+
+
+class AnswerCache:
+    """LRU 방식으로 밀어내고 TTL이 지나면 만료되는 프로세스 내 답변 캐시"""
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def make_key(self, user_message):
+        """질문에서 지역을 찾아 (정규화한 질문, 지역, 데이터 버전) 키를 만듭니다."""
+        region = get_gazetteer().resolve(user_message)
+        # 지역을 모르는 질문은 LLM이 어느 지역으로 분류할지 모르므로 전체 버전에 묶습니다.
+        return (normalize_question(user_message), region, get_data_version(region))
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+answer_cache = AnswerCache(
+    max_size=CHATBOT_CONFIG.get("answer_cache_size", 1000),
+    ttl=CHATBOT_CONFIG.get("answer_cache_ttl", 600),
+)
@@ -12,6 +12,57 @@ CHATBOT_CONFIG = {
     'fallback_to_keywords': True,
     'max_tokens': 500,
     'temperature': 0.7,
+    'intent_min_confidence': 0.5,  # 이 값보다 확신이 낮으면 일반 질문으로 처리
+    'answer_cache_size': 1000,  # 프로세스당 캐시할 답변 수
+    'answer_cache_ttl': 600,  # 캐시된 답변 유지 시간(초)
+    'version_check_interval': 5,  # 다른 프로세스가 올린 데이터 버전을 다시 확인하는 간격(초, 버전은 DB에 저장)
+    'digest_cache_ttl': 3600,  # 구별 요약을 캐시에 두는 시간(초, 조회할 때마다 데이터 버전도 확인)
+    'retrieval_top_k': 15,  # 전문 검색으로 가져올 근거 문서 수
+    'vector_retrieval': True,  # 질문과 비슷한 문서를 벡터 검색으로 보충할지 여부
+    'embedding_backend': 'hashing',  # 'hashing'(오프라인) 또는 'openai'
+    'embedding_dim': 256,
+    'embedding_timeout': 5,  # 'openai' 임베딩 호출의 마감 시간(초, 게시글 저장 중에도 호출됨)
+    'vector_top_k': 5,
+    'vector_min_score': 0.2,  # 이보다 유사도가 낮은 문서는 사용하지 않음
+    'context_workers': 4,  # 근거 데이터를 동시에 조회할 스레드 수 (프로세스당)
+    'vector_index_dir': None,  # None이면 data/vector_index
+    'history_token_budget': 800,  # 프롬프트에 그대로 넣을 최근 대화의 토큰 예산
+    'history_summary_token_budget': 300,  # 오래된 대화 요약의 토큰 예산
+    'history_fetch_limit': 40,  # 한 번에 조회할 최근 메시지 수
+    'context_token_budget': 600,  # 프롬프트에 넣을 근거 데이터의 토큰 예산
+    'context_item_chars': 80,  # 근거 항목 본문을 자를 글자 수
+    'context_section_priority': ['public_alerts', 'local_events', 'community_news'],  # 예산이 모자랄 때 먼저 담을 섹션 순서
+    'keyword_min_coverage': 0.3,  # 키워드가 질문에서 이 비율 이상을 차지해야 LLM 없이 바로 답변
+    'llm_models': {
+        'intent': 'gpt-4o-mini',  # 질문 분류처럼 짧은 작업은 싸고 빠른 모델
+        'answer': 'gpt-3.5-turbo',  # 답변 생성 모델
+        'fast': 'gpt-4o-mini',  # 지연 시간 예산이 모자랄 때 낮춰 쓸 모델
+    },
+    'latency_budgets': {'chat': 12, 'stream': 12},  # 요청 종류별 지연 시간 예산(초, 비동기 작업은 예산 없음)
+    'llm_min_call_time': 1.0,  # 남은 예산이 이보다 적으면 LLM 없이 기본 응답
+    'llm_base_url': None,  # None이면 OpenAI 기본 주소 (호환 서버나 테스트용 가짜 서버 주소)
+    'llm_timeout': 15,  # 답변 생성 호출의 전체 마감 시간(초, 재시도 포함)
+    'intent_timeout': 5,  # 질문 분류 호출의 전체 마감 시간(초)
+    'llm_connect_timeout': 3,
+    'llm_max_retries': 2,  # 시간 초과, 연결 실패, 429, 5xx일 때 다시 시도할 횟수
+    'llm_retry_backoff': 0.5,  # 재시도 대기 시간의 기준값(초, 지터 포함 지수 증가)
+    'llm_max_connections': 20,  # 프로세스당 OpenAI 커넥션 풀 크기
+    'llm_breaker_threshold': 5,  # 연속 실패가 이만큼 쌓이면 회로 차단기를 엽니다
+    'llm_breaker_reset': 30,  # 회로 차단기를 연 뒤 다시 시험 호출할 때까지의 시간(초)
+    'singleflight_timeout': None,  # 같은 질문의 답변 생성을 기다리는 최대 시간(초, None이면 intent_timeout + llm_timeout + 2)
+    'singleflight_cross_process': False,  # 공유 캐시(Redis 등)로 프로세스 간에도 같은 질문을 묶을지 여부
+    'async_replies': False,  # True면 chat API가 답변을 기다리지 않고 작업 큐에 넣은 뒤 202로 응답
+    'reply_job_max_attempts': 3,  # 답변 생성 작업을 시도할 최대 횟수
+    'reply_job_retry_delay': 5,  # 재시도 대기 시간의 기준값(초, 시도마다 두 배)
+    'reply_job_lease': 120,  # 처리 중인 작업이 이 시간(초) 안에 끝나지 않으면 다른 워커가 다시 가져감
+    'reply_stream_timeout': 60,  # 답변 알림 스트림이 기다리는 최대 시간(초)
+    'rate_limit_enabled': True,
+    'rate_limit_user_burst': 10,  # 사용자 한 명이 한 번에 몰아서 보낼 수 있는 요청 수
+    'rate_limit_user_per_minute': 12,  # 사용자별로 1분마다 다시 채워지는 요청 수 (0이면 모든 요청을 막음)
+    'rate_limit_global_burst': 100,  # 전체 사용자 합산 버킷 크기
+    'rate_limit_global_per_minute': 300,
+    'llm_daily_token_quota': 50000,  # 사용자별 하루 LLM 토큰 할당량 (None이면 제한 없음)
+    'telemetry_buffer_size': 2000,  # 계측 기록을 프로세스당 최근 몇 건까지 보관할지
 }
 
 # 시스템 프롬프트
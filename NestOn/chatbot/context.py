@@ -0,0 +1,219 @@
+"""근거 데이터를 프롬프트에 넣을 압축 텍스트로 바꿉니다.
+
+get_structured_data()의 dict를 그대로 넣으면 중괄호, 따옴표, 반복되는 키 이름과 ISO 시각까지
+모두 토큰이 됩니다. encode_context()는 섹션마다 열 이름을 한 번만 적고 항목은 한 줄씩 '|'로
+이어 쓰며, 모든 항목이 같은 값은 섹션 머리말로 올리고 지역명과 같은 장소나 제목을 되풀이하는
+본문처럼 겹치는 값은 뺍니다. 토큰 예산을 넘으면 우선순위가 높은 섹션부터 한 항목씩 번갈아 담습니다.
+"""
+import re
+import threading
+
+from django.utils import timezone
+
+from .config import CHATBOT_CONFIG
+from .memory import estimate_tokens
+
+SECTION_LABELS = {
+    "public_alerts": "공공 알림",
+    "local_events": "지역 행사",
+    "community_news": "동네 소식",
+}
+
+# 섹션별 (열 이름, 항목 키) 순서
+SECTION_COLUMNS = {
+    "public_alerts": [("제목", "title"), ("분류", "category"), ("일시", "date"), ("장소", "location"), ("내용", "content")],
+    "local_events": [("제목", "title"), ("기간", "period"), ("장소", "location"), ("추천", "score"), ("내용", "content")],
+    "community_news": [("제목", "title"), ("날짜", "date"), ("내용", "content")],
+}
+
+DEFAULT_PRIORITY = ["public_alerts", "local_events", "community_news"]
+
+_date_re = re.compile(r"(\d{4})-(\d{2})-(\d{2})(?:[T ](\d{2}:\d{2})(?::\d{2}(?:\.\d+)?)?(?:[+-]\d{2}:\d{2}|Z)?)?")
+_space_re = re.compile(r"\s+")
+
+
+def _compact_dates(text, year):
+    """올해 날짜는 연도를 빼고, 시각은 분까지만 남깁니다. (기준일을 머리말에 한 번 적습니다)"""
+
+    def replace(match):
+        date = f"{match.group(2)}-{match.group(3)}"
+        if match.group(1) != year:
+            date = f"{match.group(1)}-{date}"
+        if match.group(4) and match.group(4) != "00:00":
+            date += " " + match.group(4)
+        return date
+
+    return _date_re.sub(replace, text).replace(" ~ ", "~")
+
+
+def _clean(value, year):
+    if value is None:
+        return ""
+    text = _space_re.sub(" ", str(value)).strip().replace("|", "/")
+    return _compact_dates(text, year)
+
+
+def _item_values(item, columns, region, year, max_chars):
+    """항목 하나의 열 값을 정리하고 겹치는 값을 비웁니다."""
+    values = {key: _clean(item.get(key), year) for _, key in columns}
+
+    title = values.get("title", "")
+    content = values.get("content", "").strip(". ")
+    if title and content.startswith(title):
+        content = content[len(title):].strip(" :-.")
+    if len(content) > max_chars:
+        content = content[:max_chars].rstrip() + "…"
+    if "content" in values:
+        values["content"] = content
+
+    location = values.get("location")
+    if location and region and (location == region or location.endswith(" " + region)):
+        values["location"] = ""
+    return values
+
+
+def _encode_section(section, items, region, year, max_chars):
+    """섹션 머리말과 항목 줄 목록을 만듭니다."""
+    columns = SECTION_COLUMNS.get(section)
+    if columns is None:
+        # 알 수 없는 섹션은 항목에 있는 키를 그대로 열로 씁니다.
+        columns = [(key, key) for key in dict.fromkeys(k for item in items for k in item)]
+    rows = [_item_values(item, columns, region, year, max_chars) for item in items]
+
+    header_parts = []
+    kept_columns = []
+    for name, key in columns:
+        column = [row[key] for row in rows]
+        if not any(column):
+            continue
+        # 모든 항목이 같은 값이면 머리말에 한 번만 적습니다.
+        if len(rows) > 1 and key != "title" and len(set(column)) == 1:
+            header_parts.append(f"{name}={column[0]}")
+            continue
+        kept_columns.append((name, key))
+
+    label = SECTION_LABELS.get(section, section)
+    header = "|".join(name for name, _ in kept_columns)
+    if header_parts:
+        header += " (" + ", ".join(header_parts) + ")"
+    lines = ["|".join(row[key] for _, key in kept_columns).rstrip("|") for row in rows]
+    return label, header, lines
+
+
+def encode_context(structured_data, budget=None):
+    """구조화된 데이터를 토큰 예산 안의 압축 텍스트로 바꿉니다.
+
+    반환값:
+        text: 프롬프트에 넣을 텍스트
+        dropped: 예산 때문에 빠진 항목 수
+    """
+    if budget is None:
+        budget = CHATBOT_CONFIG.get("context_token_budget", 600)
+    max_chars = CHATBOT_CONFIG.get("context_item_chars", 80)
+    priority = CHATBOT_CONFIG.get("context_section_priority", DEFAULT_PRIORITY)
+
+    metadata = structured_data.get("metadata") or {}
+    content = structured_data.get("content") or {}
+    region = metadata.get("region")
+    today = timezone.localdate()
+    year = str(today.year)
+
+    head = [f"기준일 {today.isoformat()}"]
+    if region:
+        head.append(f"지역 {region}")
+    lines = [" | ".join(head)]
+    used = estimate_tokens(lines[0])
+
+    notes = [value for value in content.values() if isinstance(value, str) and value]
+    for note in notes:
+        lines.append(_clean(note, year))
+        used += estimate_tokens(note)
+
+    # 중복 항목(다른 섹션에 같은 제목으로 들어온 문서)은 우선순위가 높은 섹션에만 남깁니다.
+    sections = [s for s in priority if isinstance(content.get(s), list)]
+    sections += [s for s, v in content.items() if isinstance(v, list) and s not in sections]
+    seen_titles = set()
+    encoded = {}
+    for section in sections:
+        items = []
+        for item in content[section]:
+            title = _clean(item.get("title"), year)
+            if title and title in seen_titles:
+                continue
+            seen_titles.add(title)
+            items.append(item)
+        if items:
+            encoded[section] = _encode_section(section, items, region, year, max_chars)
+
+    # 우선순위 순서로 섹션마다 한 항목씩 번갈아 담습니다.
+    chosen = {section: [] for section in encoded}
+    full = set()
+    depth = max((len(rows) for _, _, rows in encoded.values()), default=0)
+    for index in range(depth):
+        for section, (label, header, rows) in encoded.items():
+            if section in full or index >= len(rows):
+                continue
+            cost = estimate_tokens(rows[index]) + 1
+            if not chosen[section]:
+                cost += estimate_tokens(f"[{label} 0/0] {header}") + 1
+            if used + cost > budget:
+                full.add(section)
+                continue
+            chosen[section].append(rows[index])
+            used += cost
+
+    dropped = 0
+    for section, (label, header, rows) in encoded.items():
+        dropped += len(rows) - len(chosen[section])
+        if not chosen[section]:
+            continue
+        count = str(len(rows)) if len(chosen[section]) == len(rows) else f"{len(chosen[section])}/{len(rows)}"
+        lines.append(f"[{label} {count}] {header}")
+        lines += chosen[section]
+
+    if not encoded and not notes:
+        lines.append("관련 데이터 없음")
+    return {"text": "\n".join(lines), "dropped": dropped}
+
+
+class ContextStats:
+    """근거 데이터를 압축해서 아낀 토큰 수를 모읍니다."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.prompts = 0
+        self.raw_tokens = 0
+        self.compact_tokens = 0
+        self.dropped_items = 0
+
+    def record(self, raw_tokens, compact_tokens, dropped):
+        with self._lock:
+            self.prompts += 1
+            self.raw_tokens += raw_tokens
+            self.compact_tokens += compact_tokens
+            self.dropped_items += dropped
+
+    def stats(self):
+        prompts = self.prompts
+        return {
+            "prompts": prompts,
+            "raw_tokens": self.raw_tokens,
+            "compact_tokens": self.compact_tokens,
+            "dropped_items": self.dropped_items,
+            "avg_raw_tokens": self.raw_tokens / prompts if prompts else 0.0,
+            "avg_compact_tokens": self.compact_tokens / prompts if prompts else 0.0,
+        }
+
+
+context_stats = ContextStats()
+
+
+def format_context(structured_data):
+    """프롬프트에 넣을 근거 데이터 텍스트를 만들고 압축 전후 토큰 수를 기록합니다."""
+    encoded = encode_context(structured_data)
+    context_stats.record(
+        estimate_tokens(str(structured_data)),
+        estimate_tokens(encoded["text"]),
+        encoded["dropped"],
+    )
+    return encoded["text"]
@@ -0,0 +1,112 @@
+"""구별 근거 데이터 요약(digest)을 미리 만들어 두고 키 하나로 꺼내 씁니다.
+
+요약은 RegionDigest 테이블에 JSON 문자열로 저장하고 Django 캐시에도 digest_cache_ttl초 동안
+올려 둡니다. 게시글/알림/행사가 바뀌면 signals가 (DB에 저장된) 지역 데이터 버전을 올리므로,
+다른 워커나 cron 명령이 바꾼 데이터라도 버전이 다른 요약은 다음 조회 때나 build_region_digests
+명령이 돌 때 다시 만들어집니다.
+"""
+import json
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from .cache import get_data_version
+from .config import CHATBOT_CONFIG
+from .fulltext import search_documents
+from .gazetteer import get_gazetteer
+from .models import RegionDigest
+from .parallel import submit
+from .vectors import search_similar_documents
+
+DIGEST_KEY_PREFIX = "chatbot:region_digest:"
+ITEMS_PER_SECTION = 5
+
+# 색인 문서 종류별로 담을 요약 항목
+CONTEXT_SECTIONS = {
+    "post": "community_news",  # 게시판 (board 앱)
+    "alert": "public_alerts",  # 공공데이터 알림 (public_data 앱)
+    "event": "local_events",  # 지역 이벤트 (local_events 앱)
+}
+
+
+def _cache_ttl():
+    # 버전 확인을 빠뜨리는 경로가 있어도 캐시에 오래 남지 않도록 만료 시간을 둡니다.
+    return CHATBOT_CONFIG.get("digest_cache_ttl", 3600)
+
+
+def build_digest_content(region):
+    """지역의 게시글, 알림, 행사를 종류별로 최대 5개씩 모읍니다."""
+    names = get_gazetteer().names_for(region)
+    content = {section: [] for section in CONTEXT_SECTIONS.values()}
+    seen = set()
+    # 구 이름을 직접 언급하지 않은 관련 문서는 벡터 검색으로 보충합니다. (전문 검색과 동시에 실행)
+    similar = None
+    if CHATBOT_CONFIG.get("vector_retrieval", True):
+        similar = submit(
+            search_similar_documents,
+            " ".join(names),
+            k=CHATBOT_CONFIG.get("vector_top_k", 5),
+            min_score=CHATBOT_CONFIG.get("vector_min_score", 0.2),
+        )
+    # 게시글, 알림, 행사를 종류별 상위 5개씩 한 번의 쿼리로 가져옵니다.
+    documents = search_documents(
+        names,
+        limit=ITEMS_PER_SECTION * len(CONTEXT_SECTIONS),
+        sources=list(CONTEXT_SECTIONS),
+        per_source=ITEMS_PER_SECTION,
+    )
+    if similar is not None:
+        documents += similar.result()
+    for document in documents:
+        key = (document["source"], document["object_id"])
+        items = content[CONTEXT_SECTIONS[document["source"]]]
+        if key in seen or len(items) >= ITEMS_PER_SECTION:
+            continue
+        seen.add(key)
+        items.append(dict(document["payload"], content=document["snippet"]))
+    return content
+
+
+def rebuild_region_digest(region):
+    """요약을 다시 만들어 DB와 캐시에 저장하고 반환합니다."""
+    version = get_data_version(region)
+    digest = {
+        "region": region,
+        "version": version,
+        "built_at": timezone.now().isoformat(),
+        "content": build_digest_content(region),
+    }
+    blob = json.dumps(digest, ensure_ascii=False)
+    RegionDigest.objects.update_or_create(
+        region=region, defaults={"blob": blob, "data_version": version}
+    )
+    cache.set(DIGEST_KEY_PREFIX + region, blob, _cache_ttl())
+    return digest
+
+
+def get_region_digest(region):
+    """지역 요약을 반환합니다. 캐시에 최신 요약이 있으면 DB를 조회하지 않습니다."""
+    digest_key = DIGEST_KEY_PREFIX + region
+    blob = cache.get(digest_key)
+    version = get_data_version(region)
+
+    if blob is None:
+        stored = RegionDigest.objects.filter(region=region).first()
+        if stored is not None:
+            blob = stored.blob
+            cache.set(digest_key, blob, _cache_ttl())
+
+    if blob is not None:
+        digest = json.loads(blob)
+        if digest["version"] == version:
+            return digest
+    return rebuild_region_digest(region)
+
+
+def is_stale(region):
+    """저장된 요약이 없거나 지역 데이터 버전이 바뀌었는지 확인합니다."""
+    blob = cache.get(DIGEST_KEY_PREFIX + region)
+    if blob is None:
+        stored = RegionDigest.objects.filter(region=region).only("data_version").first()
+        return stored is None or stored.data_version != get_data_version(region)
+    return json.loads(blob)["version"] != get_data_version(region)
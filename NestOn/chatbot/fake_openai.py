@@ -0,0 +1,134 @@
+"""벤치마크용 OpenAI 호환 가짜 서버 (POST /v1/chat/completions)
+
+API 키나 네트워크 없이 챗봇 파이프라인을 측정할 수 있도록 첫 토큰 지연 시간과 초당 토큰 수를
+흉내 내 응답합니다. 스트리밍(stream=true)과 일반 응답을 모두 지원하고, 질문 분류 프롬프트에는
+JSON 분류 결과를 돌려줍니다.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPLY_WORD = "안내"
+
+
+class FakeOpenAIServer:
+    def __init__(self, latency_ms=300, tokens_per_second=50, reply_tokens=60, host="127.0.0.1", port=0):
+        self.latency = latency_ms / 1000
+        self.tokens_per_second = tokens_per_second
+        self.reply_tokens = reply_tokens
+        self.request_count = 0
+        self._count_lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _reply_tokens(self, body):
+        prompt = body["messages"][-1]["content"] if body.get("messages") else ""
+        if '"question_type"' in prompt:
+            return ['{"region": null, "question_type": "news", "confidence": 0.9}']
+        count = min(self.reply_tokens, body.get("max_tokens") or self.reply_tokens)
+        return [REPLY_WORD + " "] * count
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send_json(self, status, payload):
+                data = json.dumps(payload, ensure_ascii=False).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                if not self.path.endswith("/chat/completions"):
+                    self._send_json(404, {"error": {"message": "not found"}})
+                    return
+                with server._count_lock:
+                    server.request_count += 1
+
+                tokens = server._reply_tokens(body)
+                prompt_tokens = sum(len(m.get("content") or "") for m in body.get("messages", []))
+                usage = {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": len(tokens),
+                    "total_tokens": prompt_tokens + len(tokens),
+                }
+                interval = 1 / server.tokens_per_second if server.tokens_per_second > 0 else 0
+                time.sleep(server.latency)
+
+                if not body.get("stream"):
+                    time.sleep(interval * len(tokens))
+                    self._send_json(200, {
+                        "id": "chatcmpl-fake",
+                        "object": "chat.completion",
+                        "created": int(time.time()),
+                        "model": body.get("model", "fake"),
+                        "choices": [{
+                            "index": 0,
+                            "message": {"role": "assistant", "content": "".join(tokens).strip()},
+                            "finish_reason": "stop",
+                        }],
+                        "usage": usage,
+                    })
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Cache-Control", "no-cache")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                include_usage = (body.get("stream_options") or {}).get("include_usage")
+                for index, token in enumerate(tokens):
+                    if index:
+                        time.sleep(interval)
+                    self._send_chunk([{"index": 0, "delta": {"content": token}, "finish_reason": None}], body)
+                self._send_chunk([{"index": 0, "delta": {}, "finish_reason": "stop"}], body)
+                if include_usage:
+                    self._send_chunk([], body, usage=usage)
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+                self.close_connection = True
+
+            def _send_chunk(self, choices, body, usage=None):
+                chunk = {
+                    "id": "chatcmpl-fake",
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": body.get("model", "fake"),
+                    "choices": choices,
+                }
+                if usage:
+                    chunk["usage"] = usage
+                self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode())
+                self.wfile.flush()
+
+        return Handler
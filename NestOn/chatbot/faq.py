@@ -0,0 +1,112 @@
+"""BotResponse 키워드로 자주 묻는 질문에 LLM 없이 바로 답하는 빠른 경로
+
+활성 BotResponse의 키워드를 모두 하나의 Aho-Corasick 오토마톤으로 묶어 두고,
+BotResponse가 바뀌면 signals가 DB의 버전을 올려 각 프로세스가 version_check_interval초 안에 다시 만듭니다.
+"""
+import threading
+
+from .automaton import AhoCorasick
+from .cache import normalize_question, versions
+from .config import CHATBOT_CONFIG
+from .gazetteer import get_gazetteer
+from .models import BotResponse
+
+FAQ_VERSION_NAME = "faq"
+
+
+def get_faq_version():
+    return versions.get(FAQ_VERSION_NAME)
+
+
+def bump_faq_version():
+    """키워드 응답이 바뀌었음을 모든 프로세스에 알립니다. (DB 버전이라 다른 프로세스도 곧 다시 만듦)"""
+    versions.bump([FAQ_VERSION_NAME])
+
+
+class KeywordMatcher:
+    """정규화한 질문에서 키워드를 찾아 등록된 응답을 돌려줍니다."""
+
+    def __init__(self, rows):
+        self._automaton = AhoCorasick()
+        for keyword, response in rows:
+            self._automaton.add(normalize_question(keyword), response)
+        self._automaton.build()
+
+    @property
+    def pattern_count(self):
+        return self._automaton.pattern_count
+
+    def match(self, text):
+        """(응답, 키워드가 질문에서 차지하는 비율) 목록을 반환합니다."""
+        normalized = normalize_question(text)
+        if not normalized:
+            return []
+        covered = {}
+        for start, end, response in self._automaton.find_longest(normalized):
+            covered[response] = covered.get(response, 0) + end - start
+        return [
+            (response, length / len(normalized))
+            for response, length in sorted(covered.items(), key=lambda item: -item[1])
+        ]
+
+
+class KeywordFastPath:
+    """버전이 바뀌면 다시 만드는 KeywordMatcher와 적중 횟수를 관리합니다."""
+
+    def __init__(self, min_coverage):
+        self.min_coverage = min_coverage
+        self._matcher = None
+        self._version = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_matcher(self):
+        version = get_faq_version()
+        if self._matcher is None or self._version != version:
+            with self._lock:
+                if self._matcher is None or self._version != version:
+                    rows = BotResponse.objects.filter(is_active=True).values_list(
+                        "keyword", "response"
+                    )
+                    self._matcher = KeywordMatcher(rows)
+                    self._version = version
+        return self._matcher
+
+    def answer(self, user_message):
+        """확실히 일치하는 키워드 응답이 있으면 반환하고, 없으면 None을 반환합니다.
+
+        서로 다른 응답의 키워드가 함께 나오거나, 키워드가 질문의 일부분만 차지하거나,
+        지역 소식처럼 지역이 드러난 질문이면 LLM에 맡깁니다.
+        """
+        matches = self.get_matcher().match(user_message)
+        if (
+            len(matches) == 1
+            and matches[0][1] >= self.min_coverage
+            and get_gazetteer().resolve(user_message) is None
+        ):
+            with self._lock:
+                self.hits += 1
+            return matches[0][0]
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def best_effort(self, user_message):
+        """LLM이 실패했을 때 쓸, 가장 많이 일치한 키워드 응답 (없으면 None)"""
+        matches = self.get_matcher().match(user_message)
+        return matches[0][0] if matches else None
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "keywords": self._matcher.pattern_count if self._matcher else 0,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+keyword_fast_path = KeywordFastPath(
+    min_coverage=CHATBOT_CONFIG.get("keyword_min_coverage", 0.3),
+)
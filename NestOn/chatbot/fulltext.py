@@ -0,0 +1,296 @@
+"""챗봇 근거 데이터(게시글, 공공 알림, 지역 행사)의 전문 검색 색인
+
+한국어는 띄어쓰기 단위로는 조사가 붙어 검색이 잘 되지 않으므로 모든 단어를 2글자 단위(bigram)로
+나눠 색인하고, 검색어도 같은 방식으로 나눈 뒤 구문(phrase) 검색을 합니다. 한 글자 검색어는
+그 글자로 시작하는 조각을 찾는 접두어 검색을 하고, 단어의 마지막 글자는 bigram의 첫 글자가
+되지 않으므로 한 글자 조각으로 함께 색인합니다.
+SQLite에서는 FTS5 가상 테이블, PostgreSQL에서는 tsvector GIN 인덱스를 사용합니다.
+"""
+import html
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+from board.models import Post
+from local_events.models import LocalEvent
+from public_data.models import PublicAlert
+
+from .models import ContextDocument
+
+_word_re = re.compile(r"\w+", re.UNICODE)
+
+
+def split_words(text):
+    return [word.lower() for word in _word_re.findall(text or "")]
+
+
+def word_bigrams(word):
+    """'강남구' → ['강남', '남구'] (한 글자 단어는 그대로)"""
+    if len(word) < 2:
+        return [word]
+    return [word[i:i + 2] for i in range(len(word) - 1)]
+
+
+def word_terms(word):
+    """'강남구' → ['강남', '남구', '구'] (bigram 뒤에 한 글자 검색용 마지막 글자)"""
+    if len(word) < 2:
+        return [word]
+    return word_bigrams(word) + [word[-1]]
+
+
+def to_index_terms(text):
+    """색인에 저장할 bigram 문자열을 만듭니다."""
+    return " ".join(term for word in split_words(text) for term in word_terms(word))
+
+
+def _query_phrases(words):
+    phrases = []
+    for word in words:
+        for part in split_words(word):
+            phrase = word_bigrams(part)
+            if phrase not in phrases:
+                phrases.append(phrase)
+    return phrases
+
+
+def fts5_match_expression(words):
+    """단어마다 bigram 구문을 만들어 OR로 묶은 FTS5 MATCH 식 (한 글자는 접두어 검색)"""
+    return " OR ".join(
+        '"' + " ".join(phrase) + '"' + ("*" if len(phrase[0]) == 1 else "")
+        for phrase in _query_phrases(words)
+    )
+
+
+def tsquery_expression(words):
+    """단어마다 bigram을 <->로 잇고 |로 묶은 PostgreSQL tsquery 식 (한 글자는 접두어 검색)"""
+    return " | ".join(
+        "(" + " <-> ".join(phrase) + (":*" if len(phrase[0]) == 1 else "") + ")"
+        for phrase in _query_phrases(words)
+    )
+
+
+def make_snippet(text, words, width=200, highlight=None):
+    """검색어가 처음 나오는 위치를 중심으로 원문 일부를 잘라냅니다. (대소문자 구분 없음)
+
+    highlight=(여는 태그, 닫는 태그)를 주면 HTML로 쓰는 것으로 보고, 원문은 이스케이프한 뒤
+    검색어와 일치한 부분만 태그로 감쌉니다.
+    """
+    text = text or ""
+    words = sorted({word for word in words if word}, key=len, reverse=True)
+    pattern = re.compile("|".join(re.escape(word) for word in words), re.IGNORECASE) if words else None
+    first = pattern.search(text) if pattern else None
+    start = max(first.start() - width // 4, 0) if first else 0
+    snippet = text[start:start + width]
+    if highlight:
+        open_tag, close_tag = highlight
+        # 원문에서 일치 구간을 먼저 찾고 조각마다 이스케이프하므로 태그가 엔티티 안에 들어가지 않습니다.
+        pieces = []
+        position = 0
+        for match in pattern.finditer(snippet) if pattern else ():
+            pieces.append(html.escape(snippet[position:match.start()]))
+            pieces.append(f"{open_tag}{html.escape(match.group(0))}{close_tag}")
+            position = match.end()
+        pieces.append(html.escape(snippet[position:]))
+        snippet = "".join(pieces)
+    prefix = "..." if start > 0 else ""
+    suffix = "..." if start + width < len(text) else ""
+    return prefix + snippet + suffix
+
+
+def _truncate(text, length=200):
+    text = text or ""
+    return text[:length] + "..." if len(text) > length else text
+
+
+def _post_document(post):
+    if not post.is_active:
+        return None
+    return {
+        "title": post.title,
+        "body": post.content,
+        "published_at": post.created_at,
+        "payload": {
+            "title": post.title,
+            "content": _truncate(post.content),
+            "date": post.created_at.strftime("%Y-%m-%d"),
+            "views": post.view_count,
+        },
+    }
+
+
+def _alert_document(alert):
+    return {
+        "title": alert.title,
+        "body": f"{alert.content}\n{alert.location_name}",
+        "published_at": alert.published_at,
+        "payload": {
+            "title": alert.title,
+            "content": _truncate(alert.content),
+            "category": alert.get_category_display(),
+            "date": alert.published_at.strftime("%Y-%m-%d %H:%M"),
+            "location": alert.location_name,
+        },
+    }
+
+
+def _event_document(event):
+    return {
+        "title": event.title,
+        "body": f"{event.content or ''}\n{event.location_name} {event.place or ''}",
+        "published_at": event.start_date,
+        "payload": {
+            "title": event.title,
+            "content": _truncate(event.content),
+            "period": f"{event.start_date} ~ {event.end_date}",
+            "location": event.location_name,
+            "score": event.recommendation_score,
+        },
+    }
+
+
+# 모델별 (source 값, 문서 생성 함수)
+INDEXED_MODELS = {
+    Post: ("post", _post_document),
+    PublicAlert: ("alert", _alert_document),
+    LocalEvent: ("event", _event_document),
+}
+
+
+def build_document(instance):
+    """색인할 문서 필드를 만들고, 색인에서 빠져야 하면 None을 반환합니다."""
+    source, builder = INDEXED_MODELS[type(instance)]
+    document = builder(instance)
+    if document is not None:
+        document["terms"] = to_index_terms(f"{document['title']}\n{document['body']}")
+    return source, document
+
+
+def index_instance(instance):
+    """저장된 객체의 색인 문서를 추가/갱신하고 반환합니다.
+
+    색인에서 빠져야 하는 객체(비활성 게시글 등)면 None을 반환하므로 remove_instance를 호출하세요.
+    """
+    source, document = build_document(instance)
+    if document is None:
+        return None
+    context_document, _ = ContextDocument.objects.update_or_create(
+        source=source, object_id=instance.pk, defaults=document
+    )
+    return context_document
+
+
+def remove_instance(instance):
+    """객체의 색인 문서를 지우고, 지운 문서 id 목록을 반환합니다."""
+    source, _ = INDEXED_MODELS[type(instance)]
+    documents = ContextDocument.objects.filter(source=source, object_id=instance.pk)
+    document_ids = list(documents.values_list("id", flat=True))
+    if document_ids:
+        documents.delete()
+    return document_ids
+
+
+def rebuild_index(batch_size=500):
+    """모든 색인 문서를 다시 만듭니다. 색인된 문서 수를 반환합니다."""
+    ContextDocument.objects.all().delete()
+    total = 0
+    for model in INDEXED_MODELS:
+        batch = []
+        for instance in model.objects.all().iterator(chunk_size=batch_size):
+            source, document = build_document(instance)
+            if document is None:
+                continue
+            batch.append(ContextDocument(source=source, object_id=instance.pk, **document))
+            if len(batch) >= batch_size:
+                ContextDocument.objects.bulk_create(batch)
+                total += len(batch)
+                batch = []
+        ContextDocument.objects.bulk_create(batch)
+        total += len(batch)
+    return total
+
+
+def _limit_per_source(sql, params, order_by, limit, per_source):
+    """순위 쿼리를 감싸 종류(source)별 상위 per_source개씩만 남깁니다. (쿼리 한 번)"""
+    if per_source:
+        sql = (
+            "SELECT * FROM (SELECT m.*, ROW_NUMBER() OVER (PARTITION BY m.source ORDER BY "
+            f"{order_by}) AS source_rank FROM ({sql}) m) ranked WHERE source_rank <= %s"
+        )
+        params = params + [per_source]
+    sql = f"SELECT * FROM ({sql}) m ORDER BY {order_by} LIMIT %s"
+    return ContextDocument.objects.raw(sql, params + [limit])
+
+
+def _search_sqlite(words, limit, sources, per_source=None):
+    # bm25()는 MATCH가 있는 쿼리 안에서만 쓸 수 있으므로 점수를 먼저 구한 뒤 바깥에서 정렬합니다.
+    sql = (
+        "SELECT d.*, bm25(chatbot_contextdocument_fts) AS score FROM chatbot_contextdocument_fts "
+        "JOIN chatbot_contextdocument d ON d.id = chatbot_contextdocument_fts.rowid "
+        "WHERE chatbot_contextdocument_fts MATCH %s"
+    )
+    params = [fts5_match_expression(words)]
+    if sources:
+        sql += " AND d.source IN (" + ", ".join(["%s"] * len(sources)) + ")"
+        params += list(sources)
+    return _limit_per_source(sql, params, "m.score, m.published_at DESC", limit, per_source)
+
+
+def _search_postgresql(words, limit, sources, per_source=None):
+    sql = (
+        "SELECT d.*, ts_rank(to_tsvector('simple', d.terms), q) AS score "
+        "FROM chatbot_contextdocument d, to_tsquery('simple', %s) q "
+        "WHERE to_tsvector('simple', d.terms) @@ q"
+    )
+    params = [tsquery_expression(words)]
+    if sources:
+        sql += " AND d.source IN (" + ", ".join(["%s"] * len(sources)) + ")"
+        params += list(sources)
+    return _limit_per_source(sql, params, "m.score DESC, m.published_at DESC", limit, per_source)
+
+
+def _search_fallback(words, limit, sources, per_source=None):
+    """전문 검색을 지원하지 않는 DB에서는 bigram 문자열 부분 일치로 대신합니다."""
+    query = Q()
+    for phrase in _query_phrases(words):
+        query |= Q(terms__contains=" ".join(phrase))
+    documents = ContextDocument.objects.filter(query)
+    if sources:
+        documents = documents.filter(source__in=sources)
+    if per_source:
+        # 창 함수를 쓰지 않고 종류별로 나눠 조회합니다.
+        per_source_documents = []
+        for source in sources or documents.values_list("source", flat=True).distinct():
+            per_source_documents += documents.filter(source=source).order_by("-published_at")[:per_source]
+        return per_source_documents[:limit]
+    return documents.order_by("-published_at")[:limit]
+
+
+def search_documents(words, limit=15, sources=None, highlight=None, per_source=None):
+    """검색어 목록과 관련된 문서를 한 번의 순위 쿼리로 찾아 스니펫과 함께 반환합니다.
+
+    per_source를 주면 종류(게시글/알림/행사)마다 상위 per_source개씩만 가져옵니다.
+    """
+    words = [word for word in words if word and word.strip()]
+    if not words:
+        return []
+    if connection.vendor == "sqlite":
+        documents = _search_sqlite(words, limit, sources, per_source)
+    elif connection.vendor == "postgresql":
+        documents = _search_postgresql(words, limit, sources, per_source)
+    else:
+        documents = _search_fallback(words, limit, sources, per_source)
+
+    results = []
+    for document in documents:
+        results.append(
+            {
+                "source": document.source,
+                "object_id": document.object_id,
+                "title": document.title,
+                "snippet": make_snippet(document.body, words, highlight=highlight),
+                "payload": document.payload,
+                "score": getattr(document, "score", None),
+            }
+        )
+    return results
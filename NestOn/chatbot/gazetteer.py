@@ -0,0 +1,173 @@
+"""LLM 호출 없이 질문 속 지명을 서울시 구로 매핑하는 지명 사전"""
+import csv
+import threading
+
+from django.conf import settings
+
+from .automaton import AhoCorasick
+
+SEOUL_CITY = "서울특별시"
+LOCATIONS_CSV_PATH = settings.BASE_DIR / "data" / "korea_locations_3level.csv"
+ALIASES_CSV_PATH = settings.BASE_DIR / "chatbot" / "data" / "region_aliases.csv"
+
+
+# 일상어로 더 자주 쓰여 '구'를 붙여 말할 때만 지역으로 보는 약칭 ('동작을 안 해요', '지구로')
+AMBIGUOUS_STEMS = {"동작", "구로", "중"}
+
+# 지명 바로 뒤에 붙어도 지명으로 보는 조사/접미어 ('마포에서', '강남쪽', '중구청', '강남역')
+# 여기에 없는 한글이 이어지면 다른 낱말의 일부로 봅니다. ('중구난방')
+BOUNDARY_SUFFIXES = (
+    "에서", "으로", "까지", "부터", "근처", "주변", "일대", "지역", "동네", "쪽",
+    "에", "의", "은", "는", "이", "가", "을", "를", "도", "로", "와", "과", "랑", "만",
+    "청", "역", "민", "내", "동", "앞", "길", "입구", "광장", "공원", "시장", "거리", "사거리", "타워",
+)
+
+
+def _district_stem(district):
+    """'마포구' → '마포'처럼 '구'를 뗀 약칭을 만듭니다. ('중구'나 뜻이 겹치는 약칭은 제외)"""
+    if district.endswith("구") and len(district) > 2 and district[:-1] not in AMBIGUOUS_STEMS:
+        return district[:-1]
+    return None
+
+
+def _city_names(city):
+    """'인천광역시' → {'인천광역시', '인천'}, '경상남도' → {'경상남도', '경남'}"""
+    for suffix in ("특별자치시", "특별자치도", "광역시", "특별시"):
+        if city.endswith(suffix):
+            return {city, city[:-len(suffix)]}
+    if city.endswith("도") and len(city) == 4:
+        return {city, city[0] + city[2]}
+    return {city, city.rstrip("도")}
+
+
+def _is_word_char(char):
+    return char.isalpha()
+
+
+def load_district_names():
+    """CSV와 Location 테이블에서 서울시 구 이름을 모읍니다."""
+    from User.models import Location
+
+    districts = set()
+    with open(LOCATIONS_CSV_PATH, newline="", encoding="utf-8") as csvfile:
+        for row in csv.DictReader(csvfile):
+            if row["level1_city"] == SEOUL_CITY:
+                districts.add(row["level2_district"])
+    try:
+        districts.update(
+            Location.objects.filter(level1_city=SEOUL_CITY).values_list(
+                "level2_district", flat=True
+            )
+        )
+    except Exception as e:
+        # 마이그레이션 전처럼 테이블이 없으면 CSV만으로 만듭니다.
+        print(f"Location 테이블 조회 오류: {e}")
+    return districts
+
+
+def load_other_cities():
+    """서울 밖 시/도 이름과 약칭 ('인천 중구'처럼 다른 도시의 같은 구 이름을 거르기 위함)"""
+    names = set()
+    with open(LOCATIONS_CSV_PATH, newline="", encoding="utf-8") as csvfile:
+        for row in csv.DictReader(csvfile):
+            if row["level1_city"] != SEOUL_CITY:
+                names.update(_city_names(row["level1_city"]))
+    return names
+
+
+def load_aliases():
+    """동네명, 역명 등 직접 정리한 별칭 목록을 (별칭, 구) 쌍으로 읽어옵니다."""
+    with open(ALIASES_CSV_PATH, newline="", encoding="utf-8") as csvfile:
+        return [(row["alias"], row["district"]) for row in csv.DictReader(csvfile)]
+
+
+class Gazetteer:
+    """구 이름, 약칭, 별칭을 하나의 Aho-Corasick 오토마톤으로 묶은 지명 사전
+
+    모든 이름은 단어 끝이나 조사/접미어 앞에서 끝날 때만 인정하고, 약칭('마포')은 단어 첫머리에서
+    시작해야 합니다.
+    구 이름 바로 앞에 서울이 아닌 도시 이름이 있으면('대구 중구') 그 구는 무시합니다.
+    """
+
+    def __init__(self, districts, aliases, other_cities=()):
+        self.districts = frozenset(districts)
+        self.other_cities = sorted(other_cities, key=len, reverse=True)
+        self._names = {district: [district] for district in self.districts}
+        self._automaton = AhoCorasick()
+        for district in self.districts:
+            self._automaton.add(district, (district, "name"))
+            stem = _district_stem(district)
+            if stem:
+                self._names[district].append(stem)
+                self._automaton.add(stem, (district, "stem"))
+        for alias, district in aliases:
+            if district in self.districts:
+                self._names[district].append(alias)
+                self._automaton.add(alias, (district, "alias"))
+        self._automaton.build()
+
+    @property
+    def pattern_count(self):
+        return self._automaton.pattern_count
+
+    def names_for(self, district):
+        """구 이름과 약칭, 별칭 목록을 반환합니다. (검색어 확장용)"""
+        return list(self._names.get(district, [district]))
+
+    @staticmethod
+    def _starts_word(text, start):
+        return start == 0 or not _is_word_char(text[start - 1]) or text[:start].endswith("서울")
+
+    @staticmethod
+    def _ends_word(text, end):
+        return end == len(text) or not _is_word_char(text[end]) or text.startswith(BOUNDARY_SUFFIXES, end)
+
+    def _follows_other_city(self, text, start):
+        before = text[:start].rstrip()
+        return any(before.endswith(city) for city in self.other_cities)
+
+    def _accept(self, text):
+        def accept(start, end, value):
+            _, kind = value
+            if not self._ends_word(text, end):
+                return False
+            if kind == "stem" and not self._starts_word(text, start):
+                return False
+            return kind == "alias" or not self._follows_other_city(text, start)
+        return accept
+
+    def find_all(self, text):
+        """텍스트에 언급된 구를 등장 순서대로 중복 없이 반환합니다."""
+        text = text or ""
+        found = []
+        for _, _, (district, _) in self._automaton.find_longest(text, accept=self._accept(text)):
+            if district not in found:
+                found.append(district)
+        return found
+
+    def find_candidates(self, text):
+        """경계/도시 검사 없이 이름이 들어 있기만 한 구 목록 (측정용)"""
+        found = []
+        for _, _, (district, _) in self._automaton.find_longest(text or ""):
+            if district not in found:
+                found.append(district)
+        return found
+
+    def resolve(self, text):
+        """가장 먼저 언급된 구를 반환하고, 없으면 None을 반환합니다."""
+        found = self.find_all(text)
+        return found[0] if found else None
+
+
+_gazetteer = None
+_gazetteer_lock = threading.Lock()
+
+
+def get_gazetteer():
+    """프로세스당 한 번만 만들어 재사용하는 지명 사전을 반환합니다."""
+    global _gazetteer
+    if _gazetteer is None:
+        with _gazetteer_lock:
+            if _gazetteer is None:
+                _gazetteer = Gazetteer(load_district_names(), load_aliases(), load_other_cities())
+    return _gazetteer
@@ -0,0 +1,106 @@
+"""사용자 질문의 지역과 유형을 분류합니다. (지명 사전 우선, LLM은 최대 1회)"""
+import json
+import re
+
+from .config import CHATBOT_CONFIG
+from .gazetteer import get_gazetteer
+from .llm import create_chat_completion, is_configured
+from .telemetry import stage
+
+SEOUL_DISTRICTS = (
+    "강남구", "서초구", "마포구", "서대문구", "종로구", "중구", "용산구", "성동구", "광진구",
+    "동대문구", "중랑구", "성북구", "강북구", "도봉구", "노원구", "은평구", "양천구", "강서구",
+    "구로구", "금천구", "영등포구", "동작구", "관악구", "송파구", "강동구",
+)
+
+QUESTION_TYPES = ("news", "general")
+
+# 지명 사전으로 지역을 찾았을 때 이 단어가 있으면 LLM 없이 소식 질문으로 봅니다.
+NEWS_KEYWORDS = (
+    "소식", "뉴스", "이슈", "사건", "사고", "행사", "축제", "재난", "알림", "공지",
+    "교통", "요즘", "최근", "근황", "무슨 일", "이벤트", "공연",
+)
+
+CLASSIFY_PROMPT = """다음 질문을 분석해 JSON 한 줄로만 답변해주세요.
+
+- region: 질문이 가리키는 서울시 구 이름 (동네명, 지명, 역명은 해당 구로 매핑, 없으면 null)
+  예시: "연희동" → "서대문구", "홍대" → "마포구", "강남역" → "강남구"
+- question_type: 지역 소식/뉴스/이슈 관련 질문이면 "news", 아니면 "general"
+- confidence: 판단에 대한 확신 (0~1 사이 숫자)
+
+서울시 25개 구: {districts}
+
+형식: {{"region": "마포구", "question_type": "news", "confidence": 0.9}}
+
+질문: {question}"""
+
+
+def _empty_intent():
+    return {"region": None, "question_type": "general", "confidence": 0.0, "source": "none"}
+
+
+def parse_intent(text):
+    """모델 응답에서 JSON을 찾아 검증된 분류 결과로 바꿉니다."""
+    intent = _empty_intent()
+    match = re.search(r"\{.*\}", text or "", re.DOTALL)
+    if not match:
+        return intent
+    try:
+        data = json.loads(match.group(0))
+    except json.JSONDecodeError:
+        return intent
+
+    region = data.get("region")
+    if region in SEOUL_DISTRICTS:
+        intent["region"] = region
+    if data.get("question_type") in QUESTION_TYPES:
+        intent["question_type"] = data["question_type"]
+    try:
+        intent["confidence"] = min(max(float(data.get("confidence", 0)), 0.0), 1.0)
+    except (TypeError, ValueError):
+        pass
+    return intent
+
+
+@stage("intent")
+def classify_question(user_message):
+    """질문의 지역, 유형, 확신도를 반환합니다. (LLM 호출은 최대 1회)"""
+    # 1단계: 지명 사전으로 지역 찾기 (LLM 왕복 없음)
+    region = get_gazetteer().resolve(user_message)
+    if region and any(keyword in user_message for keyword in NEWS_KEYWORDS):
+        return {"region": region, "question_type": "news", "confidence": 1.0, "source": "gazetteer"}
+
+    # 2단계: 지명 사전으로 판단이 끝나지 않은 질문만 LLM으로 분류
+    if not is_configured():
+        intent = _empty_intent()
+        if region:
+            intent.update(region=region, source="gazetteer")
+        return intent
+    try:
+        prompt = CLASSIFY_PROMPT.format(
+            districts=", ".join(SEOUL_DISTRICTS), question=user_message
+        )
+        # 분류 단계는 컨텍스트 조회를 하지 않는 저수준 호출만 사용합니다.
+        response = create_chat_completion(
+            [{"role": "user", "content": prompt}],
+            max_tokens=60,
+            temperature=0,
+            timeout=CHATBOT_CONFIG.get("intent_timeout", 5),
+            purpose="intent",
+        )
+        intent = parse_intent(response)
+        intent["source"] = "llm"
+    except Exception as e:
+        print(f"질문 분류 오류: {e}")
+        intent = _empty_intent()
+
+    # 지명 사전이 찾은 지역이 있으면 그것을 우선합니다.
+    if region:
+        intent["region"] = region
+        if intent["source"] == "none":
+            intent["source"] = "gazetteer"
+
+    # 확신이 낮은 소식 질문은 일반 질문으로 처리합니다.
+    if intent["confidence"] < CHATBOT_CONFIG.get("intent_min_confidence", 0.5):
+        intent["question_type"] = "general"
+    return intent
@@ -0,0 +1,97 @@
+"""봇 답변 생성 작업 큐 (외부 서비스 없이 DB 테이블 하나로 동작)
+
+chat_api가 비동기 모드로 호출되면 enqueue_reply()가 비어 있는 봇 메시지(status="pending")와
+ReplyJob을 만들고, run_reply_worker 명령이 claim_job()으로 작업을 하나씩 가져가 답변을 채웁니다.
+작업을 가져갈 때는 조건부 UPDATE로 잡으므로 여러 워커(스레드/프로세스)가 같은 작업을 두 번
+처리하지 않고, 처리 중에 워커가 죽은 작업은 임대 시간(lease)이 지나면 다시 대기열로 돌아갑니다.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .config import CHATBOT_CONFIG
+from .models import ChatMessage, ReplyJob
+
+
+class LeaseLost(Exception):
+    """임대 시간이 지나 다른 워커가 다시 가져간 작업을 끝내려고 할 때 냅니다."""
+
+
+def _held(job):
+    """job을 가져간 워커가 아직 임대를 쥐고 있을 때만 걸리는 조건"""
+    return ReplyJob.objects.filter(
+        pk=job.pk, status="running", locked_by=job.locked_by, locked_at=job.locked_at
+    )
+
+
+def enqueue_reply(session, user_message):
+    """빈 봇 메시지와 생성 작업을 만들고 봇 메시지를 반환합니다."""
+    with transaction.atomic():
+        bot_message = ChatMessage.objects.create(
+            session=session, message_type="bot", content="", status="pending"
+        )
+        ReplyJob.objects.create(user_message=user_message, bot_message=bot_message)
+    return bot_message
+
+
+def claim_job(worker_id):
+    """처리할 수 있는 작업을 하나 가져와 running으로 바꿉니다. 없으면 None을 반환합니다."""
+    now = timezone.now()
+    lease = timedelta(seconds=CHATBOT_CONFIG.get("reply_job_lease", 120))
+    candidates = ReplyJob.objects.filter(
+        Q(status="queued", available_at__lte=now)
+        | Q(status="running", locked_at__lt=now - lease)
+    ).order_by("available_at", "id").values_list("id", "status", "locked_at")[:10]
+
+    for job_id, status, locked_at in candidates:
+        # 다른 워커가 먼저 가져갔으면 0건이 바뀌므로 다음 후보로 넘어갑니다.
+        claimed = ReplyJob.objects.filter(pk=job_id, status=status, locked_at=locked_at).update(
+            status="running",
+            locked_by=worker_id,
+            locked_at=now,
+            attempts=F("attempts") + 1,
+        )
+        if claimed:
+            return ReplyJob.objects.select_related("user_message", "bot_message__session").get(
+                pk=job_id
+            )
+    return None
+
+
+def complete_job(job, content):
+    """봇 메시지에 답변을 채우고 작업을 끝냅니다. 임대를 잃었으면 LeaseLost를 냅니다."""
+    with transaction.atomic():
+        if not _held(job).update(status="done", last_error=""):
+            raise LeaseLost(f"작업 {job.pk}의 임대가 다른 워커로 넘어갔습니다.")
+        ChatMessage.objects.filter(pk=job.bot_message_id).update(
+            content=content, status="done"
+        )
+
+
+def retry_or_fail_job(job, error, fallback_content):
+    """재시도 횟수가 남았으면 백오프 뒤로 미루고, 아니면 기본 응답을 채워 실패로 끝냅니다.
+
+    작업이 실패로 끝났으면 True를 반환합니다. 임대를 잃었으면 LeaseLost를 냅니다.
+    """
+    max_attempts = CHATBOT_CONFIG.get("reply_job_max_attempts", 3)
+    if job.attempts < max_attempts:
+        delay = CHATBOT_CONFIG.get("reply_job_retry_delay", 5) * 2 ** (job.attempts - 1)
+        if not _held(job).update(
+            status="queued",
+            available_at=timezone.now() + timedelta(seconds=delay),
+            locked_by="",
+            locked_at=None,
+            last_error=str(error),
+        ):
+            raise LeaseLost(f"작업 {job.pk}의 임대가 다른 워커로 넘어갔습니다.")
+        return False
+
+    with transaction.atomic():
+        if not _held(job).update(status="failed", last_error=str(error)):
+            raise LeaseLost(f"작업 {job.pk}의 임대가 다른 워커로 넘어갔습니다.")
+        ChatMessage.objects.filter(pk=job.bot_message_id).update(
+            content=fallback_content, status="failed"
+        )
+    return True
@@ -0,0 +1,358 @@
+"""챗봇에서 사용하는 OpenAI 클라이언트 모음
+
+프로세스마다 커넥션 풀을 가진 클라이언트를 하나씩 재사용하고, 모든 호출에 전체 마감 시간을
+둡니다. 재시도할 만한 오류(시간 초과, 연결 실패, 429, 5xx)는 지터를 섞은 지수 백오프로 다시
+시도하고, 실패가 이어지면 회로 차단기가 열려 일정 시간 동안 호출 없이 LLMUnavailable을
+바로 냅니다. 호출하는 쪽은 LLMUnavailable을 받으면 기본 응답으로 넘어가면 됩니다.
+"""
+import asyncio
+import os
+import random
+import threading
+import time
+import weakref
+
+import httpx
+import openai
+
+from . import telemetry
+from .config import OPENAI_API_KEY, CHATBOT_CONFIG
+from .memory import estimate_tokens, message_tokens
+from .routing import choose_model, model_for
+
+# 잠깐 기다렸다 다시 보내면 성공할 수 있는 오류
+RETRYABLE_ERRORS = (
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+)
+
+
+class LLMUnavailable(Exception):
+    """마감 시간 안에 응답을 받지 못했거나 회로 차단기가 열려 있어 LLM을 쓸 수 없습니다."""
+
+
+class CircuitBreaker:
+    """연속 실패가 threshold번 쌓이면 reset_timeout초 동안 호출을 막습니다.
+
+    시간이 지나면 한 번만 시험 호출을 허용하고(half-open), 성공하면 다시 닫고 실패하면 또 막습니다.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, threshold, reset_timeout):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self.trips = 0
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state
+
+    def allow(self):
+        """지금 호출해도 되는지 반환합니다. half-open에서는 한 번만 허용합니다."""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            # 시험 호출이 결과를 남기지 못하고 끝났어도(연결 끊김 등) reset_timeout 뒤에는 다시 시험합니다.
+            now = time.monotonic()
+            if now - self._opened_at >= self.reset_timeout:
+                self._state = self.HALF_OPEN
+                self._opened_at = now
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.threshold:
+                if self._state != self.OPEN:
+                    self.trips += 1
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+breaker = CircuitBreaker(
+    threshold=CHATBOT_CONFIG.get("llm_breaker_threshold", 5),
+    reset_timeout=CHATBOT_CONFIG.get("llm_breaker_reset", 30),
+)
+
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+# AsyncOpenAI 내부의 httpx 커넥션 풀은 이벤트 루프에 묶이므로 루프별로 하나씩 둡니다.
+_async_clients = weakref.WeakKeyDictionary()
+
+_call_counts = {
+    "completions": 0,
+    "streams": 0,
+    "retries": 0,
+    "failures": 0,
+    "rejected": 0,  # 회로 차단기가 열려 있어 바로 거절한 호출
+    "downgraded": 0,  # 지연 시간 예산 때문에 빠른 모델로 낮춘 호출
+    "skipped": 0,  # 지연 시간 예산이 모자라 부르지 않은 호출
+}
+_call_counts_lock = threading.Lock()
+
+
+def _count_call(kind):
+    with _call_counts_lock:
+        _call_counts[kind] += 1
+
+
+def stats():
+    """프로세스가 시작된 뒤 모델 호출 횟수와 회로 차단기 상태"""
+    with _call_counts_lock:
+        counts = dict(_call_counts)
+    counts["breaker_state"] = breaker.state
+    counts["breaker_trips"] = breaker.trips
+    return counts
+
+
+def is_configured():
+    """OpenAI API 키가 설정되어 있는지 확인합니다."""
+    return bool(OPENAI_API_KEY) and OPENAI_API_KEY != "sk-your-team-api-key-here"
+
+
+def _timeout(seconds):
+    return httpx.Timeout(seconds, connect=min(CHATBOT_CONFIG.get("llm_connect_timeout", 3), seconds))
+
+
+def _limits():
+    max_connections = CHATBOT_CONFIG.get("llm_max_connections", 20)
+    return httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+
+
+def get_client():
+    """프로세스에서 재사용할 OpenAI 클라이언트를 반환합니다. (fork된 워커는 새로 만듭니다)"""
+    global _client, _client_pid
+    pid = os.getpid()
+    if _client is None or _client_pid != pid:
+        with _client_lock:
+            if _client is None or _client_pid != pid:
+                _client = openai.OpenAI(
+                    api_key=OPENAI_API_KEY,
+                    base_url=CHATBOT_CONFIG.get("llm_base_url"),
+                    max_retries=0,  # 재시도는 마감 시간을 지키도록 여기서 직접 합니다.
+                    http_client=httpx.Client(limits=_limits()),
+                )
+                _client_pid = pid
+    return _client
+
+
+def get_async_client():
+    """현재 이벤트 루프에서 재사용할 AsyncOpenAI 클라이언트를 반환합니다."""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = openai.AsyncOpenAI(
+            api_key=OPENAI_API_KEY,
+            base_url=CHATBOT_CONFIG.get("llm_base_url"),
+            max_retries=0,
+            http_client=httpx.AsyncClient(limits=_limits()),
+        )
+        _async_clients[loop] = client
+    return client
+
+
+def _backoff(attempt):
+    """full jitter 지수 백오프 (0 ~ base * 2^attempt 초)"""
+    return random.uniform(0, CHATBOT_CONFIG.get("llm_retry_backoff", 0.5) * 2 ** attempt)
+
+
+def _route(purpose, model, timeout):
+    """모델과 마감 시간을 고르고, 예산이 모자라거나 회로 차단기가 열려 있으면 LLMUnavailable을 냅니다."""
+    route = choose_model(purpose, timeout, model)
+    if route.model is None:
+        _count_call("skipped")
+        telemetry.record_llm_call(
+            model or model_for(purpose), purpose, 0, 0, 0.0, 0, "skipped", route.reason
+        )
+        raise LLMUnavailable("남은 지연 시간 예산이 모자라 LLM을 호출하지 않습니다.")
+    if route.reason == "downgraded":
+        _count_call("downgraded")
+    if not breaker.allow():
+        _count_call("rejected")
+        telemetry.record_llm_call(route.model, purpose, 0, 0, 0.0, 0, "rejected", route.reason)
+        raise LLMUnavailable("LLM 회로 차단기가 열려 있습니다.")
+    return route
+
+
+def create_chat_completion(
+    messages,
+    model=None,
+    max_tokens=None,
+    temperature=None,
+    timeout=None,
+    purpose="answer",
+):
+    """컨텍스트 조회 없이 주어진 메시지 그대로 모델을 호출하고 응답 텍스트를 반환합니다.
+
+    timeout은 재시도를 포함한 전체 마감 시간(초)입니다. 실패하면 LLMUnavailable을 냅니다.
+    purpose는 모델 선택과 계측에서 호출을 구분하는 이름입니다. (answer, intent 등)
+    model을 비워 두면 purpose에 설정된 모델을 쓰고, 요청의 지연 시간 예산에 따라 낮출 수 있습니다.
+    """
+    timeout = timeout if timeout is not None else CHATBOT_CONFIG.get("llm_timeout", 15)
+    route = _route(purpose, model, timeout)
+    model = route.model
+    started = time.perf_counter()
+    deadline = time.monotonic() + route.timeout
+    max_retries = CHATBOT_CONFIG.get("llm_max_retries", 2)
+    attempt = 0
+    while True:
+        _count_call("completions")
+        try:
+            response = get_client().chat.completions.create(
+                model=model,
+                messages=messages,
+                max_tokens=max_tokens if max_tokens is not None else CHATBOT_CONFIG.get("max_tokens", 800),
+                temperature=temperature if temperature is not None else CHATBOT_CONFIG.get("temperature", 0.7),
+                timeout=_timeout(max(deadline - time.monotonic(), 0.1)),
+            )
+        except RETRYABLE_ERRORS as e:
+            delay = _backoff(attempt)
+            if attempt >= max_retries or time.monotonic() + delay >= deadline:
+                _record_failure(model, purpose, messages, started, attempt, route.reason)
+                raise LLMUnavailable(f"LLM 호출 실패: {e}") from e
+            _count_call("retries")
+            attempt += 1
+            time.sleep(delay)
+            continue
+        except openai.OpenAIError as e:
+            # 인증 오류나 잘못된 요청은 다시 보내도 같으므로 바로 포기합니다.
+            _record_failure(model, purpose, messages, started, attempt, route.reason)
+            raise LLMUnavailable(f"LLM 호출 실패: {e}") from e
+        breaker.record_success()
+        content = response.choices[0].message.content
+        usage = response.usage
+        telemetry.record_llm_call(
+            model,
+            purpose,
+            usage.prompt_tokens if usage else _estimate_prompt_tokens(messages),
+            usage.completion_tokens if usage else estimate_tokens(content),
+            (time.perf_counter() - started) * 1000,
+            attempt,
+            "ok",
+            route.reason,
+        )
+        return content
+
+
+def _estimate_prompt_tokens(messages):
+    return sum(message_tokens(message["content"]) for message in messages)
+
+
+def _record_failure(model, purpose, messages, started, retries, route):
+    _count_call("failures")
+    breaker.record_failure()
+    telemetry.record_llm_call(
+        model,
+        purpose,
+        _estimate_prompt_tokens(messages),
+        0,
+        (time.perf_counter() - started) * 1000,
+        retries,
+        "error",
+        route,
+    )
+
+
+async def stream_chat_completion(messages, model=None, timeout=None, purpose="answer"):
+    """모델이 생성하는 토큰을 받는 즉시 하나씩 내보냅니다.
+
+    첫 토큰을 받기 전의 실패만 재시도하고, 전체 마감 시간을 넘기면 LLMUnavailable을 냅니다.
+    """
+    timeout = timeout if timeout is not None else CHATBOT_CONFIG.get("llm_timeout", 15)
+    route = _route(purpose, model, timeout)
+    model = route.model
+    started = time.perf_counter()
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + route.timeout
+    max_retries = CHATBOT_CONFIG.get("llm_max_retries", 2)
+    attempt = 0
+    started_output = False
+    completion = []
+    usage = None
+    finished = False
+    try:
+        while True:
+            _count_call("streams")
+            try:
+                stream = await get_async_client().chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    max_tokens=CHATBOT_CONFIG.get("max_tokens", 800),
+                    temperature=CHATBOT_CONFIG.get("temperature", 0.7),
+                    stream=True,
+                    stream_options={"include_usage": True},
+                    timeout=_timeout(max(deadline - loop.time(), 0.1)),
+                )
+                async for chunk in stream:
+                    if loop.time() > deadline:
+                        await stream.close()
+                        _record_failure(model, purpose, messages, started, attempt, route.reason)
+                        finished = True
+                        raise LLMUnavailable("LLM 스트리밍 마감 시간을 넘겼습니다.")
+                    if chunk.usage:
+                        usage = chunk.usage
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        started_output = True
+                        completion.append(delta)
+                        yield delta
+            except RETRYABLE_ERRORS as e:
+                delay = _backoff(attempt)
+                if started_output or attempt >= max_retries or loop.time() + delay >= deadline:
+                    _record_failure(model, purpose, messages, started, attempt, route.reason)
+                    finished = True
+                    raise LLMUnavailable(f"LLM 스트리밍 실패: {e}") from e
+                _count_call("retries")
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+            except openai.OpenAIError as e:
+                _record_failure(model, purpose, messages, started, attempt, route.reason)
+                finished = True
+                raise LLMUnavailable(f"LLM 스트리밍 실패: {e}") from e
+            breaker.record_success()
+            telemetry.record_llm_call(
+                model,
+                purpose,
+                usage.prompt_tokens if usage else _estimate_prompt_tokens(messages),
+                usage.completion_tokens if usage else estimate_tokens("".join(completion)),
+                (time.perf_counter() - started) * 1000,
+                attempt,
+                "ok",
+                route.reason,
+            )
+            finished = True
+            return
+    finally:
+        if not finished:
+            # 클라이언트가 연결을 끊어 스트림이 중간에 닫힌 경우
+            telemetry.record_llm_call(
+                model,
+                purpose,
+                _estimate_prompt_tokens(messages),
+                estimate_tokens("".join(completion)),
+                (time.perf_counter() - started) * 1000,
+                attempt,
+                "cancelled",
+                route.reason,
+            )
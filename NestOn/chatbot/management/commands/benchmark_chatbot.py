@@ -0,0 +1,186 @@
+import itertools
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import AccessToken
+from chatbot import llm
+from chatbot.cache import answer_cache
+from chatbot.config import CHATBOT_CONFIG
+from chatbot.fake_openai import FakeOpenAIServer
+from chatbot.models import ChatSession
+from chatbot.telemetry import percentile
+from chatbot.views import get_bot_response
+from User.models import CustomUser
+
+DEFAULT_QUESTIONS = [
+    '강남구 최근 소식 알려줘',
+    '마포 행사 뭐 있어?',
+    '홍대 근처 공사 소식 있나요',
+    '송파구 알림 정리해줘',
+    '서대문구에서 이번 주말에 열리는 행사',
+    '연희동 새 소식',
+    '노원구 교통 통제 있어?',
+    '오늘 서울 날씨 어때?',
+    '회원가입은 어떻게 하나요?',
+    '게시글은 어디서 쓰나요?',
+    '용산 이태원 축제 일정',
+    '관악구 도서관 소식',
+    '성수동 팝업스토어 정보',
+    '주말에 갈 만한 곳 추천해줘',
+    '영등포구 재난 문자 내용',
+    '중구 명동 행사 알려줘',
+]
+
+
+class Command(BaseCommand):
+    help = 'API 키와 네트워크 없이 가짜 OpenAI 서버로 챗봇 처리량과 지연 시간을 측정합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mode', choices=['function', 'api', 'both'], default='both',
+                            help='function: get_bot_response 직접 호출, api: chat API 호출')
+        parser.add_argument('--requests', type=int, default=200, help='모드별 요청 수')
+        parser.add_argument('--concurrency', type=int, default=8, help='동시 요청 수')
+        parser.add_argument('--corpus', help='질문 목록 파일 (한 줄에 질문 하나, 없으면 기본 질문 사용)')
+        parser.add_argument('--latency-ms', type=float, default=300, help='가짜 서버의 첫 토큰 지연 시간(ms)')
+        parser.add_argument('--tokens-per-second', type=float, default=50, help='가짜 서버의 초당 생성 토큰 수')
+        parser.add_argument('--reply-tokens', type=int, default=60, help='가짜 서버가 생성할 답변 토큰 수')
+        parser.add_argument('--use-cache', action='store_true',
+                            help='답변 캐시를 켠 채로 측정합니다. (기본은 매번 LLM까지 가도록 끔)')
+
+    def handle(self, *args, **options):
+        questions = self.load_questions(options['corpus'])
+        modes = ['function', 'api'] if options['mode'] == 'both' else [options['mode']]
+
+        server = FakeOpenAIServer(
+            latency_ms=options['latency_ms'],
+            tokens_per_second=options['tokens_per_second'],
+            reply_tokens=options['reply_tokens'],
+        )
+        saved = {
+            'api_key': llm.OPENAI_API_KEY,
+            'base_url': CHATBOT_CONFIG.get('llm_base_url'),
+            'cache_size': answer_cache.max_size,
+            'rate_limit': CHATBOT_CONFIG.get('rate_limit_enabled', True),
+            'quota': CHATBOT_CONFIG.get('llm_daily_token_quota'),
+        }
+        user = None
+        with server:
+            # 가짜 서버를 가리키는 클라이언트를 새로 만들도록 합니다.
+            llm.OPENAI_API_KEY = 'sk-benchmark'
+            CHATBOT_CONFIG['llm_base_url'] = server.url
+            llm._client = None
+            # 한 사용자로 몰아서 보내므로 요청 한도와 할당량은 끕니다.
+            CHATBOT_CONFIG['rate_limit_enabled'] = False
+            CHATBOT_CONFIG['llm_daily_token_quota'] = None
+            if not options['use_cache']:
+                answer_cache.max_size = 0
+            answer_cache.clear()
+            try:
+                suffix = uuid.uuid4().hex[:8]
+                user = CustomUser.objects.create_user(
+                    username=f'chatbot-benchmark-{suffix}',
+                    password=uuid.uuid4().hex,
+                    phone_number=f'bench-{suffix}',
+                )
+                for mode in modes:
+                    self.run_mode(mode, questions, user, server, options)
+            finally:
+                llm.OPENAI_API_KEY = saved['api_key']
+                CHATBOT_CONFIG['llm_base_url'] = saved['base_url']
+                llm._client = None
+                answer_cache.max_size = saved['cache_size']
+                CHATBOT_CONFIG['rate_limit_enabled'] = saved['rate_limit']
+                CHATBOT_CONFIG['llm_daily_token_quota'] = saved['quota']
+                answer_cache.clear()
+                if user is not None:
+                    ChatSession.objects.filter(user=user).delete()
+                    user.delete()
+        self.stdout.write(self.style.SUCCESS('측정이 완료되었습니다.'))
+
+    def load_questions(self, path):
+        if not path:
+            return DEFAULT_QUESTIONS
+        try:
+            with open(path, encoding='utf-8') as corpus:
+                questions = [line.strip() for line in corpus if line.strip()]
+        except OSError as e:
+            raise CommandError(f'질문 목록 파일을 읽을 수 없습니다: {e}')
+        if not questions:
+            raise CommandError('질문 목록 파일이 비어 있습니다.')
+        return questions
+
+    def run_mode(self, mode, questions, user, server, options):
+        total = options['requests']
+        question_cycle = itertools.cycle(questions)
+        question_lock = threading.Lock()
+        thread_state = threading.local()
+        token = str(AccessToken.for_user(user))
+
+        def next_question():
+            with question_lock:
+                return next(question_cycle)
+
+        def call_function(question):
+            get_bot_response(question)
+            return True
+
+        def call_api(question):
+            # 스레드마다 세션을 하나씩 만들어 대화를 이어갑니다.
+            if not hasattr(thread_state, 'client'):
+                thread_state.client = Client(headers={'Authorization': f'Bearer {token}'})
+                response = thread_state.client.post(reverse('chatbot:create_session'))
+                thread_state.session_id = response.json()['session_id']
+            response = thread_state.client.post(
+                reverse('chatbot:chat_api'),
+                {'message': question, 'session_id': thread_state.session_id},
+                content_type='application/json',
+            )
+            return response.status_code == 200
+
+        call = call_function if mode == 'function' else call_api
+
+        def run_one(_):
+            question = next_question()
+            try:
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    ok = call(question)
+                    elapsed_ms = (time.perf_counter() - started) * 1000
+                return ok, elapsed_ms, len(queries)
+            finally:
+                connection.close()
+
+        upstream_before = server.request_count
+        allowed_hosts = [*settings.ALLOWED_HOSTS, 'testserver']
+        with override_settings(ALLOWED_HOSTS=allowed_hosts):
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+                results = list(executor.map(run_one, range(total)))
+            wall_seconds = time.perf_counter() - started
+
+        latencies = sorted(elapsed for _, elapsed, _ in results)
+        query_counts = [count for _, _, count in results]
+        errors = sum(1 for ok, _, _ in results if not ok)
+        upstream = server.request_count - upstream_before
+
+        self.stdout.write(f'[{mode}] 요청 {total}개, 동시 {options["concurrency"]}개, 질문 {len(questions)}종')
+        self.stdout.write(f'  처리량: {total / wall_seconds:.1f} 요청/초 (총 {wall_seconds:.1f}초), 오류 {errors}개')
+        self.stdout.write(
+            '  지연 시간(ms): p50 {:.1f} / p95 {:.1f} / p99 {:.1f} / max {:.1f}'.format(
+                percentile(latencies, 0.50),
+                percentile(latencies, 0.95),
+                percentile(latencies, 0.99),
+                latencies[-1],
+            )
+        )
+        self.stdout.write(
+            f'  메시지당 DB 쿼리: 평균 {sum(query_counts) / total:.1f} / 최대 {max(query_counts)}'
+        )
+        self.stdout.write(f'  가짜 OpenAI 서버 호출: {upstream}회 (요청당 {upstream / total:.2f}회)')
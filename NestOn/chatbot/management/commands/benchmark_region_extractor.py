@@ -0,0 +1,65 @@
+import time
+from django.core.management.base import BaseCommand
+from chatbot.gazetteer import Gazetteer, load_aliases, load_district_names, load_other_cities
+from chatbot.models import ChatMessage
+
+
+def _percentile(sorted_values, ratio):
+    if not sorted_values:
+        return 0
+    index = min(int(len(sorted_values) * ratio), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+class Command(BaseCommand):
+    help = '저장된 사용자 질문으로 지명 사전 기반 지역 추출의 적중률과 지연 시간을 측정합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=5000, help='사용할 최근 사용자 질문 수')
+        parser.add_argument('--show-misses', type=int, default=10, help='출력할 미적중 질문 수')
+
+    def handle(self, *args, **options):
+        questions = list(
+            ChatMessage.objects.filter(message_type='user')
+            .order_by('-timestamp')
+            .values_list('content', flat=True)[:options['limit']]
+        )
+        if not questions:
+            self.stdout.write(self.style.WARNING('측정할 사용자 질문이 없습니다.'))
+            return
+
+        build_started = time.perf_counter()
+        gazetteer = Gazetteer(load_district_names(), load_aliases(), load_other_cities())
+        build_ms = (time.perf_counter() - build_started) * 1000
+
+        latencies = []
+        misses = []
+        rejected = []
+        for question in questions:
+            started = time.perf_counter_ns()
+            region = gazetteer.resolve(question)
+            latencies.append((time.perf_counter_ns() - started) / 1000)
+            if region is None:
+                misses.append(question)
+                # 이름은 들어 있지만 경계/다른 도시 검사로 버린 질문은 적중으로 세지 않고 따로 보여줍니다.
+                if gazetteer.find_candidates(question):
+                    rejected.append(question)
+
+        latencies.sort()
+        hit_count = len(questions) - len(misses)
+        self.stdout.write(f'질문 수: {len(questions)}  (패턴 {gazetteer.pattern_count}개, 빌드 {build_ms:.1f}ms)')
+        self.stdout.write(f'적중률: {hit_count / len(questions):.1%} ({hit_count}/{len(questions)})')
+        self.stdout.write(f'제외된 후보: {len(rejected)}개 (단어 경계 또는 다른 도시의 구 이름)')
+        self.stdout.write(
+            '지연 시간(µs): p50 {:.1f} / p95 {:.1f} / p99 {:.1f} / max {:.1f}'.format(
+                _percentile(latencies, 0.50),
+                _percentile(latencies, 0.95),
+                _percentile(latencies, 0.99),
+                latencies[-1],
+            )
+        )
+        for question in misses[:options['show_misses']]:
+            self.stdout.write(f'  미적중: {question[:60]}')
+        for question in rejected[:options['show_misses']]:
+            self.stdout.write(f'  제외: {question[:60]}')
+        self.stdout.write(self.style.SUCCESS('측정이 완료되었습니다.'))
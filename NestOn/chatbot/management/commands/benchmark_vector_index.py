@@ -0,0 +1,71 @@
+import tempfile
+import time
+import numpy as np
+from django.core.management.base import BaseCommand
+from chatbot.vectors import PrecomputedEmbedder, VectorIndex
+
+
+def _percentile(sorted_values, ratio):
+    if not sorted_values:
+        return 0
+    index = min(int(len(sorted_values) * ratio), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+class Command(BaseCommand):
+    help = '합성 벡터로 벡터 색인의 검색 재현율(recall@k)과 지연 시간을 측정합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=1_000_000, help='색인할 벡터 수')
+        parser.add_argument('--dim', type=int, default=256, help='벡터 차원')
+        parser.add_argument('--queries', type=int, default=200, help='측정할 질의 수')
+        parser.add_argument('-k', type=int, default=10, help='top-k')
+        parser.add_argument('--noise', type=float, default=0.5, help='질의에 섞을 잡음 크기 (정답 벡터 대비)')
+        parser.add_argument('--batch', type=int, default=100_000, help='한 번에 추가할 벡터 수')
+        parser.add_argument('--seed', type=int, default=13)
+
+    def handle(self, *args, **options):
+        size, dim, k = options['size'], options['dim'], options['k']
+        rng = np.random.default_rng(options['seed'])
+
+        with tempfile.TemporaryDirectory() as path:
+            # 실제 임베딩 대신 무작위 벡터를 그대로 넣는 precomputed 임베더로 색인을 만듭니다.
+            index = VectorIndex.open(path, backend=PrecomputedEmbedder.name, dim=dim)
+            self.stdout.write(f'{size}개 x {dim}차원 벡터를 추가하는 중입니다...')
+            started = time.perf_counter()
+            for start in range(0, size, options['batch']):
+                count = min(options['batch'], size - start)
+                vectors = rng.standard_normal((count, dim), dtype=np.float32)
+                vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+                index.upsert(list(range(start, start + count)), vectors)
+            build_seconds = time.perf_counter() - started
+
+            # 저장된 벡터에 잡음을 섞은 질의로 원래 벡터를 top-k 안에 찾는지 확인합니다.
+            targets = rng.choice(size, size=options['queries'], replace=False)
+            stored = np.memmap(index._vectors_path, dtype=np.float32, mode='r', shape=(size, dim))
+            latencies = []
+            hits = 0
+            for target in targets:
+                noise = rng.standard_normal(dim, dtype=np.float32)
+                query = stored[target] + options['noise'] * noise / np.linalg.norm(noise)
+                query /= np.linalg.norm(query)
+                started = time.perf_counter()
+                results = index.search_vector(query, k=k)
+                latencies.append((time.perf_counter() - started) * 1000)
+                hits += any(document_id == target for document_id, _ in results)
+
+        latencies.sort()
+        self.stdout.write(
+            f'색인: {size}개, {size * dim * 4 / 1024 ** 2:.0f}MB, 추가 {build_seconds:.1f}초 '
+            f'({size / build_seconds:,.0f}개/초)'
+        )
+        self.stdout.write(f'recall@{k}: {hits / len(targets):.1%} ({hits}/{len(targets)})')
+        self.stdout.write(
+            '질의 지연 시간(ms): p50 {:.1f} / p95 {:.1f} / p99 {:.1f} / max {:.1f}'.format(
+                _percentile(latencies, 0.50),
+                _percentile(latencies, 0.95),
+                _percentile(latencies, 0.99),
+                latencies[-1],
+            )
+        )
+        self.stdout.write(self.style.SUCCESS('측정이 완료되었습니다.'))
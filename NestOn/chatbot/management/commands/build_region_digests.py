@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from chatbot.digests import is_stale, rebuild_region_digest
+from chatbot.gazetteer import get_gazetteer
+
+
+class Command(BaseCommand):
+    help = '서울 각 구의 챗봇 근거 데이터 요약(digest)을 미리 만들어 둡니다. 기본값은 오래된 요약만 다시 만듭니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='최신 요약도 모두 다시 만듭니다.')
+        parser.add_argument('--region', action='append', help='특정 구만 다시 만듭니다. (여러 번 지정 가능)')
+
+    def handle(self, *args, **options):
+        regions = options['region'] or sorted(get_gazetteer().districts)
+        built = 0
+        for region in regions:
+            if not options['all'] and not is_stale(region):
+                continue
+            digest = rebuild_region_digest(region)
+            count = sum(len(items) for items in digest['content'].values())
+            self.stdout.write(f'  {region}: {count}개 항목')
+            built += 1
+        self.stdout.write(self.style.SUCCESS(f'🎉 총 {built}개 구의 요약을 만들었습니다. (전체 {len(regions)}개 구)'))
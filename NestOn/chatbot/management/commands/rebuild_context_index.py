@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from chatbot.fulltext import rebuild_index
+from chatbot.models import ContextDocument
+from chatbot.vectors import rebuild_vector_index
+
+
+class Command(BaseCommand):
+    help = '게시글, 공공 알림, 지역 행사로 챗봇 전문 검색 색인과 벡터 색인을 처음부터 다시 만듭니다.'
+
+    def handle(self, *args, **options):
+        self.stdout.write("전문 검색 색인을 다시 만드는 중입니다...")
+        total = rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f'🎉 총 {total}개의 문서를 색인했습니다.'))
+
+        # 벡터 색인은 ContextDocument id를 가리키므로 전문 검색 색인 다음에 다시 만듭니다.
+        self.stdout.write("벡터 색인을 다시 만드는 중입니다...")
+        total = rebuild_vector_index(ContextDocument.objects.all().iterator())
+        self.stdout.write(self.style.SUCCESS(f'🎉 총 {total}개의 문서를 벡터 색인에 넣었습니다.'))
@@ -0,0 +1,92 @@
+import os
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+from chatbot.jobs import LeaseLost, claim_job, complete_job, retry_or_fail_job
+from chatbot.memory import build_conversation_context
+from chatbot.ratelimit import charge_llm_tokens
+from chatbot.telemetry import trace
+from chatbot.views import get_bot_response, get_fallback_response
+
+
+class Command(BaseCommand):
+    help = '비동기 모드로 쌓인 챗봇 답변 생성 작업을 처리합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=4, help='동시에 처리할 작업 수 (스레드 수)')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='대기열이 비었을 때 다시 확인할 간격(초)')
+        parser.add_argument('--once', action='store_true', help='지금 처리할 수 있는 작업만 끝내고 종료합니다.')
+
+    def handle(self, *args, **options):
+        concurrency = max(options['concurrency'], 1)
+        worker_name = f'{socket.gethostname()}:{os.getpid()}'
+        self.stop = threading.Event()
+        self.processed = 0
+        self.failed = 0
+        self.counter_lock = threading.Lock()
+
+        self.stdout.write(f'답변 생성 워커를 시작합니다. (동시 처리 {concurrency}개)')
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures = [
+                executor.submit(self.work, f'{worker_name}:{index}', options)
+                for index in range(concurrency)
+            ]
+            try:
+                for future in futures:
+                    future.result()
+            except KeyboardInterrupt:
+                self.stdout.write('처리 중인 작업을 마치고 종료합니다...')
+                self.stop.set()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'🎉 작업 {self.processed}개를 처리했습니다. (실패 {self.failed}개)'
+        ))
+
+    def work(self, worker_id, options):
+        """스레드 하나가 작업을 가져와 처리하는 루프"""
+        try:
+            while not self.stop.is_set():
+                close_old_connections()
+                job = claim_job(worker_id)
+                if job is None:
+                    if options['once']:
+                        return
+                    self.stop.wait(options['poll_interval'])
+                    continue
+                self.process(job)
+        finally:
+            connection.close()
+
+    def process(self, job):
+        question = job.user_message.content
+        try:
+            with trace('job') as current:
+                conversation = build_conversation_context(
+                    job.bot_message.session, exclude_id=job.user_message_id
+                )
+                reply = get_bot_response(question, conversation, fallback=False)
+            charge_llm_tokens(job.bot_message.session.user_id, current.llm_tokens)
+            error = None if reply else '답변을 생성하지 못했습니다.'
+        except Exception as e:
+            reply, error = None, e
+
+        try:
+            if reply:
+                complete_job(job, reply)
+                failed = False
+            else:
+                failed = retry_or_fail_job(job, error, get_fallback_response(question))
+                if not failed:
+                    self.stdout.write(f'  작업 {job.pk} 재시도 예정 ({job.attempts}회 실패): {error}')
+        except LeaseLost as e:
+            # 처리가 임대 시간보다 오래 걸려 다른 워커가 맡았으면 그 워커의 결과를 남깁니다.
+            self.stdout.write(f'  {e}')
+            return
+
+        with self.counter_lock:
+            if reply or failed:
+                self.processed += 1
+            if failed:
+                self.failed += 1
@@ -0,0 +1,177 @@
+"""여러 턴 대화를 위한 대화 기록 관리
+
+최근 ChatMessage를 토큰 예산 안에서 최신순으로 담고, 예산을 넘는 오래된 턴은
+ChatSession.memory_summary에 한 줄씩 접어 넣습니다. 접힌 턴은 다시 조회하지 않으므로
+대화가 길어져도 프롬프트 크기와 조회 비용이 일정하게 유지됩니다.
+"""
+import re
+import threading
+
+from .config import CHATBOT_CONFIG
+from .models import ChatMessage, ChatSession
+from .telemetry import stage
+
+# 메시지마다 역할/구분자에 붙는 대략적인 토큰 수
+MESSAGE_OVERHEAD_TOKENS = 4
+SUMMARY_LINE_LENGTH = 60
+
+_wide_char_re = re.compile(r"[\u1100-\u11ff\u3040-\u30ff\u3130-\u318f\u3400-\u9fff\uac00-\ud7af]")
+_space_re = re.compile(r"\s+")
+
+
+def estimate_tokens(text):
+    """토크나이저 없이 토큰 수를 어림합니다.
+
+    한글/한자/가나는 글자당 1토큰, 나머지는 4글자당 1토큰으로 계산합니다.
+    (cl100k 기준 한국어 문장은 대체로 이보다 조금 적게 나오므로 예산을 넘기지 않는 쪽으로 어림합니다.)
+    """
+    text = text or ""
+    wide = len(_wide_char_re.findall(text))
+    narrow = len(_space_re.sub("", text)) - wide
+    return wide + (narrow + 3) // 4
+
+
+def message_tokens(content):
+    return estimate_tokens(content) + MESSAGE_OVERHEAD_TOKENS
+
+
+def summary_line(message):
+    """접어 넣을 메시지를 요약 한 줄로 만듭니다."""
+    speaker = "사용자" if message.message_type == "user" else "챗봇"
+    content = _space_re.sub(" ", message.content).strip()
+    if len(content) > SUMMARY_LINE_LENGTH:
+        content = content[:SUMMARY_LINE_LENGTH] + "..."
+    return f"{speaker}: {content}"
+
+
+def fold_summary(summary, messages, budget):
+    """기존 요약 뒤에 메시지들을 덧붙이고, 예산을 넘으면 가장 오래된 줄부터 버립니다."""
+    lines = [line for line in summary.splitlines() if line]
+    lines += [summary_line(message) for message in messages]
+    while lines and estimate_tokens("\n".join(lines)) > budget:
+        lines.pop(0)
+    return "\n".join(lines)
+
+
+class MemoryStats:
+    """대화 기록을 프롬프트에 넣을 때 아낀 토큰 수를 모읍니다."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.turns = 0
+        self.prompt_tokens = 0
+        self.tokens_saved = 0
+        self.folded_messages = 0
+
+    def record(self, context):
+        with self._lock:
+            self.turns += 1
+            self.prompt_tokens += context["prompt_tokens"]
+            self.tokens_saved += context["tokens_saved"]
+            self.folded_messages += context["folded"]
+
+    def stats(self):
+        turns = self.turns
+        return {
+            "turns": turns,
+            "prompt_tokens": self.prompt_tokens,
+            "tokens_saved": self.tokens_saved,
+            "folded_messages": self.folded_messages,
+            "avg_prompt_tokens": self.prompt_tokens / turns if turns else 0.0,
+            "avg_tokens_saved": self.tokens_saved / turns if turns else 0.0,
+        }
+
+
+memory_stats = MemoryStats()
+
+
+@stage("memory")
+def build_conversation_context(session, exclude_id=None):
+    """세션의 이전 대화를 토큰 예산에 맞춰 모읍니다.
+
+    반환값:
+        summary: 예산 밖으로 밀려난 오래된 대화 요약 (없으면 "")
+        history: 프롬프트에 그대로 넣을 최근 메시지 [{"role", "content"}] (오래된 순)
+        prompt_tokens: summary와 history의 어림 토큰 수
+        tokens_saved: 전체 기록을 그대로 넣었을 때보다 줄어든 토큰 수
+        folded: 이번 턴에 요약으로 접힌 메시지 수
+
+    최근 history_fetch_limit개보다 오래된, 아직 접지 않은 메시지가 있으면 그것부터 모두 접은 뒤
+    summarized_until을 옮기므로 중간 메시지가 요약에서 빠지지 않습니다.
+    """
+    budget = CHATBOT_CONFIG.get("history_token_budget", 800)
+    summary_budget = CHATBOT_CONFIG.get("history_summary_token_budget", 300)
+    fetch_limit = CHATBOT_CONFIG.get("history_fetch_limit", 40)
+
+    # 아직 생성 중이거나 실패한 봇 메시지는 대화 기록에 넣지 않습니다.
+    messages = ChatMessage.objects.filter(
+        session=session, id__gt=session.summarized_until, status="done"
+    ).only("id", "message_type", "content")
+    if exclude_id is not None:
+        messages = messages.exclude(id=exclude_id)
+    recent = list(messages.order_by("-timestamp", "-id")[:fetch_limit])
+
+    # 최신 메시지부터 예산이 찰 때까지 담습니다.
+    kept = []
+    used = 0
+    for message in recent:
+        tokens = message_tokens(message.content)
+        if used + tokens > budget:
+            break
+        kept.append(message)
+        used += tokens
+    overflow = recent[len(kept):]
+    kept.reverse()
+    overflow.reverse()
+
+    summary = session.memory_summary
+    summarized_tokens = session.summarized_tokens
+    folded = 0
+    last_folded_id = session.summarized_until
+    if len(recent) == fetch_limit:
+        # 조회한 최근 메시지보다 오래된, 아직 접지 않은 메시지가 남아 있으면 오래된 순으로 나눠 접습니다.
+        backlog = messages.filter(id__lt=recent[-1].id).order_by("id")
+        while True:
+            batch = list(backlog.filter(id__gt=last_folded_id)[:fetch_limit])
+            if not batch:
+                break
+            summary = fold_summary(summary, batch, summary_budget)
+            summarized_tokens += sum(message_tokens(message.content) for message in batch)
+            folded += len(batch)
+            last_folded_id = batch[-1].id
+    if overflow:
+        summary = fold_summary(summary, overflow, summary_budget)
+        summarized_tokens += sum(message_tokens(message.content) for message in overflow)
+        folded += len(overflow)
+        last_folded_id = overflow[-1].id
+
+    if folded:
+        # 같은 세션의 다른 요청이 먼저 접었다면 이번 결과는 저장하지 않습니다.
+        updated = ChatSession.objects.filter(
+            pk=session.pk, summarized_until=session.summarized_until
+        ).update(
+            memory_summary=summary,
+            summarized_until=last_folded_id,
+            summarized_tokens=summarized_tokens,
+        )
+        if updated:
+            session.memory_summary = summary
+            session.summarized_until = last_folded_id
+            session.summarized_tokens = summarized_tokens
+
+    summary_tokens = message_tokens(summary) if summary else 0
+    context = {
+        "summary": summary,
+        "history": [
+            {
+                "role": "user" if message.message_type == "user" else "assistant",
+                "content": message.content,
+            }
+            for message in kept
+        ],
+        "prompt_tokens": used + summary_tokens,
+        "tokens_saved": max(summarized_tokens - summary_tokens, 0),
+        "folded": folded,
+    }
+    memory_stats.record(context)
+    return context
@@ -0,0 +1,75 @@
+# Generated by Django 4.2.23 on 2026-10-18 10:18
+
+from django.db import migrations, models
+
+# SQLite는 FTS5 가상 테이블을 외부 콘텐츠 방식으로 두고 트리거로 동기화합니다.
+SQLITE_CREATE = [
+    """CREATE VIRTUAL TABLE chatbot_contextdocument_fts USING fts5(
+        terms, content='chatbot_contextdocument', content_rowid='id', tokenize='unicode61'
+    )""",
+    """CREATE TRIGGER chatbot_contextdocument_ai AFTER INSERT ON chatbot_contextdocument BEGIN
+        INSERT INTO chatbot_contextdocument_fts(rowid, terms) VALUES (new.id, new.terms);
+    END""",
+    """CREATE TRIGGER chatbot_contextdocument_ad AFTER DELETE ON chatbot_contextdocument BEGIN
+        INSERT INTO chatbot_contextdocument_fts(chatbot_contextdocument_fts, rowid, terms)
+        VALUES ('delete', old.id, old.terms);
+    END""",
+    """CREATE TRIGGER chatbot_contextdocument_au AFTER UPDATE ON chatbot_contextdocument BEGIN
+        INSERT INTO chatbot_contextdocument_fts(chatbot_contextdocument_fts, rowid, terms)
+        VALUES ('delete', old.id, old.terms);
+        INSERT INTO chatbot_contextdocument_fts(rowid, terms) VALUES (new.id, new.terms);
+    END""",
+]
+SQLITE_DROP = [
+    "DROP TRIGGER IF EXISTS chatbot_contextdocument_au",
+    "DROP TRIGGER IF EXISTS chatbot_contextdocument_ad",
+    "DROP TRIGGER IF EXISTS chatbot_contextdocument_ai",
+    "DROP TABLE IF EXISTS chatbot_contextdocument_fts",
+]
+
+# PostgreSQL은 tsvector 식 인덱스(GIN)를 사용합니다.
+POSTGRES_CREATE = [
+    "CREATE INDEX chatbot_contextdocument_terms_gin ON chatbot_contextdocument "
+    "USING GIN (to_tsvector('simple', terms))",
+]
+POSTGRES_DROP = [
+    "DROP INDEX IF EXISTS chatbot_contextdocument_terms_gin",
+]
+
+
+def _run(statements_by_vendor):
+    def run(apps, schema_editor):
+        for statement in statements_by_vendor.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+    return run
+
+
+create_fulltext_index = _run({'sqlite': SQLITE_CREATE, 'postgresql': POSTGRES_CREATE})
+drop_fulltext_index = _run({'sqlite': SQLITE_DROP, 'postgresql': POSTGRES_DROP})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chatbot', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContextDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('post', '게시글'), ('alert', '공공 알림'), ('event', '지역 행사')], max_length=10)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('title', models.CharField(max_length=255)),
+                ('body', models.TextField()),
+                ('terms', models.TextField()),
+                ('payload', models.JSONField(default=dict)),
+                ('published_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'unique_together': {('source', 'object_id')},
+            },
+        ),
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.23 on 2026-10-18 10:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chatbot', '0002_contextdocument'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RegionDigest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('region', models.CharField(max_length=50, unique=True)),
+                ('blob', models.TextField()),
+                ('data_version', models.BigIntegerField()),
+                ('built_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.23 on 2026-10-18 10:24
+
+from django.db import migrations, models
+
+
+def fill_session_summaries(apps, schema_editor):
+    """기존 세션의 요약을 첫 번째 사용자 메시지로 채웁니다."""
+    ChatSession = apps.get_model('chatbot', 'ChatSession')
+    ChatMessage = apps.get_model('chatbot', 'ChatMessage')
+    first_messages = {}
+    for session_id, content in (
+        ChatMessage.objects.filter(message_type='user')
+        .order_by('session_id', 'timestamp', 'id')
+        .values_list('session_id', 'content')
+        .iterator()
+    ):
+        first_messages.setdefault(session_id, content)
+
+    sessions = []
+    for session in ChatSession.objects.filter(pk__in=first_messages).only('id'):
+        content = first_messages[session.pk]
+        session.summary = '질문: ' + (content[:50] + '...' if len(content) > 50 else content)
+        sessions.append(session)
+    ChatSession.objects.bulk_update(sessions, ['summary'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chatbot', '0003_regiondigest'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatsession',
+            name='summary',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+        migrations.AddIndex(
+            model_name='chatsession',
+            index=models.Index(fields=['user', 'is_active', '-created_at', '-id'], name='chatbot_session_list_idx'),
+        ),
+        migrations.RunPython(fill_session_summaries, migrations.RunPython.noop),
+    ]
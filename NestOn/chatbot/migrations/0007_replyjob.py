@@ -0,0 +1,39 @@
+# Generated by Django 4.2.23 on 2026-10-18 10:31
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chatbot', '0006_chatsession_memory'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatmessage',
+            name='status',
+            field=models.CharField(choices=[('done', '완료'), ('pending', '생성 중'), ('failed', '실패')], default='done', max_length=10),
+        ),
+        migrations.CreateModel(
+            name='ReplyJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('queued', '대기'), ('running', '처리 중'), ('done', '완료'), ('failed', '실패')], default='queued', max_length=10)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('available_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('locked_by', models.CharField(blank=True, default='', max_length=100)),
+                ('locked_at', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('bot_message', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='reply_job', to='chatbot.chatmessage')),
+                ('user_message', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='chatbot.chatmessage')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'available_at'], name='chatbot_replyjob_queue_idx')],
+            },
+        ),
+    ]
@@ -8,12 +8,19 @@ class ChatSession(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)
+    summary = models.CharField(max_length=100, blank=True, default='')  # 첫 사용자 메시지로 만든 요약
+    memory_summary = models.TextField(blank=True, default='')  # 토큰 예산 밖으로 밀려난 이전 대화 요약
+    summarized_until = models.PositiveBigIntegerField(default=0)  # 요약에 접힌 마지막 메시지 id
+    summarized_tokens = models.PositiveIntegerField(default=0)  # 요약에 접힌 메시지들의 어림 토큰 수
 
     def __str__(self):
         return f"Session {self.session_id}"
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'is_active', '-created_at', '-id'], name='chatbot_session_list_idx'),
+        ]
 
 class ChatMessage(models.Model):
     MESSAGE_TYPES = [
@@ -21,14 +28,54 @@ class ChatMessage(models.Model):
         ('bot', '챗봇'),
     ]
 
+    STATUS_CHOICES = [
+        ('done', '완료'),
+        ('pending', '생성 중'),
+        ('failed', '실패'),
+    ]
+
     session = models.ForeignKey(ChatSession, on_delete=models.CASCADE, related_name='messages')
     message_type = models.CharField(max_length=10, choices=MESSAGE_TYPES)
     content = models.TextField()
     timestamp = models.DateTimeField(default=timezone.now)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='done')
 
     def __str__(self):
         return f"{self.get_message_type_display()}: {self.content[:50]}..."
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['session', 'timestamp'], name='chatbot_message_session_idx'),
+        ]
+
+class ReplyJob(models.Model):
+    """비동기 모드에서 봇 답변 생성을 기다리는 작업 (run_reply_worker 명령이 처리)"""
+    STATUS_CHOICES = [
+        ('queued', '대기'),
+        ('running', '처리 중'),
+        ('done', '완료'),
+        ('failed', '실패'),
+    ]
+
+    user_message = models.ForeignKey(ChatMessage, on_delete=models.CASCADE, related_name='+')
+    bot_message = models.OneToOneField(ChatMessage, on_delete=models.CASCADE, related_name='reply_job')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now)  # 재시도 대기 중이면 이 시각 이후에 처리
+    locked_by = models.CharField(max_length=100, blank=True, default='')
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"ReplyJob {self.pk} ({self.status})"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'available_at'], name='chatbot_replyjob_queue_idx'),
+        ]
+
 class BotResponse(models.Model):
     keyword = models.CharField(max_length=100)
     response = models.TextField()
@@ -40,3 +87,43 @@ class BotResponse(models.Model):
 
     class Meta:
         ordering = ['keyword']
+
+class ContextDocument(models.Model):
+    """챗봇 답변 근거로 쓰는 게시글/알림/행사의 전문 검색용 사본"""
+    SOURCE_TYPES = [
+        ('post', '게시글'),
+        ('alert', '공공 알림'),
+        ('event', '지역 행사'),
+    ]
+
+    source = models.CharField(max_length=10, choices=SOURCE_TYPES)
+    object_id = models.PositiveBigIntegerField()
+    title = models.CharField(max_length=255)
+    body = models.TextField()  # 스니펫을 만들 원문
+    terms = models.TextField()  # 2글자 단위로 나눈 검색어 (FTS5 / tsvector가 색인)
+    payload = models.JSONField(default=dict)  # 프롬프트에 그대로 넣을 요약 정보
+    published_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"[{self.get_source_display()}] {self.title}"
+
+    class Meta:
+        unique_together = ('source', 'object_id')
+
+class RegionDigest(models.Model):
+    """구별로 미리 만들어 둔 챗봇 근거 데이터 묶음 (JSON 직렬화 값 하나로 저장)"""
+    region = models.CharField(max_length=50, unique=True)
+    blob = models.TextField()
+    data_version = models.BigIntegerField()  # 만들 당시의 지역 데이터 버전
+    built_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.region} 요약 ({self.built_at:%Y-%m-%d %H:%M})"
+
+class DataVersion(models.Model):
+    """데이터가 바뀔 때마다 올라가는 버전 번호 (모든 프로세스가 같은 값을 보도록 DB에 저장)"""
+    name = models.CharField(max_length=100, unique=True)  # 'data:마포구', 'data:*', 'faq' 등
+    version = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name} v{self.version}"
@@ -0,0 +1,31 @@
+"""근거 데이터 조회를 동시에 실행하기 위한 공용 스레드 풀
+
+여러 출처(전문 검색, 벡터 검색, 질문 분류)를 차례로 기다리면 지연 시간이 모두 더해지므로,
+서로 기다릴 필요가 없는 조회는 submit()으로 먼저 보내 두고 나중에 결과를 받습니다.
+작업은 호출한 쪽의 contextvars(telemetry trace 등)를 그대로 물려받고, 끝나면 워커 스레드의
+DB 연결을 정리합니다.
+"""
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import close_old_connections
+
+from .config import CHATBOT_CONFIG
+
+_executor = ThreadPoolExecutor(
+    max_workers=CHATBOT_CONFIG.get("context_workers", 4),
+    thread_name_prefix="chatbot-context",
+)
+
+
+def _run(func, args, kwargs):
+    try:
+        return func(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+def submit(func, *args, **kwargs):
+    """func를 워커 스레드에서 실행하고 Future를 반환합니다."""
+    context = contextvars.copy_context()
+    return _executor.submit(context.run, _run, func, args, kwargs)
@@ -0,0 +1,152 @@
+"""챗봇 요청 속도 제한(토큰 버킷)과 사용자별 하루 LLM 토큰 할당량
+
+버킷 상태와 사용량은 Django 캐시에 저장하므로 DB를 조회하지 않습니다. 요청마다 사용자 버킷과
+전체 버킷에서 토큰을 하나씩 꺼내고, 비어 있으면 다시 채워질 때까지 기다릴 시간(Retry-After)을
+돌려줍니다. LLM 사용량은 요청이 끝난 뒤 telemetry trace에 모인 토큰 수만큼 그날 사용량에 더합니다.
+
+버킷 갱신(조회 후 저장)은 프로세스 안에서만 잠그므로, 여러 프로세스가 같은 캐시를 쓰면
+동시에 들어온 요청 몇 개가 더 통과할 수 있습니다.
+"""
+import math
+import threading
+import time
+from datetime import datetime, timedelta
+
+from django.core.cache import cache
+from django.http import JsonResponse
+from django.utils import timezone
+
+from .config import CHATBOT_CONFIG
+
+BUCKET_KEY_PREFIX = "chatbot:rate:"
+QUOTA_KEY_PREFIX = "chatbot:quota:"
+GLOBAL_BUCKET = "global"
+CLOSED_RETRY_AFTER = 60  # 분당 요청 수가 0인(닫힌) 버킷에서 다시 시도하라고 안내할 시간(초)
+
+_lock = threading.Lock()
+
+
+class TokenBucket:
+    """capacity만큼 한 번에 몰아 쓸 수 있고 초당 refill_rate개씩 다시 채워지는 버킷
+
+    refill_rate가 0 이하면 닫힌 버킷으로 보고 모든 요청을 막습니다.
+    """
+
+    def __init__(self, name, capacity, refill_rate):
+        self.key = BUCKET_KEY_PREFIX + name
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+
+    def _load(self, now):
+        state = cache.get(self.key)
+        if state is None:
+            return float(self.capacity)
+        tokens, updated = state
+        return min(self.capacity, tokens + (now - updated) * self.refill_rate)
+
+    def _save(self, tokens, now):
+        # 가득 찰 때까지 걸리는 시간이 지나면 상태가 없어도 같으므로 그때 만료시킵니다.
+        timeout = math.ceil((self.capacity - tokens) / self.refill_rate) + 1
+        cache.set(self.key, (tokens, now), timeout)
+
+    def take(self, cost=1):
+        """토큰을 꺼냅니다. 통과하면 0, 아니면 다시 시도할 때까지 기다릴 시간(초)을 반환합니다."""
+        if self.refill_rate <= 0:
+            return CLOSED_RETRY_AFTER
+        now = time.time()
+        with _lock:
+            tokens = self._load(now)
+            if tokens < cost:
+                return (cost - tokens) / self.refill_rate
+            self._save(tokens - cost, now)
+        return 0
+
+    def refund(self, cost=1):
+        if self.refill_rate <= 0:
+            return
+        now = time.time()
+        with _lock:
+            self._save(min(self.capacity, self._load(now) + cost), now)
+
+
+def user_bucket(user_id):
+    return TokenBucket(
+        f"user:{user_id}",
+        CHATBOT_CONFIG.get("rate_limit_user_burst", 10),
+        CHATBOT_CONFIG.get("rate_limit_user_per_minute", 12) / 60,
+    )
+
+
+def global_bucket():
+    return TokenBucket(
+        GLOBAL_BUCKET,
+        CHATBOT_CONFIG.get("rate_limit_global_burst", 100),
+        CHATBOT_CONFIG.get("rate_limit_global_per_minute", 300) / 60,
+    )
+
+
+def _quota_key(user_id):
+    return f"{QUOTA_KEY_PREFIX}{user_id}:{timezone.localdate().isoformat()}"
+
+
+def _seconds_until_tomorrow():
+    now = timezone.localtime()
+    tomorrow = datetime.combine(now.date() + timedelta(days=1), datetime.min.time(), tzinfo=now.tzinfo)
+    return (tomorrow - now).total_seconds()
+
+
+def get_quota_usage(user_id):
+    """사용자가 오늘 쓴 LLM 토큰 수"""
+    return cache.get(_quota_key(user_id), 0)
+
+
+def charge_llm_tokens(user_id, tokens):
+    """요청 하나에서 쓴 LLM 토큰 수를 오늘 사용량에 더합니다."""
+    if not tokens or user_id is None:
+        return
+    key = _quota_key(user_id)
+    # 날짜가 키에 들어가므로 다음 날이 지나면 만료되도록 하루 여유를 둡니다.
+    if not cache.add(key, tokens, int(_seconds_until_tomorrow()) + 86400):
+        try:
+            cache.incr(key, tokens)
+        except ValueError:
+            cache.add(key, tokens, int(_seconds_until_tomorrow()) + 86400)
+
+
+def check_chat_limits(user_id):
+    """요청을 받아도 되는지 확인합니다.
+
+    반환값: None이면 통과, 아니면 {"error": 안내 문구, "retry_after": 기다릴 시간(초, 정수)}
+    """
+    quota = CHATBOT_CONFIG.get("llm_daily_token_quota")
+    if quota and get_quota_usage(user_id) >= quota:
+        return {
+            "error": "오늘 사용할 수 있는 챗봇 사용량을 모두 사용했습니다.",
+            "retry_after": math.ceil(_seconds_until_tomorrow()),
+        }
+
+    if not CHATBOT_CONFIG.get("rate_limit_enabled", True):
+        return None
+    bucket = user_bucket(user_id)
+    wait = bucket.take()
+    if wait:
+        return {
+            "error": "요청이 너무 많습니다. 잠시 후 다시 시도해주세요.",
+            "retry_after": math.ceil(wait),
+        }
+    wait = global_bucket().take()
+    if wait:
+        # 전체 한도에 걸린 요청은 사용자 몫을 쓰지 않은 것으로 돌려놓습니다.
+        bucket.refund()
+        return {
+            "error": "지금은 챗봇 요청이 많아 잠시 후 다시 시도해주세요.",
+            "retry_after": math.ceil(wait),
+        }
+    return None
+
+
+def limit_exceeded_response(limit):
+    """check_chat_limits 결과로 429 응답을 만듭니다."""
+    response = JsonResponse({"error": limit["error"], "retry_after": limit["retry_after"]}, status=429)
+    response["Retry-After"] = str(limit["retry_after"])
+    return response
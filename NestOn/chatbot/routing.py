@@ -0,0 +1,56 @@
+"""작업별 모델 선택과 요청별 지연 시간 예산
+
+CHATBOT_CONFIG["llm_models"]에서 작업(purpose)마다 모델을 고릅니다. 질문 분류처럼 짧은 작업은
+싸고 빠른 모델, 답변은 답변 모델을 씁니다. 요청에 지연 시간 예산이 있으면(telemetry trace
+종류별 latency_budgets) 남은 시간과 그 모델의 최근 p95 지연 시간을 비교해, 시간 안에 끝나지
+않을 것 같으면 빠른 모델로 낮추고 그마저 어려우면 LLM 없이 기본 응답으로 넘어가게 합니다.
+"""
+from collections import namedtuple
+
+from . import telemetry
+from .config import CHATBOT_CONFIG
+
+DEFAULT_MODELS = {
+    "intent": "gpt-4o-mini",
+    "answer": "gpt-3.5-turbo",
+    "fast": "gpt-4o-mini",
+}
+
+# model이 None이면 LLM을 부르지 않고 기본 응답으로 넘어갑니다.
+Route = namedtuple("Route", ["model", "timeout", "reason"])
+
+
+def model_for(purpose):
+    """작업에 설정된 모델 (설정이 없으면 답변 모델)"""
+    models = {**DEFAULT_MODELS, **CHATBOT_CONFIG.get("llm_models", {})}
+    return models.get(purpose, models["answer"])
+
+
+def choose_model(purpose, timeout, model=None):
+    """이번 호출에 쓸 모델과 마감 시간을 고릅니다.
+
+    reason:
+        default: 작업에 설정된 모델 (또는 호출하는 쪽이 지정한 모델)
+        downgraded: 남은 예산 안에 끝나지 않을 것 같아 빠른 모델로 낮춤
+        budget: 남은 예산이 모자라 LLM을 부르지 않음
+    """
+    model = model or model_for(purpose)
+    remaining = telemetry.remaining_budget()
+    if remaining is None:
+        return Route(model, timeout, "default")
+
+    timeout = min(timeout, remaining)
+    if timeout < CHATBOT_CONFIG.get("llm_min_call_time", 1.0):
+        return Route(None, timeout, "budget")
+
+    # 최근 기록이 없으면 예산 안에 끝난다고 보고 그대로 씁니다.
+    expected = telemetry.expected_llm_latency(model, purpose)
+    if expected is None or expected <= timeout:
+        return Route(model, timeout, "default")
+
+    fast_model = model_for("fast")
+    if fast_model != model:
+        expected = telemetry.expected_llm_latency(fast_model, purpose)
+        if expected is None or expected <= timeout:
+            return Route(fast_model, timeout, "downgraded")
+    return Route(None, timeout, "budget")
@@ -0,0 +1,84 @@
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from board.models import Post
+from local_events.models import LocalEvent
+from public_data.models import PublicAlert
+
+from .cache import bump_data_versions
+from .faq import bump_faq_version
+from .fulltext import index_instance, remove_instance
+from .gazetteer import get_gazetteer
+from .models import BotResponse
+from .vectors import index_documents, remove_documents
+
+# 모델마다 지역을 찾을 필드
+REGION_FIELDS = {
+    Post: ("title", "content"),
+    PublicAlert: ("location_name",),
+    LocalEvent: ("location_name",),
+}
+
+
+def _regions(sender, values):
+    return get_gazetteer().find_all(" ".join(str(values.get(field) or "") for field in REGION_FIELDS[sender]))
+
+
+@receiver([pre_save, pre_delete], sender=Post)
+@receiver([pre_save, pre_delete], sender=PublicAlert)
+@receiver([pre_save, pre_delete], sender=LocalEvent)
+def remember_old_regions(sender, instance, update_fields=None, **kwargs):
+    """저장/삭제 전 DB에 있던 내용의 지역을 기억해 두어, 지역이 바뀌거나 빠져도 이전 지역을 무효화합니다."""
+    instance._old_regions = []
+    if instance.pk is None:
+        return
+    fields = REGION_FIELDS[sender]
+    if update_fields is not None and not set(fields) & set(update_fields):
+        # 지역을 찾는 필드를 저장하지 않으면 지역도 그대로입니다.
+        return
+    old = sender.objects.filter(pk=instance.pk).values(*fields).first()
+    if old:
+        instance._old_regions = _regions(sender, old)
+
+
+@receiver([post_save, post_delete], sender=Post)
+@receiver([post_save, post_delete], sender=PublicAlert)
+@receiver([post_save, post_delete], sender=LocalEvent)
+def region_data_changed(sender, instance, **kwargs):
+    """게시글/알림/행사의 이전 지역과 현재 지역의 답변 캐시와 지역 요약을 무효화합니다."""
+    current = _regions(sender, {field: getattr(instance, field) for field in REGION_FIELDS[sender]})
+    bump_data_versions(set(current) | set(getattr(instance, "_old_regions", ())))
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=PublicAlert)
+@receiver(post_save, sender=LocalEvent)
+def update_context_index(sender, instance, **kwargs):
+    """근거 데이터가 저장되면 전문 검색 색인과 벡터 색인을 갱신합니다."""
+    document = index_instance(instance)
+    try:
+        if document is None:
+            remove_documents(remove_instance(instance))
+        else:
+            index_documents([document])
+    except Exception as e:
+        # 임베딩 API나 색인 파일 문제로 원래 데이터 저장이 실패하지 않도록 합니다. (rebuild_context_index로 복구)
+        print(f"벡터 색인 갱신 오류: {e}")
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=PublicAlert)
+@receiver(post_delete, sender=LocalEvent)
+def remove_from_context_index(sender, instance, **kwargs):
+    """근거 데이터가 삭제되면 전문 검색 색인과 벡터 색인에서도 지웁니다."""
+    document_ids = remove_instance(instance)
+    try:
+        remove_documents(document_ids)
+    except Exception as e:
+        print(f"벡터 색인 갱신 오류: {e}")
+
+
+@receiver([post_save, post_delete], sender=BotResponse)
+def bot_response_changed(sender, instance, **kwargs):
+    """키워드 응답이 바뀌면 빠른 경로 오토마톤을 다시 만들게 합니다."""
+    bump_faq_version()
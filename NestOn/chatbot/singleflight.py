@@ -0,0 +1,179 @@
+"""같은 질문이 동시에 여러 번 들어와도 답변은 한 번만 생성하도록 묶는 single-flight
+
+한 워커 안에서는 스레드끼리 threading.Event로 결과를 나눠 씁니다.
+singleflight_cross_process를 켜면 Django 캐시의 add()를 잠금으로 써서 다른 프로세스가 이미
+생성 중인 질문은 그 결과를 캐시에서 기다립니다. (LocMemCache는 프로세스마다 따로라서
+Redis, Memcached, DB 캐시처럼 여러 프로세스가 공유하는 캐시에서만 의미가 있습니다.)
+"""
+import hashlib
+import threading
+import time
+
+from django.core.cache import cache
+
+from .config import CHATBOT_CONFIG
+
+LOCK_KEY_PREFIX = "chatbot:singleflight:lock:"
+RESULT_KEY_PREFIX = "chatbot:singleflight:result:"
+REMOTE_POLL_INTERVAL = 0.1
+TIMEOUT_MARGIN = 2  # 리더의 LLM 마감 시간 외에 데이터 수집과 저장에 더 주는 시간(초)
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class Flight:
+    """acquire()가 돌려주는 생성 작업. leader면 직접 생성하고 complete()를 꼭 호출해야 합니다."""
+
+    def __init__(self, group, key, call, leader, remote_lock=None):
+        self.group = group
+        self.key = key
+        self.call = call
+        self.leader = leader
+        self.remote_lock = remote_lock
+
+    def wait(self, timeout=None):
+        """리더의 결과를 기다립니다. 시간이 초과되거나 리더가 실패하면 None을 반환합니다."""
+        if not self.call.done.wait(timeout if timeout is not None else self.group.timeout):
+            # 리더가 끝내지 못한 생성은 목록에서 빼서 다음 요청이 새로 생성하게 합니다.
+            self.group._abandon(self)
+        return self.call.result
+
+    def complete(self, result):
+        """생성 결과(실패하면 None)를 기다리는 요청들에게 나눠 줍니다."""
+        self.group._complete(self, result)
+
+
+class SingleFlight:
+    def __init__(self, timeout, cross_process=False):
+        self.timeout = timeout
+        self.cross_process = cross_process
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.followers = 0
+        self.remote_followers = 0
+
+    @staticmethod
+    def _hash(key):
+        return hashlib.sha1(repr(key).encode()).hexdigest()
+
+    def acquire(self, key):
+        """key로 진행 중인 생성이 없으면 leader Flight를, 있으면 기다릴 Flight를 반환합니다."""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.followers += 1
+                return Flight(self, key, call, leader=False)
+            call = _Call()
+            self._calls[key] = call
+
+        flight = Flight(self, key, call, leader=True)
+        if self.cross_process:
+            result = self._acquire_remote(flight)
+            if result is not None:
+                # 다른 프로세스가 만든 답변을 이 프로세스에서 기다리던 요청들과도 나눕니다.
+                flight.leader = False
+                self._complete(flight, result)
+                return flight
+        with self._lock:
+            self.leaders += 1
+        return flight
+
+    def _acquire_remote(self, flight):
+        """프로세스 간 잠금을 잡으면 None, 다른 프로세스가 생성 중이면 그 결과를 기다려 반환합니다."""
+        digest = self._hash(flight.key)
+        lock_key = LOCK_KEY_PREFIX + digest
+        result_key = RESULT_KEY_PREFIX + digest
+        deadline = time.monotonic() + self.timeout
+        while True:
+            if cache.add(lock_key, 1, self.timeout):
+                flight.remote_lock = (lock_key, result_key)
+                return None
+            with self._lock:
+                self.remote_followers += 1
+            # 잠금이 풀리거나 결과가 올라올 때까지 기다립니다.
+            while time.monotonic() < deadline:
+                values = cache.get_many([lock_key, result_key])
+                if result_key in values:
+                    return values[result_key]
+                if lock_key not in values:
+                    break
+                time.sleep(REMOTE_POLL_INTERVAL)
+            else:
+                # 상대 프로세스가 끝내지 못하면 직접 생성합니다.
+                return None
+
+    def _abandon(self, flight):
+        with self._lock:
+            if self._calls.get(flight.key) is flight.call:
+                del self._calls[flight.key]
+
+    def _complete(self, flight, result):
+        flight.call.result = result
+        with self._lock:
+            if self._calls.get(flight.key) is flight.call:
+                del self._calls[flight.key]
+        flight.call.done.set()
+        if flight.remote_lock:
+            lock_key, result_key = flight.remote_lock
+            if result is not None:
+                cache.set(result_key, result, self.timeout)
+            cache.delete(lock_key)
+            flight.remote_lock = None
+
+    def do(self, key, generate):
+        """같은 key의 generate()가 동시에 한 번만 실행되도록 하고 그 결과를 반환합니다.
+
+        generate()가 예외를 내면 기다리던 요청들도 같은 예외를 받습니다.
+        """
+        flight = self.acquire(key)
+        if not flight.leader:
+            result = flight.wait()
+            if flight.call.error is not None:
+                raise flight.call.error
+            return result
+        result = None
+        try:
+            result = generate()
+        except Exception as e:
+            flight.call.error = e
+            raise
+        finally:
+            flight.complete(result)
+        return result
+
+    def stats(self):
+        with self._lock:
+            return {
+                "in_flight": len(self._calls),
+                "leaders": self.leaders,
+                "followers": self.followers,
+                "remote_followers": self.remote_followers,
+            }
+
+
+def default_timeout():
+    """리더가 답변을 끝낼 수 있는 최대 시간(초)을 LLM 마감 시간에서 계산합니다.
+
+    리더는 질문 분류(intent_timeout)와 답변 생성(llm_timeout)을 차례로 부르고, 두 마감 시간 모두
+    재시도를 포함하므로 그 합에 여유를 더하면 리더보다 먼저 포기하는 일이 없습니다.
+    """
+    configured = CHATBOT_CONFIG.get("singleflight_timeout")
+    if configured is not None:
+        return configured
+    return (
+        CHATBOT_CONFIG.get("intent_timeout", 5)
+        + CHATBOT_CONFIG.get("llm_timeout", 15)
+        + TIMEOUT_MARGIN
+    )
+
+
+single_flight = SingleFlight(
+    timeout=default_timeout(),
+    cross_process=CHATBOT_CONFIG.get("singleflight_cross_process", False),
+)
@@ -0,0 +1,228 @@
+"""챗봇 파이프라인 계측 (LLM 호출, 단계별 지연 시간, 요청별 DB/LLM 시간)
+
+기록은 프로세스마다 고정 크기 링 버퍼에 쌓이므로 오래된 기록부터 밀려나며 DB를 쓰지 않습니다.
+요청 하나를 trace()로 감싸면 그 안에서 실행된 DB 쿼리 시간과 LLM 호출 시간이 요청별로 합산되고,
+관리자 전용 metrics API(views.metrics_api)가 요약을 보여줍니다.
+"""
+import contextvars
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from django.db.backends.signals import connection_created
+from django.utils import timezone
+
+from .config import CHATBOT_CONFIG
+
+BUFFER_SIZE = CHATBOT_CONFIG.get("telemetry_buffer_size", 2000)
+LATENCY_MIN_SAMPLES = 5
+
+_lock = threading.Lock()
+_llm_calls = deque(maxlen=BUFFER_SIZE)
+_stage_timings = {}
+_request_traces = deque(maxlen=BUFFER_SIZE)
+
+_current_trace = contextvars.ContextVar("chatbot_trace", default=None)
+
+
+def percentile(values, ratio):
+    if not values:
+        return 0
+    values = sorted(values)
+    index = min(int(len(values) * ratio), len(values) - 1)
+    return values[index]
+
+
+def _summary(values):
+    return {
+        "count": len(values),
+        "p50": round(percentile(values, 0.50), 2),
+        "p95": round(percentile(values, 0.95), 2),
+        "p99": round(percentile(values, 0.99), 2),
+    }
+
+
+class Trace:
+    """요청 하나 동안의 DB 시간, LLM 시간, 단계별 시간을 모읍니다."""
+
+    def __init__(self, kind):
+        self.kind = kind
+        self.started = time.perf_counter()
+        self.db_ms = 0.0
+        self.db_queries = 0
+        self.llm_ms = 0.0
+        self.llm_calls = 0
+        self.llm_tokens = 0
+        self.stages = {}
+
+    def as_dict(self):
+        return {
+            "kind": self.kind,
+            "at": timezone.now().isoformat(),
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 2),
+            "db_ms": round(self.db_ms, 2),
+            "db_queries": self.db_queries,
+            "llm_ms": round(self.llm_ms, 2),
+            "llm_calls": self.llm_calls,
+            "llm_tokens": self.llm_tokens,
+            "stages": {name: round(ms, 2) for name, ms in self.stages.items()},
+        }
+
+
+@contextmanager
+def trace(kind):
+    """감싼 구간을 요청 하나로 보고 DB/LLM 시간을 합산해 기록합니다."""
+    current = Trace(kind)
+    token = _current_trace.set(current)
+    try:
+        yield current
+    finally:
+        try:
+            _current_trace.reset(token)
+        except ValueError:
+            # 비동기 제너레이터가 다른 컨텍스트에서 닫힌 경우
+            _current_trace.set(None)
+        record = current.as_dict()
+        with _lock:
+            _request_traces.append(record)
+        _record_stage("total:" + kind, record["total_ms"])
+
+
+def _record_stage(name, elapsed_ms):
+    with _lock:
+        timings = _stage_timings.get(name)
+        if timings is None:
+            timings = _stage_timings[name] = deque(maxlen=BUFFER_SIZE)
+        timings.append(elapsed_ms)
+
+
+@contextmanager
+def stage(name):
+    """파이프라인 단계 하나의 지연 시간을 기록합니다."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        _record_stage(name, elapsed_ms)
+        current = _current_trace.get()
+        if current is not None:
+            current.stages[name] = current.stages.get(name, 0.0) + elapsed_ms
+
+
+def record_llm_call(model, purpose, prompt_tokens, completion_tokens, wall_ms, retries, outcome, route="default"):
+    """LLM 호출 한 번(재시도 포함)의 결과를 기록합니다.
+
+    outcome: ok, error(재시도 후에도 실패), rejected(회로 차단기), cancelled(스트림 중단),
+             skipped(지연 시간 예산 부족)
+    route: 모델을 고른 이유 (routing.choose_model 참고)
+    """
+    with _lock:
+        _llm_calls.append(
+            {
+                "at": timezone.now().isoformat(),
+                "model": model,
+                "purpose": purpose,
+                "route": route,
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "wall_ms": round(wall_ms, 2),
+                "retries": retries,
+                "outcome": outcome,
+            }
+        )
+    _record_stage("llm:" + purpose, wall_ms)
+    if outcome == "ok":
+        # 모델 선택에 쓰도록 작업별, 모델별 지연 시간을 따로 모읍니다.
+        _record_stage(f"model:{purpose}:{model}", wall_ms)
+    current = _current_trace.get()
+    if current is not None:
+        current.llm_ms += wall_ms
+        current.llm_calls += 1
+        current.llm_tokens += (prompt_tokens or 0) + (completion_tokens or 0)
+
+
+def remaining_budget():
+    """지금 요청의 지연 시간 예산 중 남은 시간(초). 예산이 없으면 None을 반환합니다."""
+    current = _current_trace.get()
+    if current is None:
+        return None
+    budget = CHATBOT_CONFIG.get("latency_budgets", {}).get(current.kind)
+    if not budget:
+        return None
+    return budget - (time.perf_counter() - current.started)
+
+
+def expected_llm_latency(model, purpose, samples=50, ratio=0.95):
+    """최근 성공한 호출의 지연 시간 백분위(초). 기록이 적으면 None을 반환합니다."""
+    with _lock:
+        timings = list(_stage_timings.get(f"model:{purpose}:{model}", ()))[-samples:]
+    if len(timings) < LATENCY_MIN_SAMPLES:
+        return None
+    return percentile(timings, ratio) / 1000
+
+
+def _time_query(execute, sql, params, many, context):
+    current = _current_trace.get()
+    if current is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        current.db_ms += (time.perf_counter() - started) * 1000
+        current.db_queries += 1
+
+
+def install_query_timer(sender, connection, **kwargs):
+    """새 DB 연결마다 trace 안의 쿼리 시간을 재는 실행 래퍼를 붙입니다."""
+    if _time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_time_query)
+
+
+connection_created.connect(install_query_timer, dispatch_uid="chatbot_telemetry_query_timer")
+
+
+def snapshot(recent=20):
+    """metrics API에 내려줄 요약을 만듭니다."""
+    with _lock:
+        llm_calls = list(_llm_calls)
+        stage_timings = {name: list(values) for name, values in _stage_timings.items()}
+        traces = list(_request_traces)
+
+    by_purpose = {}
+    for call in llm_calls:
+        summary = by_purpose.setdefault(
+            call["purpose"],
+            {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "retries": 0, "outcomes": {}, "routes": {}},
+        )
+        summary["calls"] += 1
+        summary["prompt_tokens"] += call["prompt_tokens"] or 0
+        summary["completion_tokens"] += call["completion_tokens"] or 0
+        summary["retries"] += call["retries"]
+        summary["outcomes"][call["outcome"]] = summary["outcomes"].get(call["outcome"], 0) + 1
+        route = f'{call["route"]}:{call["model"]}'
+        summary["routes"][route] = summary["routes"].get(route, 0) + 1
+
+    return {
+        "llm": {
+            "latency_ms": _summary([call["wall_ms"] for call in llm_calls]),
+            "by_purpose": by_purpose,
+            "recent": llm_calls[-recent:],
+        },
+        "stages_ms": {name: _summary(values) for name, values in sorted(stage_timings.items())},
+        "requests": {
+            "total_ms": _summary([t["total_ms"] for t in traces]),
+            "db_ms": _summary([t["db_ms"] for t in traces]),
+            "llm_ms": _summary([t["llm_ms"] for t in traces]),
+            "recent": traces[-recent:],
+        },
+    }
+
+
+def reset():
+    with _lock:
+        _llm_calls.clear()
+        _stage_timings.clear()
+        _request_traces.clear()
@@ -1,3 +1,912 @@
-from django.test import TestCase
+import json
+import shutil
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+import httpx
+import numpy as np
+import openai
+from django.core.cache import cache
+from django.test import AsyncClient, SimpleTestCase, TestCase
+from django.utils import timezone
+
+from board.models import Post
+from local_events.models import LocalEvent
+from public_data.models import PublicAlert
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from User.models import CustomUser
+
+from . import telemetry
+from .automaton import AhoCorasick
+from .cache import AnswerCache, VersionStore, bump_data_versions, get_data_version
+from .config import CHATBOT_CONFIG
+from .context import context_stats, encode_context, format_context
+from .digests import build_digest_content, get_region_digest, is_stale
+from .faq import KeywordFastPath
+from .fulltext import search_documents
+from .gazetteer import Gazetteer
+from .intent import classify_question, parse_intent
+from .jobs import LeaseLost, claim_job, complete_job, enqueue_reply, retry_or_fail_job
+from .llm import CircuitBreaker, LLMUnavailable, create_chat_completion, stream_chat_completion
+from .memory import build_conversation_context
+from .models import BotResponse, ChatMessage, ChatSession, ReplyJob
+from .parallel import submit
+from .ratelimit import CLOSED_RETRY_AFTER, TokenBucket, check_chat_limits, limit_exceeded_response
+from .routing import Route, choose_model
+from .singleflight import SingleFlight
+from .vectors import HashingEmbedder, PrecomputedEmbedder, VectorIndex, rebuild_vector_index
+from .views import get_structured_data
+
+
+class StreamingChatTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user(username='streamer', password='pw', phone_number='010-0000-0011')
+        self.session = ChatSession.objects.create(session_id='stream-test', user=self.user)
+        self.headers = {'Authorization': f'Bearer {RefreshToken.for_user(self.user).access_token}'}
+        for patcher in (
+            mock.patch('chatbot.views.is_llm_configured', return_value=True),
+            mock.patch('chatbot.views.build_answer_messages', return_value=[]),
+            mock.patch('chatbot.views.keyword_fast_path.answer', return_value=None),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def _post(self, message):
+        response = await AsyncClient().post(
+            '/api/chatbot/api/chat/stream/',
+            {'message': message, 'session_id': 'stream-test'},
+            content_type='application/json',
+            headers=self.headers,
+        )
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        body = b''.join([chunk async for chunk in response.streaming_content]).decode()
+        return [
+            (event.split('\n')[0].removeprefix('event: '), json.loads(event.split('\n')[1].removeprefix('data: ')))
+            for event in body.strip().split('\n\n')
+        ]
+
+    async def test_streams_tokens_then_saves_the_reply(self):
+        async def fake_stream(messages):
+            for delta in ('강남구 ', '행사 ', '안내입니다'):
+                yield delta
+
+        with mock.patch('chatbot.views.stream_chat_completion', fake_stream):
+            events = await self._post('강남구 행사 알려줘')
+
+        self.assertEqual([name for name, _ in events], ['user_message', 'token', 'token', 'token', 'done'])
+        self.assertEqual(''.join(data['delta'] for name, data in events if name == 'token'), '강남구 행사 안내입니다')
+        bot_message = await ChatMessage.objects.aget(pk=events[-1][1]['id'])
+        self.assertEqual((bot_message.message_type, bot_message.content), ('bot', '강남구 행사 안내입니다'))
+
+    async def test_sends_fallback_when_stream_fails_before_first_token(self):
+        async def failing_stream(messages):
+            raise LLMUnavailable('연결 실패')
+            yield
+
+        with mock.patch('chatbot.views.stream_chat_completion', failing_stream), \
+                mock.patch('chatbot.views.get_fallback_response', return_value='기본 응답'):
+            events = await self._post('강남구 행사 알려줘')
+
+        self.assertEqual([name for name, _ in events], ['user_message', 'token', 'done'])
+        self.assertEqual(events[-1][1]['content'], '기본 응답')
+
+
+class IntentClassifierTests(TestCase):
+    def setUp(self):
+        patcher = mock.patch('chatbot.intent.is_configured', return_value=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_gazetteer_region_with_news_keyword_skips_llm(self):
+        with mock.patch('chatbot.intent.create_chat_completion') as llm:
+            intent = classify_question('강남구 요즘 행사 있어?')
+        llm.assert_not_called()
+        self.assertEqual(
+            intent, {'region': '강남구', 'question_type': 'news', 'confidence': 1.0, 'source': 'gazetteer'}
+        )
+
+    def test_other_questions_use_a_single_llm_call(self):
+        reply = '분류 결과: {"region": "마포구", "question_type": "news", "confidence": 0.8}'
+        with mock.patch('chatbot.intent.create_chat_completion', return_value=reply) as llm:
+            intent = classify_question('우리 동네 맛집 추천해줘')
+        self.assertEqual(llm.call_count, 1)
+        self.assertEqual(llm.call_args.kwargs['purpose'], 'intent')
+        self.assertEqual((intent['region'], intent['question_type'], intent['source']), ('마포구', 'news', 'llm'))
+
+    def test_low_confidence_news_becomes_general(self):
+        reply = '{"region": null, "question_type": "news", "confidence": 0.2}'
+        with mock.patch('chatbot.intent.create_chat_completion', return_value=reply):
+            self.assertEqual(classify_question('무슨 일 있어?')['question_type'], 'general')
+
+    def test_parse_intent_validates_fields(self):
+        intent = parse_intent('{"region": "부산진구", "question_type": "weather", "confidence": 7}')
+        self.assertEqual((intent['region'], intent['question_type'], intent['confidence']), (None, 'general', 1.0))
+        self.assertEqual(parse_intent('모르겠어요'), {'region': None, 'question_type': 'general', 'confidence': 0.0, 'source': 'none'})
+
+
+class FullTextSearchTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='indexer', password='pw', phone_number='010-0000-0012')
+        self.post = Post.objects.create(author=self.user, title='망원동 소식', content='마포구에서 벼룩시장이 열립니다')
+        PublicAlert.objects.create(title='침수 주의', content='마포구 저지대 침수 주의', category='disaster', location_name='마포구')
+        PublicAlert.objects.create(title='정전 안내', content='마포구 일부 정전', category='facility', location_name='마포구')
+
+    def test_finds_words_with_attached_particles(self):
+        results = search_documents(['벼룩시장'])
+        self.assertEqual([(r['source'], r['object_id']) for r in results], [('post', self.post.pk)])
+        self.assertIn('벼룩시장', results[0]['snippet'])
+
+    def test_limits_results_per_source(self):
+        results = search_documents(['마포구'], per_source=1)
+        self.assertEqual(sorted(r['source'] for r in results), ['alert', 'post'])
+
+    def test_signals_keep_index_in_sync(self):
+        self.post.is_active = False
+        self.post.save()
+        self.assertEqual(search_documents(['벼룩시장']), [])
+        self.post.is_active = True
+        self.post.save()
+        self.post.delete()
+        self.assertEqual(search_documents(['벼룩시장']), [])
+
+
+class RegionDigestTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch.dict(CHATBOT_CONFIG, {'vector_retrieval': False})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        for i in range(7):
+            PublicAlert.objects.create(title=f'알림 {i}', content='서초구 도로 통제', category='traffic', location_name='서초구')
+
+    def test_reuses_digest_until_region_data_changes(self):
+        with mock.patch('chatbot.digests.build_digest_content', wraps=build_digest_content) as build:
+            digest = get_region_digest('서초구')
+            self.assertEqual(len(digest['content']['public_alerts']), 5)
+            self.assertEqual(get_region_digest('서초구'), digest)
+            self.assertFalse(is_stale('서초구'))
+            self.assertEqual(build.call_count, 1)
+
+            # 지역 데이터가 바뀌면 다음 조회에서 다시 만듭니다.
+            LocalEvent.objects.create(title='서초 음악회', location_name='서초구')
+            self.assertTrue(is_stale('서초구'))
+            digest = get_region_digest('서초구')
+            self.assertEqual(build.call_count, 2)
+        self.assertEqual([event['title'] for event in digest['content']['local_events']], ['서초 음악회'])
+
+    def test_reads_stored_digest_when_cache_is_empty(self):
+        digest = get_region_digest('서초구')
+        cache.clear()
+        with mock.patch('chatbot.digests.build_digest_content') as build:
+            self.assertEqual(get_region_digest('서초구'), digest)
+        build.assert_not_called()
+
+
+class SessionListTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='lister', password='pw', phone_number='010-0000-0013')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.sessions = []
+        for i in range(5):
+            session = ChatSession.objects.create(session_id=f'list-{i}', user=self.user)
+            for _ in range(i):
+                ChatMessage.objects.create(session=session, message_type='user', content='질문')
+            self.sessions.append(session)
+        ChatSession.objects.create(session_id='other', user=None)
+
+    def _pages(self, limit):
+        pages = []
+        cursor = None
+        while True:
+            params = {'limit': limit, **({'cursor': cursor} if cursor else {})}
+            data = self.client.get('/api/chatbot/api/sessions/', params).json()
+            pages.append(data['sessions'])
+            cursor = data['next_cursor']
+            if not cursor:
+                return pages
+
+    def test_pages_through_sessions_newest_first_with_counts(self):
+        pages = self._pages(limit=2)
+        self.assertEqual([len(page) for page in pages], [2, 2, 1])
+        sessions = [session for page in pages for session in page]
+        self.assertEqual([s['session_id'] for s in sessions], [f'list-{i}' for i in reversed(range(5))])
+        self.assertEqual([s['message_count'] for s in sessions], [4, 3, 2, 1, 0])
+        self.assertEqual(sessions[-1]['summary'], '빈 대화')
+        self.assertIsNone(sessions[-1]['last_message_time'])
+        latest = ChatMessage.objects.filter(session=self.sessions[4]).latest('timestamp')
+        self.assertEqual(sessions[0]['last_message_time'], latest.timestamp.isoformat())
+
+    def test_query_count_does_not_grow_with_sessions(self):
+        with self.assertNumQueries(1):
+            self.client.get('/api/chatbot/api/sessions/', {'limit': 5})
+
+    def test_rejects_bad_cursor(self):
+        self.assertEqual(self.client.get('/api/chatbot/api/sessions/', {'cursor': '!!'}).status_code, 400)
+
+
+class MessageSyncTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='syncer', password='pw', phone_number='010-0000-0014')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        session = ChatSession.objects.create(session_id='sync', user=self.user)
+        self.messages = [
+            ChatMessage.objects.create(session=session, message_type='user', content=f'메시지 {i}')
+            for i in range(5)
+        ]
+        self.url = '/api/chatbot/api/messages/sync/'
+
+    def _ids(self, data):
+        return [m['id'] for m in data['messages']]
+
+    def test_since_returns_only_newer_messages_in_order(self):
+        data = self.client.get(self.url, {'since': self.messages[1].id, 'limit': 2}).json()
+        self.assertEqual(self._ids(data), [m.id for m in self.messages[2:4]])
+        self.assertTrue(data['has_more'])
+
+        data = self.client.get(self.url, {'since': self.messages[3].id}).json()
+        self.assertEqual(self._ids(data), [self.messages[4].id])
+        self.assertFalse(data['has_more'])
+
+    def test_cursor_walks_back_to_older_messages(self):
+        data = self.client.get(self.url, {'limit': 3}).json()
+        self.assertEqual(self._ids(data), [m.id for m in self.messages[2:]])
+        data = self.client.get(self.url, {'limit': 3, 'cursor': data['next_cursor']}).json()
+        self.assertEqual(self._ids(data), [m.id for m in self.messages[:2]])
+        self.assertIsNone(data['next_cursor'])
+
+    def test_rejects_unknown_since(self):
+        response = self.client.get(self.url, {'since': '999999'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], '잘못된 since 값입니다.')
+
+
+class GazetteerTests(SimpleTestCase):
+    def setUp(self):
+        self.gazetteer = Gazetteer(
+            ["동작구", "구로구", "중구", "마포구", "강서구"],
+            [("홍대", "마포구")],
+            {"인천광역시", "인천", "대구광역시", "대구", "부산"},
+        )
+
+    def test_ambiguous_stems_need_district_suffix(self):
+        self.assertIsNone(self.gazetteer.resolve("앱이 최근에 동작을 안 해요"))
+        self.assertIsNone(self.gazetteer.resolve("지구로 여행"))
+        self.assertEqual(self.gazetteer.resolve("동작구 최근 소식"), "동작구")
+
+    def test_stem_needs_word_boundary_or_particle(self):
+        self.assertEqual(self.gazetteer.resolve("마포에서 뭐해"), "마포구")
+        self.assertEqual(self.gazetteer.resolve("서울마포 날씨"), "마포구")
+        self.assertIsNone(self.gazetteer.resolve("강서원 씨"))
+
+    def test_names_and_aliases_need_trailing_boundary(self):
+        self.assertIsNone(self.gazetteer.resolve("의견이 중구난방이네요"))
+        self.assertIsNone(self.gazetteer.resolve("홍대표님 안녕하세요"))
+        self.assertEqual(self.gazetteer.resolve("중구청에서 알려요"), "중구")
+        self.assertEqual(self.gazetteer.resolve("홍대입구 맛집"), "마포구")
+        self.assertEqual(self.gazetteer.resolve("마포구에서 행사"), "마포구")
+        self.assertEqual(self.gazetteer.resolve("구로구, 동작구 소식"), "구로구")
+
+    def test_district_after_other_city_is_ignored(self):
+        self.assertIsNone(self.gazetteer.resolve("인천 중구 소식"))
+        self.assertIsNone(self.gazetteer.resolve("대구 중구 맛집"))
+        self.assertEqual(self.gazetteer.resolve("서울 중구 행사"), "중구")
+
+    def test_alias(self):
+        self.assertEqual(self.gazetteer.resolve("홍대 근처 공연"), "마포구")
+
+
+class KeywordFastPathTests(TestCase):
+    def setUp(self):
+        BotResponse.objects.create(keyword='운영시간', response='오전 9시부터 오후 6시까지입니다.')
+        BotResponse.objects.create(keyword='주차', response='지하 주차장을 이용해 주세요.')
+        self.fast_path = KeywordFastPath(min_coverage=0.3)
+
+    def test_automaton_keeps_longest_leftmost_matches(self):
+        automaton = AhoCorasick()
+        for pattern in ('주차', '주차장', '차장'):
+            automaton.add(pattern, pattern)
+        with self.assertRaises(RuntimeError):
+            list(automaton.iter_matches('주차장'))
+        automaton.build()
+        self.assertEqual(automaton.find_longest('지하주차장위치'), [(2, 5, '주차장')])
+        self.assertEqual(
+            automaton.find_longest('주차장', accept=lambda start, end, value: value != '주차장'),
+            [(0, 2, '주차')],
+        )
+
+    def test_answers_only_a_single_well_covered_keyword(self):
+        self.assertEqual(self.fast_path.answer('운영시간?'), '오전 9시부터 오후 6시까지입니다.')
+        self.assertIsNone(self.fast_path.answer('운영시간이랑 주차 알려줘'))
+        self.assertIsNone(self.fast_path.answer('어제 친구랑 얘기하다가 문득 궁금해진 주차'))
+        self.assertEqual(self.fast_path.stats()['hits'], 1)
+        self.assertEqual(self.fast_path.stats()['misses'], 2)
+
+    def test_rebuilds_after_bot_response_change(self):
+        self.assertIsNone(self.fast_path.answer('분실물'))
+        response = BotResponse.objects.create(keyword='분실물', response='관리사무소에 문의해 주세요.')
+        self.assertEqual(self.fast_path.answer('분실물'), '관리사무소에 문의해 주세요.')
+        response.is_active = False
+        response.save()
+        self.assertIsNone(self.fast_path.answer('분실물'))
+
+
+def _completion(content):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))], usage=None)
+
+
+def _chunk(delta):
+    return SimpleNamespace(usage=None, choices=[SimpleNamespace(delta=SimpleNamespace(content=delta))])
+
+
+class _FakeStream:
+    """토큰을 내보내다가 error가 있으면 마지막에 그 오류를 내는 가짜 스트림"""
+
+    def __init__(self, deltas, error=None):
+        self.deltas = deltas
+        self.error = error
+
+    async def __aiter__(self):
+        for delta in self.deltas:
+            yield _chunk(delta)
+        if self.error is not None:
+            raise self.error
+
+    async def close(self):
+        pass
+
+
+class LLMClientTests(TestCase):
+    def setUp(self):
+        self.request = httpx.Request('POST', 'http://llm.test/v1/chat/completions')
+        self.breaker = CircuitBreaker(threshold=2, reset_timeout=60)
+        self.client = mock.MagicMock()
+        self.async_client = mock.MagicMock()
+        self.async_client.chat.completions.create = mock.AsyncMock()
+        for patcher in (
+            mock.patch('chatbot.llm.breaker', self.breaker),
+            mock.patch('chatbot.llm.get_client', return_value=self.client),
+            mock.patch('chatbot.llm.get_async_client', return_value=self.async_client),
+            mock.patch('chatbot.llm._backoff', return_value=0),
+            mock.patch.dict(CHATBOT_CONFIG, {'llm_max_retries': 2}),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _connection_error(self):
+        return openai.APIConnectionError(request=self.request)
+
+    def test_retries_retryable_errors(self):
+        self.client.chat.completions.create.side_effect = [self._connection_error(), _completion('답변')]
+        self.assertEqual(create_chat_completion([{'role': 'user', 'content': '질문'}]), '답변')
+        self.assertEqual(self.client.chat.completions.create.call_count, 2)
+
+    def test_gives_up_after_max_retries(self):
+        self.client.chat.completions.create.side_effect = self._connection_error()
+        with self.assertRaises(LLMUnavailable):
+            create_chat_completion([{'role': 'user', 'content': '질문'}])
+        self.assertEqual(self.client.chat.completions.create.call_count, 3)
+
+    def test_does_not_retry_past_the_deadline(self):
+        self.client.chat.completions.create.side_effect = self._connection_error()
+        with mock.patch('chatbot.llm._backoff', return_value=5), self.assertRaises(LLMUnavailable):
+            create_chat_completion([{'role': 'user', 'content': '질문'}], timeout=1)
+        self.assertEqual(self.client.chat.completions.create.call_count, 1)
+
+    def test_breaker_opens_after_threshold_failures(self):
+        self.client.chat.completions.create.side_effect = openai.APIError('잘못된 요청', self.request, body=None)
+        for _ in range(2):
+            with self.assertRaises(LLMUnavailable):
+                create_chat_completion([{'role': 'user', 'content': '질문'}])
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+
+        self.client.chat.completions.create.reset_mock()
+        with self.assertRaisesMessage(LLMUnavailable, '회로 차단기'):
+            create_chat_completion([{'role': 'user', 'content': '질문'}])
+        self.client.chat.completions.create.assert_not_called()
+
+    async def _collect(self, received):
+        async for delta in stream_chat_completion([{'role': 'user', 'content': '질문'}]):
+            received.append(delta)
+        return received
+
+    async def test_stream_retries_before_first_token(self):
+        self.async_client.chat.completions.create.side_effect = [
+            _FakeStream([], error=openai.APITimeoutError(request=self.request)),
+            _FakeStream(['안녕', '하세요']),
+        ]
+        self.assertEqual(await self._collect([]), ['안녕', '하세요'])
+        self.assertEqual(self.async_client.chat.completions.create.await_count, 2)
+
+    async def test_stream_is_not_retried_after_first_token(self):
+        self.async_client.chat.completions.create.side_effect = [
+            _FakeStream(['안녕'], error=openai.APITimeoutError(request=self.request)),
+            _FakeStream(['안녕', '하세요']),
+        ]
+        received = []
+        with self.assertRaises(LLMUnavailable):
+            await self._collect(received)
+        self.assertEqual(received, ['안녕'])
+        self.assertEqual(self.async_client.chat.completions.create.await_count, 1)
+
+
+class TelemetryTests(TestCase):
+    def setUp(self):
+        telemetry.reset()
+        self.addCleanup(telemetry.reset)
+
+    def test_trace_sums_db_and_llm_time_per_request(self):
+        with telemetry.trace('chat') as current:
+            with telemetry.stage('context'):
+                list(ChatSession.objects.all())
+            telemetry.record_llm_call('model', 'answer', 30, 20, 150.0, 1, 'ok')
+        self.assertEqual(current.db_queries, 1)
+        self.assertEqual((current.llm_calls, current.llm_tokens, current.llm_ms), (1, 50, 150.0))
+        self.assertIn('context', current.stages)
+
+        snapshot = telemetry.snapshot()
+        [record] = snapshot['requests']['recent']
+        self.assertEqual((record['kind'], record['llm_calls']), ('chat', 1))
+        self.assertEqual(snapshot['llm']['by_purpose']['answer']['retries'], 1)
+        self.assertIn('total:chat', snapshot['stages_ms'])
+
+    def test_calls_outside_a_trace_are_still_recorded(self):
+        telemetry.record_llm_call('model', 'intent', 10, 5, 40.0, 0, 'error')
+        snapshot = telemetry.snapshot()
+        self.assertEqual(snapshot['llm']['by_purpose']['intent']['outcomes'], {'error': 1})
+        self.assertEqual(snapshot['requests']['recent'], [])
+
+    def test_metrics_api_is_admin_only(self):
+        user = CustomUser.objects.create_user(username='watcher', password='pw', phone_number='010-0000-0015')
+        client = APIClient()
+        client.force_authenticate(user)
+        self.assertEqual(client.get('/api/chatbot/api/metrics/').status_code, 403)
+
+        user.is_staff = True
+        user.save()
+        response = client.get('/api/chatbot/api/metrics/', {'recent': 5})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('answer_cache', response.json()['metrics']['counters'])
+
+
+class ModelRoutingTests(SimpleTestCase):
+    def setUp(self):
+        telemetry.reset()
+        self.addCleanup(telemetry.reset)
+        patcher = mock.patch.dict(CHATBOT_CONFIG, {
+            'llm_models': {'intent': 'small', 'answer': 'large', 'fast': 'small'},
+            'latency_budgets': {'chat': 5},
+            'llm_min_call_time': 1.0,
+        })
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _record_latency(self, model, seconds):
+        for _ in range(telemetry.LATENCY_MIN_SAMPLES):
+            telemetry.record_llm_call(model, 'answer', 10, 10, seconds * 1000, 0, 'ok')
+
+    def test_uses_purpose_model_without_budget(self):
+        self.assertEqual(choose_model('intent', 15), Route('small', 15, 'default'))
+        with telemetry.trace('job'):
+            self.assertEqual(choose_model('answer', 15), Route('large', 15, 'default'))
+
+    def test_clips_timeout_to_remaining_budget(self):
+        with telemetry.trace('chat'):
+            route = choose_model('answer', 15)
+        self.assertEqual((route.model, route.reason), ('large', 'default'))
+        self.assertLessEqual(route.timeout, 5)
+
+    def test_downgrades_when_model_is_too_slow_for_budget(self):
+        self._record_latency('large', 8)
+        with telemetry.trace('chat'):
+            self.assertEqual(choose_model('answer', 15).model, 'small')
+        self._record_latency('small', 8)
+        with telemetry.trace('chat'):
+            self.assertEqual(choose_model('answer', 15).reason, 'budget')
+
+    def test_skips_llm_when_budget_is_nearly_spent(self):
+        with mock.patch('chatbot.llm.get_client') as get_client, \
+                mock.patch.dict(CHATBOT_CONFIG, {'llm_min_call_time': 10}), \
+                telemetry.trace('chat'), \
+                self.assertRaises(LLMUnavailable):
+            create_chat_completion([{'role': 'user', 'content': '질문'}])
+        get_client.assert_not_called()
+        self.assertEqual(telemetry.snapshot()['llm']['by_purpose']['answer']['outcomes'], {'skipped': 1})
+
+
+class ParallelContextTests(TestCase):
+    def test_submit_runs_inside_the_callers_trace(self):
+        def probe():
+            with telemetry.stage('probe'):
+                return threading.current_thread().name
+
+        with telemetry.trace('job') as current:
+            thread_name = submit(probe).result(timeout=5)
+        self.assertTrue(thread_name.startswith('chatbot-context'))
+        self.assertIn('probe', current.stages)
+
+    def test_vector_search_overlaps_intent_classification(self):
+        search_started = threading.Event()
+
+        def search(message, k, min_score):
+            search_started.set()
+            return [{'source': 'event', 'payload': {'title': '야시장'}, 'snippet': '금요일 야시장'}]
+
+        def classify(message):
+            # 검색이 분류를 기다리고 있다면 여기서 시간 초과가 납니다.
+            self.assertTrue(search_started.wait(timeout=5))
+            return {'region': None, 'question_type': 'news', 'confidence': 0.9, 'source': 'llm'}
+
+        with mock.patch('chatbot.views.search_similar_documents', side_effect=search), \
+                mock.patch('chatbot.views.classify_question', side_effect=classify):
+            data = get_structured_data('요즘 볼 만한 거 있어?')
+        self.assertEqual(data['content']['local_events'], [{'title': '야시장', 'content': '금요일 야시장'}])
+
+    def test_region_questions_skip_vector_search(self):
+        intent = {'region': '강남구', 'question_type': 'news', 'confidence': 1.0, 'source': 'gazetteer'}
+        with mock.patch('chatbot.views.search_similar_documents') as search, \
+                mock.patch('chatbot.views.classify_question', return_value=intent), \
+                mock.patch('chatbot.views.get_region_digest', return_value={'content': {'local_events': []}}):
+            get_structured_data('강남구 행사 알려줘')
+        search.assert_not_called()
+
+
+class AnswerCacheTests(TestCase):
+    def setUp(self):
+        self.cache = AnswerCache(max_size=2, ttl=60)
+
+    def test_hits_normalized_question_until_its_region_changes(self):
+        self.cache.set(self.cache.make_key('강남구 행사 알려줘!'), '답변')
+        self.assertEqual(self.cache.get(self.cache.make_key('  강남구  행사 알려줘?? ')), '답변')
+
+        bump_data_versions(['마포구'])
+        self.assertEqual(self.cache.get(self.cache.make_key('강남구 행사 알려줘')), '답변')
+        bump_data_versions(['강남구'])
+        self.assertIsNone(self.cache.get(self.cache.make_key('강남구 행사 알려줘')))
+        self.assertEqual((self.cache.hits, self.cache.misses), (2, 1))
+
+    def test_question_without_region_follows_every_change(self):
+        self.cache.set(self.cache.make_key('요즘 무슨 일 있어?'), '답변')
+        bump_data_versions(['마포구'])
+        self.assertIsNone(self.cache.get(self.cache.make_key('요즘 무슨 일 있어?')))
+
+    def test_evicts_least_recently_used(self):
+        for key in ('a', 'b'):
+            self.cache.set(key, key)
+        self.cache.get('a')
+        self.cache.set('c', 'c')
+        self.assertEqual((self.cache.get('a'), self.cache.get('b'), self.cache.get('c')), ('a', None, 'c'))
+
+
+class VersionStoreTests(TestCase):
+    def test_bump_is_seen_by_other_process_after_check_interval(self):
+        writer = VersionStore(check_interval=60)
+        reader = VersionStore(check_interval=60)
+        self.assertEqual(reader.get("data:마포구"), 0)
+
+        writer.bump(["data:마포구"])
+        self.assertEqual(writer.get("data:마포구"), 1)
+        # 다른 프로세스는 기억해 둔 값을 쓰다가 확인 간격이 지나면 DB에서 새 값을 읽습니다.
+        self.assertEqual(reader.get("data:마포구"), 0)
+        reader.check_interval = 0
+        reader._versions.clear()
+        self.assertEqual(reader.get("data:마포구"), 1)
+
+
+class RegionInvalidationTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='region', password='pw', phone_number='010-0000-0010')
+
+    def test_edit_and_delete_bump_previous_and_new_regions(self):
+        post = Post.objects.create(author=self.user, title='강남구 소식', content='축제')
+        gangnam, mapo = get_data_version('강남구'), get_data_version('마포구')
+
+        # 지역을 바꾸면 이전 지역(강남구)의 답변과 요약도 무효화됩니다.
+        post.title = '마포구 소식'
+        post.save()
+        self.assertGreater(get_data_version('강남구'), gangnam)
+        self.assertGreater(get_data_version('마포구'), mapo)
+
+        # 메모리의 내용이 바뀐 채 삭제해도 DB에 있던 지역을 무효화합니다.
+        mapo = get_data_version('마포구')
+        post.title = '제목'
+        post.delete()
+        self.assertGreater(get_data_version('마포구'), mapo)
+
+
+class ContextEncoderTests(SimpleTestCase):
+    def setUp(self):
+        year = timezone.localdate().year
+        self.data = {
+            'metadata': {'region': '강남구'},
+            'content': {
+                'public_alerts': [
+                    {'title': '폭염 주의보', 'category': '재난', 'date': f'{year}-07-01T14:00:00+09:00',
+                     'location': '강남구', 'content': '폭염 주의보: 외출을 자제하세요.'},
+                    {'title': '도로 통제', 'category': '재난', 'date': f'{year}-07-02',
+                     'location': '서울 강남구', 'content': '테헤란로 일부 통제'},
+                ],
+                'local_events': [
+                    {'title': '여름 축제', 'period': f'{year}-07-05 ~ {year}-07-07',
+                     'location': '코엑스', 'score': 3, 'content': '가족 축제'},
+                ],
+                'community_news': [{'title': '폭염 주의보', 'date': '2020-07-01', 'content': '같은 제목의 글'}],
+            },
+        }
+
+    def test_writes_columns_once_and_drops_repeated_values(self):
+        encoded = encode_context(self.data)
+        self.assertEqual(encoded['text'].split('\n')[1:], [
+            '[공공 알림 2] 제목|일시|내용 (분류=재난)',
+            '폭염 주의보|07-01 14:00|외출을 자제하세요',
+            '도로 통제|07-02|테헤란로 일부 통제',
+            '[지역 행사 1] 제목|기간|장소|추천|내용',
+            '여름 축제|07-05~07-07|코엑스|3|가족 축제',
+        ])
+        self.assertEqual(encoded['dropped'], 0)
+
+    def test_budget_takes_one_item_per_section_in_turn(self):
+        encoded = encode_context(self.data, budget=80)
+        self.assertIn('[공공 알림 1/2]', encoded['text'])
+        self.assertIn('[지역 행사 1]', encoded['text'])
+        self.assertNotIn('도로 통제', encoded['text'])
+        self.assertEqual(encoded['dropped'], 1)
+
+    def test_empty_data_says_so(self):
+        self.assertTrue(encode_context({'metadata': {}, 'content': {}})['text'].endswith('관련 데이터 없음'))
+
+    def test_format_context_records_token_savings(self):
+        before = context_stats.stats()
+        format_context(self.data)
+        after = context_stats.stats()
+        self.assertEqual(after['prompts'], before['prompts'] + 1)
+        self.assertLess(
+            after['compact_tokens'] - before['compact_tokens'],
+            after['raw_tokens'] - before['raw_tokens'],
+        )
+
+
+class ConversationMemoryTests(TestCase):
+    def test_folds_every_message_older_than_the_recent_window(self):
+        session = ChatSession.objects.create(session_id='memory-test')
+        messages = [
+            ChatMessage.objects.create(session=session, message_type='user', content=f'질문 {i}')
+            for i in range(60)
+        ]
+        config = {'history_fetch_limit': 20, 'history_token_budget': 40, 'history_summary_token_budget': 10000}
+        with mock.patch.dict(CHATBOT_CONFIG, config):
+            context = build_conversation_context(session)
+
+        session.refresh_from_db()
+        lines = session.memory_summary.splitlines()
+        kept = len(context['history'])
+        self.assertEqual(lines, [f'사용자: 질문 {i}' for i in range(60 - kept)])
+        self.assertEqual(context['folded'], 60 - kept)
+        self.assertEqual(session.summarized_until, messages[59 - kept].id)
+
+
+class ReplyJobTests(TestCase):
+    def setUp(self):
+        session = ChatSession.objects.create(session_id='job-test')
+        user_message = ChatMessage.objects.create(session=session, message_type='user', content='질문')
+        self.bot_message = enqueue_reply(session, user_message)
+
+    def _reclaim(self):
+        """worker-1이 가져간 작업을 임대 시간이 지난 뒤 worker-2가 다시 가져갑니다."""
+        stale = claim_job('worker-1')
+        self.assertEqual((stale.bot_message_id, stale.locked_by, stale.attempts), (self.bot_message.id, 'worker-1', 1))
+        self.assertIsNone(claim_job('worker-2'))
+
+        expired = timezone.now() - timedelta(seconds=CHATBOT_CONFIG.get('reply_job_lease', 120) + 1)
+        ReplyJob.objects.filter(pk=stale.pk).update(locked_at=expired)
+        return stale, claim_job('worker-2')
+
+    def test_running_job_is_reclaimed_only_after_lease_expires(self):
+        _, job = self._reclaim()
+        self.assertEqual((job.locked_by, job.attempts), ('worker-2', 2))
+        self.assertIsNone(claim_job('worker-3'))
+
+    def test_worker_that_lost_its_lease_cannot_finish_the_job(self):
+        stale, job = self._reclaim()
+        with self.assertRaises(LeaseLost):
+            complete_job(stale, '늦은 답변')
+        with self.assertRaises(LeaseLost):
+            retry_or_fail_job(stale, '오류', '기본 응답')
+
+        complete_job(job, '새 답변')
+        self.bot_message.refresh_from_db()
+        self.assertEqual((self.bot_message.content, self.bot_message.status), ('새 답변', 'done'))
+        self.assertEqual(ReplyJob.objects.get(pk=job.pk).status, 'done')
+
+
+class SingleFlightTests(SimpleTestCase):
+    def setUp(self):
+        self.group = SingleFlight(timeout=5)
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.calls = 0
+
+    def _run_followers(self, count):
+        """리더가 생성 중일 때 같은 key로 count개 요청을 보내고 (결과, 예외) 목록을 반환합니다."""
+        outcomes = []
+
+        def follower():
+            try:
+                outcomes.append((self.group.do("q", lambda: "follower generated"), None))
+            except Exception as e:
+                outcomes.append((None, e))
+
+        threads = [threading.Thread(target=follower) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        # 모든 요청이 리더를 기다리기 시작한 뒤에 리더를 끝냅니다.
+        while self.group.stats()["followers"] < count:
+            time.sleep(0.01)
+        self.release.set()
+        for thread in threads:
+            thread.join()
+        return outcomes
+
+    def _generate(self, result=None, error=None):
+        def generate():
+            self.calls += 1
+            self.started.set()
+            self.release.wait(5)
+            if error:
+                raise error
+            return result
+        return generate
+
+    def test_concurrent_callers_share_one_call(self):
+        leader = threading.Thread(target=lambda: self.group.do("q", self._generate("답변")))
+        leader.start()
+        self.started.wait(5)
+        outcomes = self._run_followers(3)
+        leader.join()
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(outcomes, [("답변", None)] * 3)
+        self.assertEqual(self.group.stats()["in_flight"], 0)
+
+    def test_exception_reaches_every_waiter(self):
+        error = RuntimeError("LLM 실패")
+        leader_errors = []
+
+        def leader():
+            try:
+                self.group.do("q", self._generate(error=error))
+            except RuntimeError as e:
+                leader_errors.append(e)
+
+        thread = threading.Thread(target=leader)
+        thread.start()
+        self.started.wait(5)
+        outcomes = self._run_followers(2)
+        thread.join()
+
+        self.assertEqual(leader_errors, [error])
+        self.assertEqual(outcomes, [(None, error)] * 2)
+        self.assertEqual(self.group.stats()["in_flight"], 0)
+
+    def test_waiter_timeout_does_not_leak_in_flight_entry(self):
+        leader = self.group.acquire("q")
+        follower = self.group.acquire("q")
+        self.assertFalse(follower.leader)
+
+        self.assertIsNone(follower.wait(timeout=0.01))
+        self.assertEqual(self.group.stats()["in_flight"], 0)
+        # 멈춘 리더를 더 기다리지 않고 다음 요청이 새로 생성합니다.
+        self.assertTrue(self.group.acquire("q").leader)
+        # 늦게 끝난 리더가 새 생성의 항목을 지우지 않습니다.
+        leader.complete("늦은 답변")
+        self.assertEqual(self.group.stats()["in_flight"], 1)
+
+
+class TokenBucketTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.now = 1000.0
+        patcher = mock.patch('chatbot.ratelimit.time.time', lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_refills_at_rate_up_to_capacity(self):
+        bucket = TokenBucket('test', capacity=2, refill_rate=0.5)
+        self.assertEqual(bucket.take(), 0)
+        self.assertEqual(bucket.take(), 0)
+        self.assertAlmostEqual(bucket.take(), 2.0)
+
+        self.now += 1
+        self.assertAlmostEqual(bucket.take(), 1.0)
+        self.now += 1
+        self.assertEqual(bucket.take(), 0)
+
+        # 오래 쉬어도 capacity보다 많이 쌓이지 않습니다.
+        self.now += 60
+        self.assertEqual(bucket.take(), 0)
+        self.assertEqual(bucket.take(), 0)
+        self.assertGreater(bucket.take(), 0)
+
+    def test_zero_rate_denies_instead_of_dividing_by_zero(self):
+        bucket = TokenBucket('closed', capacity=2, refill_rate=0)
+        self.assertEqual(bucket.take(), CLOSED_RETRY_AFTER)
+        bucket.refund()
+
+        with mock.patch.dict(CHATBOT_CONFIG, {'rate_limit_user_per_minute': 0, 'llm_daily_token_quota': None}):
+            limit = check_chat_limits(1)
+        self.assertEqual(limit['retry_after'], CLOSED_RETRY_AFTER)
+        self.assertEqual(limit_exceeded_response(limit).status_code, 429)
+
+
+class VectorIndexTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = Path(self.directory.name) / "index"
+        self.ids = list(range(1, 11))
+        self.texts = [f"문서 {i} 강남 행사" for i in self.ids]
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_compact_drops_dead_rows_and_keeps_search_results(self):
+        index = VectorIndex.open(self.path, backend="hashing", dim=32)
+        index.upsert(self.ids, self.texts)
+        index.upsert(self.ids[:4], self.texts[:4])
+        index.remove(self.ids[8:])
+        before = index.search("문서 3 강남", k=2)
+
+        self.assertEqual(index.compact(), 6)
+        self.assertEqual((self.path / "ids.i64").stat().st_size // 8, 8)
+        self.assertEqual(len(index), 8)
+        self.assertEqual(index.search("문서 3 강남", k=2), before)
+        # 다른 프로세스의 색인도 교체된 파일을 다시 읽습니다.
+        self.assertEqual(len(VectorIndex.open(self.path)), 8)
+
+    def test_reloads_idf_after_index_files_are_replaced(self):
+        reader = VectorIndex.open(self.path, backend="hashing", dim=32)
+        reader.upsert(self.ids, self.texts)
+        self.assertTrue(np.all(reader.embedder.idf == 1))
+
+        # 다른 프로세스가 IDF를 다시 계산해 색인을 새로 만든 것처럼 파일을 교체합니다.
+        embedder = HashingEmbedder(dim=32).fit(self.texts)
+        building = VectorIndex(Path(self.directory.name) / "building", embedder)
+        building._write_meta()
+        building.upsert(self.ids, self.texts)
+        for name in ("meta.json", "idf.npy", "vectors.f32", "ids.i64"):
+            (building.path / name).replace(self.path / name)
+
+        reader.search("강남", k=1)
+        np.testing.assert_array_equal(reader.embedder.idf, embedder.idf)
+
+    def test_first_refresh_keeps_embedder_of_new_index(self):
+        embedder = PrecomputedEmbedder(dim=8)
+        index = VectorIndex(self.path, embedder)
+        index._write_meta()
+        index.upsert([1, 2], np.eye(2, 8, dtype=np.float32))
+        self.assertIs(index.embedder, embedder)
+        self.assertEqual(index.search_vector(np.eye(1, 8, dtype=np.float32)[0], k=1)[0][0], 1)
+
+    def test_rebuild_swaps_index_without_a_missing_window(self):
+        documents = [SimpleNamespace(pk=i, title=text, body="") for i, text in zip(self.ids, self.texts)]
+        with mock.patch.dict(CHATBOT_CONFIG, {"vector_index_dir": str(self.path), "embedding_dim": 32}):
+            rebuild_vector_index(documents[:5])
+            reader = VectorIndex.open(self.path)
+            self.assertEqual(len(reader), 5)
+            first = self.path.resolve()
+
+            with mock.patch("chatbot.vectors.shutil.rmtree", wraps=shutil.rmtree) as rmtree:
+                rebuild_vector_index(documents)
+            # 새 색인으로 링크를 바꾼 뒤에야 이전 버전을 지웁니다.
+            self.assertEqual([call.args[0] for call in rmtree.call_args_list], [first])
+
+        self.assertTrue(self.path.is_symlink())
+        self.assertEqual(len(reader), 10)
+        self.assertEqual(sorted(p.name for p in self.path.parent.iterdir()), ["index", self.path.resolve().name])
@@ -9,7 +9,10 @@ urlpatterns = [
     
     # API 엔드포인트들
     path('api/chat/', views.chat_api, name='chat_api'),
+    path('api/chat/stream/', views.chat_stream_api, name='chat_stream_api'),
     path('api/session/create/', views.create_session, name='create_session'),
     path('api/sessions/', views.get_sessions, name='get_sessions'),
     path('api/messages/<str:session_id>/', views.get_messages, name='get_messages'),
+    path('api/replies/<int:message_id>/stream/', views.reply_stream_api, name='reply_stream_api'),
+    path('api/metrics/', views.metrics_api, name='metrics_api'),
 ]
@@ -0,0 +1,502 @@
+"""질문과 의미가 비슷한 근거 문서를 찾는 벡터 검색 색인
+
+임베딩 방식은 CHATBOT_CONFIG['embedding_backend']로 바꿀 수 있고, 기본값인 'hashing'은
+외부 API 없이 동작하는 TF-IDF 해싱 벡터라이저입니다. 벡터는 디스크의 float32 행렬 파일에
+이어 붙여 저장하고, 검색할 때는 파일을 메모리 매핑해 청크 단위 내적으로 top-k를 구합니다.
+"""
+import json
+import math
+import os
+import shutil
+import threading
+import time
+import zlib
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows 개발 환경에서는 파일 잠금 없이 동작합니다.
+    fcntl = None
+
+import numpy as np
+from django.conf import settings
+
+from .config import CHATBOT_CONFIG
+from .fulltext import make_snippet, split_words, word_bigrams
+from .models import ContextDocument
+
+SEARCH_CHUNK_ROWS = 65536
+COMPACT_MIN_DEAD_ROWS = 1024  # 무효화된 행이 이만큼 쌓이고
+COMPACT_DEAD_RATIO = 0.5  # 전체 행에서 이 비율을 넘으면 파일을 압축합니다.
+
+
+@contextmanager
+def _locked_file(path, exclusive=True):
+    """여러 워커가 같은 파일을 쓰므로 파일 잠금을 잡고 엽니다. (쓰기는 배타 잠금, 읽기는 공유 잠금)
+
+    잠금을 기다리는 사이 압축이나 재구축으로 파일이 교체되었으면 새 파일을 다시 엽니다.
+    """
+    while True:
+        file = open(path, "ab" if exclusive else "rb")
+        if fcntl:
+            fcntl.flock(file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            current = os.stat(path).st_ino == os.fstat(file.fileno()).st_ino
+        except FileNotFoundError:
+            current = False
+        if current:
+            break
+        file.close()
+    try:
+        yield file
+    finally:
+        if fcntl:
+            fcntl.flock(file, fcntl.LOCK_UN)
+        file.close()
+
+
+class HashingEmbedder:
+    """단어와 2글자 조각을 해시 버킷에 모아 TF-IDF 가중치를 준 벡터 (오프라인)"""
+
+    name = "hashing"
+
+    def __init__(self, dim=256, idf=None):
+        self.dim = dim
+        self.idf = idf if idf is not None else np.ones(dim, dtype=np.float32)
+
+    def _buckets(self, text):
+        features = []
+        for word in split_words(text):
+            features.append(word)
+            if len(word) > 2:
+                features.extend(word_bigrams(word))
+        counts = Counter()
+        for feature in features:
+            digest = zlib.crc32(feature.encode("utf-8"))
+            # 부호 해시로 버킷 충돌의 편향을 줄입니다.
+            counts[digest % self.dim] += 1 if digest & 0x80000000 else -1
+        return counts
+
+    def fit(self, texts):
+        """문서 빈도로 버킷별 IDF를 계산합니다."""
+        document_frequency = np.zeros(self.dim, dtype=np.float64)
+        total = 0
+        for text in texts:
+            total += 1
+            for bucket in self._buckets(text):
+                document_frequency[bucket] += 1
+        self.idf = (np.log((1 + total) / (1 + document_frequency)) + 1).astype(np.float32)
+        return self
+
+    def embed(self, texts):
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for bucket, count in self._buckets(text).items():
+                sign = 1.0 if count > 0 else -1.0
+                vectors[row, bucket] = sign * (1 + math.log(abs(count))) if count else 0.0
+        vectors *= self.idf
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def state(self):
+        return {"idf": self.idf}
+
+
+class OpenAIEmbedder:
+    """OpenAI 임베딩 API를 사용하는 벡터 (네트워크 필요)"""
+
+    name = "openai"
+
+    def __init__(self, dim=1536, model="text-embedding-3-small", **kwargs):
+        self.dim = dim
+        self.model = model
+
+    def fit(self, texts):
+        return self
+
+    def embed(self, texts):
+        from .llm import get_client
+
+        # 답변 생성과 같은 연결 풀을 쓰고, 게시글 저장 중에도 불리므로 짧은 마감 시간을 둡니다.
+        response = get_client().embeddings.create(
+            model=self.model,
+            input=list(texts),
+            dimensions=self.dim,
+            timeout=CHATBOT_CONFIG.get("embedding_timeout", 5),
+        )
+        vectors = np.array([item.embedding for item in response.data], dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def state(self):
+        return {}
+
+
+class PrecomputedEmbedder:
+    """이미 계산된 벡터를 정규화만 해서 그대로 쓰는 임베더 (벤치마크나 외부에서 임베딩한 벡터용)"""
+
+    name = "precomputed"
+
+    def __init__(self, dim=256, **kwargs):
+        self.dim = dim
+
+    def fit(self, texts):
+        return self
+
+    def embed(self, texts):
+        vectors = np.asarray(texts, dtype=np.float32).reshape(-1, self.dim)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def state(self):
+        return {}
+
+
+EMBEDDING_BACKENDS = {
+    HashingEmbedder.name: HashingEmbedder,
+    OpenAIEmbedder.name: OpenAIEmbedder,
+    PrecomputedEmbedder.name: PrecomputedEmbedder,
+}
+
+
+class VectorIndex:
+    """디스크에 이어 붙이는 벡터 행렬과 문서 id 목록
+
+    - vectors.f32: (행 수 x dim) float32 행렬
+    - ids.i64: 각 행의 ContextDocument id (삭제되거나 갱신된 행은 -1)
+    - meta.json / idf.npy: 임베딩 방식과 차원, 해싱 IDF
+
+    무효화된 행이 많이 쌓이면 살아 있는 행만 새 파일로 옮겨 교체합니다. (compact)
+    """
+
+    def __init__(self, path, embedder):
+        self.path = Path(path)
+        self.embedder = embedder
+        self.dim = embedder.dim
+        self._lock = threading.Lock()
+        self._vectors = None
+        self._ids = None
+        self._rows_by_id = {}
+        self._loaded_rows = 0
+        self._file_key = None
+        self._meta_key = self._stat_meta()
+
+    @property
+    def _vectors_path(self):
+        return self.path / "vectors.f32"
+
+    @property
+    def _ids_path(self):
+        return self.path / "ids.i64"
+
+    def _stat_meta(self):
+        """meta.json이 바뀌었는지 비교할 값 (없으면 None)"""
+        try:
+            stat = (self.path / "meta.json").stat()
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    @staticmethod
+    def _load_embedder(path, backend=None, dim=None):
+        """meta.json과 idf.npy에 저장된 설정으로 임베더를 만듭니다. (없으면 주어진 설정)"""
+        meta_path = path / "meta.json"
+        if meta_path.exists():
+            meta = json.loads(meta_path.read_text())
+            backend, dim = meta["backend"], meta["dim"]
+        embedder = EMBEDDING_BACKENDS[backend or "hashing"](dim=dim or 256)
+        idf_path = path / "idf.npy"
+        if isinstance(embedder, HashingEmbedder) and idf_path.exists():
+            embedder.idf = np.load(idf_path)
+        return embedder
+
+    @classmethod
+    def open(cls, path, backend=None, dim=None):
+        """저장된 설정으로 색인을 열고, 없으면 주어진 설정으로 새로 만듭니다."""
+        path = Path(path)
+        index = cls(path, cls._load_embedder(path, backend, dim))
+        if not (path / "meta.json").exists():
+            index._write_meta()
+        return index
+
+    def _write_meta(self):
+        self.path.mkdir(parents=True, exist_ok=True)
+        # IDF를 먼저 쓰고 meta.json을 나중에 써서, meta.json이 바뀌었으면 IDF도 준비되어 있게 합니다.
+        for name, value in self.embedder.state().items():
+            np.save(self.path / f"{name}.npy", value)
+        (self.path / "meta.json").write_text(
+            json.dumps({"backend": self.embedder.name, "dim": self.dim})
+        )
+        self._vectors_path.touch()
+        self._ids_path.touch()
+        self._meta_key = self._stat_meta()
+
+    def _refresh(self):
+        """다른 프로세스가 행을 추가했거나 색인을 다시 만들었으면 메모리 매핑을 다시 엽니다."""
+        stat = self._ids_path.stat() if self._ids_path.exists() else None
+        file_key = (stat.st_ino, stat.st_size) if stat else None
+        if file_key == self._file_key:
+            return
+        meta_key = self._stat_meta()
+        if meta_key is not None and meta_key != self._meta_key:
+            # rebuild_vector_index(다른 프로세스)가 색인을 새로 만들었으면 다시 계산된 IDF도 함께 읽어
+            # 질문과 새 문서를 색인 벡터와 같은 방식으로 임베딩합니다.
+            self.embedder = self._load_embedder(self.path)
+            self.dim = self.embedder.dim
+            self._meta_key = meta_key
+        rows = 0
+        if stat:
+            rows = min(stat.st_size // 8, self._vectors_path.stat().st_size // (self.dim * 4))
+        if rows:
+            self._vectors = np.memmap(self._vectors_path, dtype=np.float32, mode="r", shape=(rows, self.dim))
+            self._ids = np.memmap(self._ids_path, dtype=np.int64, mode="r", shape=(rows,))
+        else:
+            self._vectors = np.zeros((0, self.dim), dtype=np.float32)
+            self._ids = np.zeros(0, dtype=np.int64)
+
+        # 같은 파일에 행만 추가된 경우에는 새로 붙은 부분만 읽습니다.
+        first_row = self._loaded_rows
+        if not (stat and self._file_key and self._file_key[0] == stat.st_ino and rows >= first_row):
+            self._rows_by_id = {}
+            first_row = 0
+        for row, document_id in enumerate(self._ids[first_row:rows].tolist(), start=first_row):
+            if document_id >= 0:
+                self._rows_by_id[document_id] = row
+        self._loaded_rows = rows
+        self._file_key = file_key
+
+    def _refresh_shared(self):
+        """쓰는 프로세스가 파일을 교체하는 도중의 어긋난 두 파일을 읽지 않도록 공유 잠금을 잡고 갱신합니다."""
+        try:
+            with _locked_file(self._ids_path, exclusive=False):
+                self._refresh()
+        except FileNotFoundError:
+            # 재구축 중이라 파일이 잠시 없으면 빈 색인으로 봅니다.
+            self._refresh()
+
+    def __len__(self):
+        with self._lock:
+            self._refresh_shared()
+            return len(self._rows_by_id)
+
+    def _tombstone(self, document_ids):
+        rows = [self._rows_by_id.pop(i) for i in document_ids if i in self._rows_by_id]
+        if not rows:
+            return
+        ids = np.memmap(self._ids_path, dtype=np.int64, mode="r+", shape=(self._ids.shape[0],))
+        ids[rows] = -1
+        ids.flush()
+
+    def upsert(self, document_ids, texts):
+        """문서를 임베딩해 이어 붙이고, 같은 문서의 이전 행은 무효화합니다."""
+        if not document_ids:
+            return
+        embedder = self.embedder
+        vectors = embedder.embed(texts).astype(np.float32)
+        with self._lock, _locked_file(self._ids_path) as ids_file:
+            self._refresh()
+            if self.embedder is not embedder:
+                # 임베딩하는 사이 색인이 다시 만들어졌으면 새 IDF로 다시 임베딩합니다.
+                vectors = self.embedder.embed(texts).astype(np.float32)
+            self._tombstone(document_ids)
+            # 벡터를 먼저 쓰고 id를 나중에 써서, 읽는 쪽은 id 수만큼만 행을 봅니다.
+            # 이전 쓰기가 중간에 끊겼다면 id가 없는 벡터 행을 잘라내 정렬을 맞춥니다.
+            os.truncate(self._vectors_path, (self._ids_path.stat().st_size // 8) * self.dim * 4)
+            with open(self._vectors_path, "ab") as vectors_file:
+                vectors_file.write(vectors.tobytes())
+            ids_file.write(np.asarray(document_ids, dtype=np.int64).tobytes())
+            ids_file.flush()
+            self._compact_if_needed()
+
+    def remove(self, document_ids):
+        with self._lock, _locked_file(self._ids_path):
+            self._refresh()
+            self._tombstone(document_ids)
+            self._compact_if_needed()
+
+    def _compact_if_needed(self):
+        self._refresh()
+        dead = self._loaded_rows - len(self._rows_by_id)
+        if dead >= COMPACT_MIN_DEAD_ROWS and dead >= self._loaded_rows * COMPACT_DEAD_RATIO:
+            self._compact()
+
+    def compact(self):
+        """무효화된 행을 버리고 살아 있는 행만 남긴 파일로 교체합니다. 버린 행 수를 반환합니다."""
+        with self._lock, _locked_file(self._ids_path):
+            self._refresh()
+            return self._compact()
+
+    def _compact(self):
+        # 호출하는 쪽이 ids 파일의 배타 잠금을 잡고 있어야 합니다.
+        live_rows = np.flatnonzero(np.asarray(self._ids) >= 0)
+        dead = self._loaded_rows - live_rows.shape[0]
+        if not dead:
+            return 0
+        vectors_tmp = self.path / "vectors.f32.compact"
+        ids_tmp = self.path / "ids.i64.compact"
+        with open(vectors_tmp, "wb") as vectors_file:
+            for start in range(0, live_rows.shape[0], SEARCH_CHUNK_ROWS):
+                vectors_file.write(np.asarray(self._vectors[live_rows[start:start + SEARCH_CHUNK_ROWS]]).tobytes())
+        with open(ids_tmp, "wb") as ids_file:
+            ids_file.write(np.asarray(self._ids)[live_rows].astype(np.int64).tobytes())
+        # 벡터를 먼저 바꾸고 ids를 나중에 바꿉니다. 읽는 쪽은 ids 파일의 공유 잠금을 잡고 읽으므로
+        # 교체가 끝난 뒤에야 (새 ids, 새 벡터)를 함께 엽니다.
+        os.replace(vectors_tmp, self._vectors_path)
+        os.replace(ids_tmp, self._ids_path)
+        self._refresh()
+        return dead
+
+    def search_vector(self, query, k=5):
+        """(문서 id, 유사도) 목록을 유사도 높은 순으로 반환합니다."""
+        with self._lock:
+            self._refresh_shared()
+            vectors, ids = self._vectors, self._ids
+        best_scores = np.empty(0, dtype=np.float32)
+        best_rows = np.empty(0, dtype=np.int64)
+        for start in range(0, vectors.shape[0], SEARCH_CHUNK_ROWS):
+            scores = vectors[start:start + SEARCH_CHUNK_ROWS] @ query
+            scores[ids[start:start + SEARCH_CHUNK_ROWS] < 0] = -np.inf
+            if scores.shape[0] > k:
+                top = np.argpartition(-scores, k)[:k]
+            else:
+                top = np.arange(scores.shape[0])
+            best_scores = np.concatenate([best_scores, scores[top]])
+            best_rows = np.concatenate([best_rows, top + start])
+            if best_scores.shape[0] > k:
+                keep = np.argpartition(-best_scores, k)[:k]
+                best_scores, best_rows = best_scores[keep], best_rows[keep]
+        order = np.argsort(-best_scores)
+        return [
+            (int(ids[best_rows[i]]), float(best_scores[i]))
+            for i in order
+            if np.isfinite(best_scores[i])
+        ]
+
+    def search(self, text, k=5):
+        with self._lock:
+            self._refresh_shared()
+            embedder = self.embedder
+        return self.search_vector(embedder.embed([text])[0], k=k)
+
+
+def _index_path():
+    return Path(CHATBOT_CONFIG.get("vector_index_dir") or settings.BASE_DIR / "data" / "vector_index")
+
+
+_vector_index = None
+_vector_index_lock = threading.Lock()
+
+
+def get_vector_index():
+    """프로세스당 하나의 벡터 색인을 반환합니다."""
+    global _vector_index
+    if _vector_index is None:
+        with _vector_index_lock:
+            if _vector_index is None:
+                _vector_index = VectorIndex.open(
+                    _index_path(),
+                    backend=CHATBOT_CONFIG.get("embedding_backend", "hashing"),
+                    dim=CHATBOT_CONFIG.get("embedding_dim", 256),
+                )
+    return _vector_index
+
+
+def document_text(document):
+    return f"{document.title}\n{document.body}"
+
+
+def index_documents(documents):
+    """ContextDocument들을 벡터 색인에 추가/갱신합니다."""
+    documents = list(documents)
+    get_vector_index().upsert([d.pk for d in documents], [document_text(d) for d in documents])
+
+
+def remove_documents(document_ids):
+    get_vector_index().remove(list(document_ids))
+
+
+def search_similar_documents(text, k=5, min_score=0.0):
+    """질문과 비슷한 문서를 찾아 전문 검색과 같은 형식으로 반환합니다."""
+    hits = [(i, score) for i, score in get_vector_index().search(text, k=k) if score >= min_score]
+    if not hits:
+        return []
+    documents = ContextDocument.objects.in_bulk([i for i, _ in hits])
+    words = split_words(text)
+    results = []
+    for document_id, score in hits:
+        document = documents.get(document_id)
+        if document is None:
+            continue
+        results.append(
+            {
+                "source": document.source,
+                "object_id": document.object_id,
+                "title": document.title,
+                "snippet": make_snippet(document.body, words),
+                "payload": document.payload,
+                "score": score,
+            }
+        )
+    return results
+
+
+def _swap_index_dir(path, new_dir):
+    """path를 new_dir을 가리키는 심볼릭 링크로 한 번에 바꾸고 이전 색인 디렉터리를 지웁니다.
+
+    링크 교체(rename)는 원자적이라 읽는 쪽이 색인이 없는 순간을 보지 않고, 중간에 죽어도
+    이전 색인이나 새 색인 중 하나가 남습니다. 이미 열린 메모리 매핑은 지운 뒤에도 그대로 읽힙니다.
+    """
+    old_dir = path.resolve() if path.is_symlink() else None
+    if path.exists() and old_dir is None:
+        # 링크를 쓰기 전에 만든 실제 디렉터리는 옆으로 옮겨 두었다가 지웁니다. (처음 한 번만)
+        old_dir = path.with_name(f"{path.name}.{time.time_ns()}.old")
+        os.replace(path, old_dir)
+    link = path.with_name(path.name + ".link")
+    if link.is_symlink():
+        link.unlink()
+    try:
+        os.symlink(new_dir.name, link)
+    except OSError:
+        # 심볼릭 링크를 만들 수 없는 환경(Windows 등)에서는 디렉터리를 옮겨 넣습니다.
+        if path.exists() and path.resolve() != new_dir:
+            aside = path.with_name(f"{path.name}.{time.time_ns()}.old")
+            os.replace(path, aside)
+            old_dir = aside
+        os.replace(new_dir, path)
+    else:
+        os.replace(link, path)
+    if old_dir is not None and old_dir != new_dir:
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+
+def rebuild_vector_index(documents, batch_size=1000):
+    """IDF를 다시 계산하고 모든 문서를 새 버전 디렉터리에 색인한 뒤 링크를 바꿔 교체합니다."""
+    global _vector_index
+    path = _index_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # 이전 재구축이 중간에 끊겨 남은 디렉터리를 지웁니다. (지금 쓰는 색인은 남깁니다.)
+    current = path.resolve() if path.is_symlink() else None
+    for stale in path.parent.glob(path.name + ".*"):
+        if stale.is_dir() and not stale.is_symlink() and stale != current:
+            shutil.rmtree(stale, ignore_errors=True)
+    building_path = path.with_name(f"{path.name}.{time.time_ns()}")
+
+    backend = CHATBOT_CONFIG.get("embedding_backend", "hashing")
+    embedder = EMBEDDING_BACKENDS[backend](dim=CHATBOT_CONFIG.get("embedding_dim", 256))
+    documents = list(documents)
+    embedder.fit(document_text(d) for d in documents)
+    index = VectorIndex(building_path, embedder)
+    index._write_meta()
+    for start in range(0, len(documents), batch_size):
+        batch = documents[start:start + batch_size]
+        index.upsert([d.pk for d in batch], [document_text(d) for d in batch])
+
+    _swap_index_dir(path, building_path)
+    with _vector_index_lock:
+        _vector_index = None
+    return len(documents)
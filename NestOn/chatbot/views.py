@@ -1,20 +1,46 @@
 from django.shortcuts import render, get_object_or_404
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth.decorators import login_required
 from django.utils import timezone
-from django.conf import settings
+from django.db.models import Count, Max, Q
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.exceptions import AuthenticationFailed
 from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from asgiref.sync import sync_to_async
+from contextlib import aclosing
+from datetime import datetime
+import asyncio
+import base64
+import binascii
 import json
+import random
+import threading
 import uuid
-import openai
-from .models import ChatSession, ChatMessage, BotResponse
-from .config import OPENAI_API_KEY, CHATBOT_CONFIG, SYSTEM_PROMPT
-from board.models import Post  # 게시판 모델 import 추가
-from public_data.models import PublicAlert  # 공공데이터 모델 import 추가
-from local_events.models import LocalEvent  # 지역 이벤트 모델 import 추가
+from .models import ChatSession, ChatMessage
+from .cache import answer_cache
+from .config import CHATBOT_CONFIG, SYSTEM_PROMPT
+from .context import context_stats, format_context
+from .digests import CONTEXT_SECTIONS, get_region_digest
+from .faq import keyword_fast_path
+from .gazetteer import get_gazetteer
+from .intent import classify_question
+from .jobs import enqueue_reply
+from .memory import build_conversation_context, memory_stats
+from .parallel import submit
+from .ratelimit import charge_llm_tokens, check_chat_limits, limit_exceeded_response
+from .singleflight import single_flight
+from . import telemetry
+from .telemetry import stage, trace
+from .vectors import search_similar_documents
+from .llm import (
+    create_chat_completion,
+    is_configured as is_llm_configured,
+    stats as llm_stats,
+    stream_chat_completion,
+)
 
 
 def generate_session_id():
@@ -22,57 +48,24 @@ def generate_session_id():
     return str(uuid.uuid4())
 
 
-def extract_region_from_question(user_message):
-    """질문에서 지역명을 추출"""
-    try:
-        prompt = f"""
-        다음 질문에서 서울시 25개 구 중 하나를 찾아주세요.
-        동네명, 지명, 역명 등이 포함되어 있으면 해당 구로 매핑해주세요.
-        
-        예시:
-        - "연희동" → "서대문구"
-        - "홍대" → "마포구" 
-        - "강남역" → "강남구"
-        - "서초" → "서초구"
-        - "종로" → "종로구"
-        - "용산" → "용산구"
-        
-        서울시 25개 구: 강남구, 서초구, 마포구, 서대문구, 종로구, 중구, 용산구, 성동구, 광진구, 동대문구, 중랑구, 성북구, 강북구, 도봉구, 노원구, 은평구, 양천구, 강서구, 구로구, 금천구, 영등포구, 동작구, 관악구, 송파구, 강동구
-        
-        찾으면 구 이름만 답변하고, 없으면 'none'으로 답변해주세요.
-        
-        질문: {user_message}
-        """
-        response = call_openai_api(prompt)
-        region = response.strip().lower()
-        return region if region != "none" else None
-    except Exception as e:
-        print(f"지역명 추출 오류: {e}")
-        return None
-
-
-def should_use_news_data(user_message):
-    """LLM이 질문이 소식 관련인지 판단"""
-    try:
-        prompt = f"""
-        다음 질문이 지역 소식/뉴스/이슈 관련 질문인지 판단해주세요.
-        'yes' 또는 'no'로만 답변해주세요.
-        
-        질문: {user_message}
-        """
-        response = call_openai_api(prompt)
-        return "yes" in response.lower()
-    except Exception as e:
-        print(f"질문 유형 판단 오류: {e}")
-        return False
-
-
+@stage("context")
 def get_structured_data(user_message):
     """LLM 기반으로 사용자 메시지와 관련된 모든 앱의 정보를 구조화된 데이터로 가져옵니다."""
     try:
-        # LLM이 지역명과 질문 유형을 판단
-        region = extract_region_from_question(user_message)
-        is_news_question = should_use_news_data(user_message)
+        # 지명 사전으로 지역을 알 수 없는 질문은 LLM이 분류하는 동안 비슷한 문서를 미리 찾아 둡니다.
+        similar = None
+        if CHATBOT_CONFIG.get("vector_retrieval", True) and not get_gazetteer().resolve(user_message):
+            similar = submit(
+                search_similar_documents,
+                user_message,
+                k=CHATBOT_CONFIG.get("vector_top_k", 5),
+                min_score=CHATBOT_CONFIG.get("vector_min_score", 0.2),
+            )
+
+        # LLM이 지역명과 질문 유형을 한 번에 판단
+        intent = classify_question(user_message)
+        region = intent["region"]
+        is_news_question = intent["question_type"] == "news"
 
         # 기본 구조
         structured_data = {
@@ -81,93 +74,33 @@ def get_structured_data(user_message):
             "metadata": {
                 "region": region,
                 "question_type": "news" if is_news_question else "general",
+                "confidence": intent["confidence"],
+                "region_source": intent["source"],
                 "timestamp": timezone.now().isoformat(),
             },
         }
 
-        # 지역명이 없거나 소식 관련 질문이 아니면 기본 정보만 반환
-        if not region or not is_news_question:
+        # 소식 관련 질문이 아니면 기본 정보만 반환
+        if not is_news_question:
             structured_data["content"][
                 "general_info"
             ] = "일반적인 지역 정보를 제공합니다."
             return structured_data
 
-        # 1. 게시판 정보 (board 앱)
-        related_posts = Post.objects.filter(
-            is_active=True, title__icontains=region
-        ).order_by("-created_at")[:3]
-
-        related_posts_content = Post.objects.filter(
-            is_active=True, content__icontains=region
-        ).order_by("-created_at")[:3]
-
-        all_posts = list(related_posts) + list(related_posts_content)
-
-        # 중복 제거 및 최신순 정렬
-        unique_posts = []
-        seen_ids = set()
-        for post in all_posts:
-            if post.id not in seen_ids:
-                unique_posts.append(post)
-                seen_ids.add(post.id)
-
-        unique_posts = sorted(unique_posts, key=lambda x: x.created_at, reverse=True)[
-            :5
-        ]
-
-        for post in unique_posts:
-            structured_data["content"]["community_news"].append(
-                {
-                    "title": post.title,
-                    "content": (
-                        post.content[:200] + "..."
-                        if len(post.content) > 200
-                        else post.content
-                    ),
-                    "date": post.created_at.strftime("%Y-%m-%d"),
-                    "views": post.view_count,
-                }
-            )
-
-        # 2. 공공데이터 알림 정보 (public_data 앱)
-        related_alerts = PublicAlert.objects.filter(
-            location_name__icontains=region
-        ).order_by("-published_at")[:5]
-
-        for alert in related_alerts:
-            structured_data["content"]["public_alerts"].append(
-                {
-                    "title": alert.title,
-                    "content": (
-                        alert.content[:200] + "..."
-                        if len(alert.content) > 200
-                        else alert.content
-                    ),
-                    "category": alert.get_category_display(),
-                    "date": alert.published_at.strftime("%Y-%m-%d %H:%M"),
-                    "location": alert.location_name,
-                }
-            )
-
-        # 3. 지역 이벤트 정보 (local_events 앱)
-        related_events = LocalEvent.objects.filter(
-            location_name__icontains=region
-        ).order_by("-recommendation_score", "start_date")[:5]
+        if region:
+            # 미리 만들어 둔 지역 요약을 키 하나로 꺼내 씁니다. (최신이면 DB 조회 없음)
+            structured_data["content"] = get_region_digest(region)["content"]
+            return structured_data
 
-        for event in related_events:
-            structured_data["content"]["local_events"].append(
-                {
-                    "title": event.title,
-                    "content": (
-                        event.content[:200] + "..."
-                        if len(event.content) > 200
-                        else event.content
-                    ),
-                    "period": f"{event.start_date} ~ {event.end_date}",
-                    "location": event.location_name,
-                    "score": event.recommendation_score,
-                }
-            )
+        # 지역을 알 수 없는 소식 질문은 질문과 비슷한 문서를 벡터 검색으로 찾습니다.
+        if similar is not None:
+            for document in similar.result():
+                items = structured_data["content"][CONTEXT_SECTIONS[document["source"]]]
+                items.append(dict(document["payload"], content=document["snippet"]))
+        if not any(structured_data["content"].values()):
+            structured_data["content"][
+                "general_info"
+            ] = "일반적인 지역 정보를 제공합니다."
 
         return structured_data
 
@@ -184,26 +117,33 @@ def get_structured_data(user_message):
         }
 
 
-def call_openai_api(prompt, model="gpt-3.5-turbo"):
-    """OpenAI API를 호출합니다."""
-    try:
-        # OpenAI API 키 설정
-        openai.api_key = OPENAI_API_KEY
+_prompt_state = threading.local()
 
-        if not openai.api_key or openai.api_key == "sk-your-team-api-key-here":
-            return None
 
+def build_answer_messages(user_message, conversation=None):
+    """사용자 질문과 관련 데이터를 묶어 답변 생성용 메시지 목록을 만듭니다.
+
+    conversation은 build_conversation_context의 결과로, 이전 대화 요약과 최근 대화를 함께 넣습니다.
+    """
+    # 데이터 수집 중에 다시 프롬프트를 만들려고 하면 호출이 중첩되므로 바로 막습니다.
+    if getattr(_prompt_state, "building", False):
+        raise RuntimeError("답변 프롬프트 생성이 중첩 호출되었습니다.")
+    _prompt_state.building = True
+    try:
         # 구조화된 데이터 가져오기
-        structured_data = get_structured_data(prompt)
+        structured_data = get_structured_data(user_message)
+    finally:
+        _prompt_state.building = False
 
-        # 단순한 텍스트 응답을 위한 프롬프트
-        enhanced_prompt = f"""
+    # 단순한 텍스트 응답을 위한 프롬프트
+    enhanced_prompt = f"""
         다음 데이터를 바탕으로 사용자 질문에 답변해주세요.
         답변은 자연스럽고 친근한 텍스트로 작성해주세요.
         
-        사용자 질문: {prompt}
+        사용자 질문: {user_message}
         
-        데이터: {structured_data}
+        데이터:
+        {format_context(structured_data)}
         
         주의사항:
         - 자연스럽고 친근한 톤으로 답변
@@ -213,43 +153,111 @@ def call_openai_api(prompt, model="gpt-3.5-turbo"):
         - 2-3문장으로 간결하게 작성
         """
 
-        # 시스템 프롬프트 사용
-        response = openai.ChatCompletion.create(
-            model=model,
-            messages=[
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": enhanced_prompt},
-            ],
-            max_tokens=CHATBOT_CONFIG.get("max_tokens", 800),
-            temperature=CHATBOT_CONFIG.get("temperature", 0.7),
+    # 시스템 프롬프트 사용
+    messages = [{"role": "system", "content": SYSTEM_PROMPT}]
+    if conversation:
+        if conversation["summary"]:
+            messages.append(
+                {
+                    "role": "system",
+                    "content": f"이전 대화 요약:\n{conversation['summary']}",
+                }
+            )
+        messages += conversation["history"]
+    messages.append({"role": "user", "content": enhanced_prompt})
+    return messages
+
+
+def call_openai_api(prompt, model=None, conversation=None):
+    """OpenAI API를 호출합니다. (model을 비워 두면 답변 모델 설정과 지연 시간 예산에 따라 고릅니다)"""
+    try:
+        if not is_llm_configured():
+            return None
+
+        return create_chat_completion(
+            build_answer_messages(prompt, conversation), model=model
         )
-        return response.choices[0].message.content
     except Exception as e:
         print(f"OpenAI API 호출 오류: {e}")
         return None
 
 
-def get_bot_response(user_message):
-    """사용자 메시지에 대한 봇 응답을 생성합니다."""
-
-    # 1단계: OpenAI API 사용 (주력)
-    try:
-        llm_response = call_openai_api(user_message)
-        if llm_response and llm_response.strip():
-            return llm_response.strip()
-    except Exception as e:
-        print(f"OpenAI API 호출 오류: {e}")
+def get_fallback_response(user_message=None):
+    """API 실패 시 사용할 기본 응답을 반환합니다."""
+    # 일부라도 일치하는 키워드 응답이 있으면 그것을 먼저 사용
+    if user_message and CHATBOT_CONFIG.get("fallback_to_keywords", True):
+        try:
+            keyword_response = keyword_fast_path.best_effort(user_message)
+            if keyword_response:
+                return keyword_response
+        except Exception as e:
+            print(f"키워드 응답 조회 오류: {e}")
 
-    # 2단계: 기본 응답 (API 실패 시 Fallback)
     default_responses = [
         "죄송합니다. 현재 서비스에 일시적인 문제가 있습니다. 잠시 후 다시 시도해주세요.",
         "서버 연결에 문제가 있어요. 잠시 후 다시 질문해주세요!",
         "일시적으로 답변을 생성할 수 없습니다. 잠시 후 다시 시도해주세요.",
     ]
+    return random.choice(default_responses)
 
-    import random
 
-    return random.choice(default_responses)
+def is_cacheable(cache_key, conversation):
+    """이전 대화에 기대는 후속 질문의 답변은 다른 세션과 공유하지 않습니다.
+
+    지역이 드러난 질문은 그 자체로 뜻이 통하므로 대화 중이어도 캐시를 사용합니다.
+    """
+    return not (conversation and conversation["history"]) or cache_key[1] is not None
+
+
+def generate_answer(user_message, conversation=None, cache_key=None):
+    """LLM으로 답변을 만들고 cache_key가 있으면 캐시에 저장합니다. 실패하면 None을 반환합니다."""
+    llm_response = call_openai_api(user_message, conversation=conversation)
+    if not llm_response or not llm_response.strip():
+        return None
+    if cache_key is not None:
+        answer_cache.set(cache_key, llm_response.strip())
+    return llm_response.strip()
+
+
+def get_bot_response(user_message, conversation=None, fallback=True):
+    """사용자 메시지에 대한 봇 응답을 생성합니다.
+
+    fallback=False면 LLM이 실패했을 때 기본 응답 대신 None을 반환합니다. (작업 큐 재시도용)
+    """
+
+    # 0단계: 등록된 키워드 응답과 확실히 일치하면 LLM 없이 바로 답변
+    with stage("keyword"):
+        keyword_response = keyword_fast_path.answer(user_message)
+    if keyword_response:
+        return keyword_response
+
+    # 1단계: 같은 질문에 대한 캐시된 답변 사용
+    with stage("cache"):
+        cache_key = answer_cache.make_key(user_message)
+        use_cache = is_cacheable(cache_key, conversation)
+        cached_response = answer_cache.get(cache_key) if use_cache else None
+    if cached_response:
+        return cached_response
+
+    # 2단계: OpenAI API 사용 (주력)
+    try:
+        if use_cache:
+            # 같은 질문이 동시에 들어오면 한 번만 생성하고 결과를 나눠 씁니다.
+            llm_response = single_flight.do(
+                cache_key,
+                lambda: generate_answer(user_message, conversation, cache_key),
+            )
+        else:
+            llm_response = generate_answer(user_message, conversation)
+        if llm_response:
+            return llm_response
+    except Exception as e:
+        print(f"OpenAI API 호출 오류: {e}")
+
+    # 3단계: 기본 응답 (API 실패 시 Fallback, 캐시하지 않음)
+    if not fallback:
+        return None
+    return get_fallback_response(user_message)
 
 
 @login_required
@@ -279,6 +287,11 @@ def chat_api(request):
     """채팅 API 엔드포인트"""
     if request.method == "POST":
         try:
+            # 요청 한도나 오늘 할당량을 넘었으면 DB와 LLM을 쓰기 전에 돌려보냅니다.
+            limit = check_chat_limits(request.user.id)
+            if limit:
+                return limit_exceeded_response(limit)
+
             data = json.loads(request.body)
             message = data.get("message", "").strip()
             session_id = data.get("session_id")
@@ -295,12 +308,27 @@ def chat_api(request):
                 return JsonResponse({"error": "유효하지 않은 세션입니다."}, status=400)
 
             # 사용자 메시지 저장
-            user_message = ChatMessage.objects.create(
-                session=session, message_type="user", content=message
-            )
+            user_message = save_user_message(session, message)
+
+            # 비동기 모드: 답변 생성을 작업 큐에 넣고 바로 202로 응답합니다.
+            if data.get("async", CHATBOT_CONFIG.get("async_replies", False)):
+                bot_message = enqueue_reply(session, user_message)
+                return JsonResponse(
+                    {
+                        "success": True,
+                        "user_message": serialize_message(user_message),
+                        "bot_message": serialize_message(bot_message),
+                    },
+                    status=202,
+                )
 
-            # 봇 응답 생성
-            bot_response_text = get_bot_response(message)
+            # 이전 대화를 토큰 예산에 맞춰 모은 뒤 봇 응답 생성
+            with trace("chat") as current:
+                conversation = build_conversation_context(
+                    session, exclude_id=user_message.id
+                )
+                bot_response_text = get_bot_response(message, conversation)
+            charge_llm_tokens(request.user.id, current.llm_tokens)
 
             # 봇 응답 저장
             bot_message = ChatMessage.objects.create(
@@ -331,6 +359,215 @@ def chat_api(request):
     return JsonResponse({"error": "POST 요청만 허용됩니다."}, status=405)
 
 
+def summarize_question(content):
+    """첫 번째 사용자 메시지로 세션 요약을 만듭니다."""
+    user_question = content[:50] + "..." if len(content) > 50 else content
+    return f"질문: {user_question}"
+
+
+def save_user_message(session, content):
+    """사용자 메시지를 저장하고, 세션의 첫 메시지면 요약도 함께 저장합니다."""
+    message = ChatMessage.objects.create(
+        session=session, message_type="user", content=content
+    )
+    # 요약이 비어 있을 때만 채우므로 이후 메시지는 요약을 바꾸지 않습니다.
+    ChatSession.objects.filter(pk=session.pk, summary="").update(
+        summary=summarize_question(content)
+    )
+    return message
+
+
+def _authenticate_jwt(request):
+    """DRF 데코레이터를 쓸 수 없는 비동기 뷰에서 JWT로 사용자를 확인합니다."""
+    try:
+        result = JWTAuthentication().authenticate(request)
+    except (AuthenticationFailed, InvalidToken):
+        return None
+    return result[0] if result else None
+
+
+def _sse_event(event, data):
+    """Server-Sent Events 형식의 한 이벤트를 만듭니다."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def _stream_bot_reply(session, user_message):
+    """토큰을 SSE로 흘려보내고, 완성된 답변을 봇 메시지로 저장합니다."""
+    yield _sse_event(
+        "user_message",
+        {
+            "id": user_message.id,
+            "content": user_message.content,
+            "timestamp": user_message.timestamp.isoformat(),
+        },
+    )
+
+    chunks = []
+    current = None
+    try:
+        with trace("stream") as current:
+            # 키워드 응답이나 캐시된 답변이 있으면 LLM 없이 한 번에 내려줍니다.
+            ready_response = await sync_to_async(keyword_fast_path.answer)(user_message.content)
+            if not ready_response:
+                conversation = await sync_to_async(build_conversation_context)(
+                    session, exclude_id=user_message.id
+                )
+                cache_key = await sync_to_async(answer_cache.make_key)(user_message.content)
+                use_cache = is_cacheable(cache_key, conversation)
+                ready_response = answer_cache.get(cache_key) if use_cache else None
+            if ready_response:
+                chunks.append(ready_response)
+                yield _sse_event("token", {"delta": ready_response})
+            elif is_llm_configured():
+                # 같은 질문을 이미 생성 중인 요청이 있으면 그 답변을 기다렸다가 한 번에 내려줍니다.
+                # 기다리는 동안 다른 요청의 동기 작업을 막지 않도록 별도 스레드에서 기다립니다.
+                flight = (
+                    await sync_to_async(single_flight.acquire, thread_sensitive=False)(cache_key)
+                    if use_cache
+                    else None
+                )
+                if flight is not None and not flight.leader:
+                    shared_response = await sync_to_async(flight.wait, thread_sensitive=False)()
+                    if shared_response:
+                        chunks.append(shared_response)
+                        yield _sse_event("token", {"delta": shared_response})
+                else:
+                    completed = None
+                    try:
+                        messages = await sync_to_async(build_answer_messages)(
+                            user_message.content, conversation
+                        )
+                        # 연결이 끊기면 스트림도 바로 닫아, 그때까지 쓴 토큰이 청구 전에 기록되게 합니다.
+                        async with aclosing(stream_chat_completion(messages)) as stream:
+                            async for delta in stream:
+                                chunks.append(delta)
+                                yield _sse_event("token", {"delta": delta})
+                        # 끝까지 받은 답변만 캐시하고 나눠 줍니다.
+                        if use_cache and "".join(chunks).strip():
+                            completed = "".join(chunks).strip()
+                            answer_cache.set(cache_key, completed)
+                    except Exception as e:
+                        print(f"OpenAI 스트리밍 오류: {e}")
+                    finally:
+                        if flight is not None:
+                            flight.complete(completed)
+    finally:
+        # 중간에 연결이 끊기거나 오류가 나도 이미 쓴 LLM 토큰은 청구합니다.
+        if current is not None:
+            await sync_to_async(charge_llm_tokens)(session.user_id, current.llm_tokens)
+
+    bot_response_text = "".join(chunks).strip()
+    if not bot_response_text:
+        # 토큰을 하나도 받지 못했으면 기본 응답을 한 번에 내려줍니다.
+        bot_response_text = await sync_to_async(get_fallback_response)(
+            user_message.content
+        )
+        yield _sse_event("token", {"delta": bot_response_text})
+
+    # 봇 응답 저장
+    bot_message = await sync_to_async(ChatMessage.objects.create)(
+        session=session, message_type="bot", content=bot_response_text
+    )
+    yield _sse_event(
+        "done",
+        {
+            "id": bot_message.id,
+            "content": bot_message.content,
+            "timestamp": bot_message.timestamp.isoformat(),
+        },
+    )
+
+
+async def chat_stream_api(request):
+    """채팅 API의 스트리밍 버전 (ASGI에서 SSE로 토큰을 전송)"""
+    if request.method != "POST":
+        return JsonResponse({"error": "POST 요청만 허용됩니다."}, status=405)
+
+    user = await sync_to_async(_authenticate_jwt)(request)
+    if user is None:
+        return JsonResponse({"error": "인증이 필요합니다."}, status=401)
+
+    limit = await sync_to_async(check_chat_limits)(user.id)
+    if limit:
+        return limit_exceeded_response(limit)
+
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        return JsonResponse({"error": "잘못된 JSON 형식입니다."}, status=400)
+
+    message = data.get("message", "").strip()
+    session_id = data.get("session_id")
+
+    if not message:
+        return JsonResponse({"error": "메시지가 비어있습니다."}, status=400)
+
+    # 세션 가져오기
+    try:
+        session = await sync_to_async(ChatSession.objects.get)(
+            session_id=session_id, is_active=True, user=user
+        )
+    except ChatSession.DoesNotExist:
+        return JsonResponse({"error": "유효하지 않은 세션입니다."}, status=400)
+
+    # 사용자 메시지 저장
+    user_message = await sync_to_async(save_user_message)(session, message)
+
+    response = StreamingHttpResponse(
+        _stream_bot_reply(session, user_message), content_type="text/event-stream"
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # Nginx 버퍼링 비활성화
+    return response
+
+
+# Django 4.2의 csrf_exempt 데코레이터는 코루틴 뷰를 감싸지 못하므로 직접 표시합니다.
+chat_stream_api.csrf_exempt = True
+
+
+REPLY_POLL_INTERVAL = 0.5
+REPLY_KEEPALIVE_EVERY = 20  # 폴링 20번(약 10초)마다 연결 유지용 주석을 보냅니다.
+
+
+async def _wait_for_reply(message):
+    """작업 큐가 봇 메시지를 채울 때까지 기다렸다가 done 이벤트를 보냅니다."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + CHATBOT_CONFIG.get("reply_stream_timeout", 60)
+    polls = 0
+    while message.status == "pending" and loop.time() < deadline:
+        await asyncio.sleep(REPLY_POLL_INTERVAL)
+        await sync_to_async(message.refresh_from_db)(fields=["content", "status"])
+        polls += 1
+        if polls % REPLY_KEEPALIVE_EVERY == 0:
+            yield ": keepalive\n\n"
+    event = "pending" if message.status == "pending" else "done"
+    yield _sse_event(event, serialize_message(message))
+
+
+async def reply_stream_api(request, message_id):
+    """비동기 모드로 만든 봇 메시지가 채워지면 SSE로 알려주는 API"""
+    if request.method != "GET":
+        return JsonResponse({"error": "GET 요청만 허용됩니다."}, status=405)
+
+    user = await sync_to_async(_authenticate_jwt)(request)
+    if user is None:
+        return JsonResponse({"error": "인증이 필요합니다."}, status=401)
+
+    try:
+        message = await sync_to_async(ChatMessage.objects.get)(
+            pk=message_id, message_type="bot", session__user=user
+        )
+    except ChatMessage.DoesNotExist:
+        return JsonResponse({"error": "메시지를 찾을 수 없습니다."}, status=404)
+
+    response = StreamingHttpResponse(
+        _wait_for_reply(message), content_type="text/event-stream"
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # Nginx 버퍼링 비활성화
+    return response
+
+
 @csrf_exempt
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
@@ -358,74 +595,173 @@ def create_session(request):
     return JsonResponse({"error": "POST 요청만 허용됩니다."}, status=405)
 
 
+SESSION_PAGE_SIZE = 20
+MAX_SESSION_PAGE_SIZE = 100
+MESSAGE_PAGE_SIZE = 50
+MAX_MESSAGE_PAGE_SIZE = 200
+
+
+def encode_cursor(moment, pk):
+    """마지막 항목의 (시각, id)를 다음 페이지 커서 문자열로 만듭니다."""
+    raw = json.dumps([moment.isoformat(), pk])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """커서 문자열을 (시각, id)로 되돌립니다. 잘못된 커서면 ValueError를 냅니다."""
+    try:
+        moment, pk = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        moment = datetime.fromisoformat(moment)
+    except (TypeError, ValueError, binascii.Error):
+        raise ValueError("잘못된 커서입니다.")
+    if not isinstance(pk, int):
+        raise ValueError("잘못된 커서입니다.")
+    return moment, pk
+
+
+def parse_limit(request, default, maximum):
+    """limit 쿼리 파라미터를 1 ~ maximum 범위로 읽습니다. 숫자가 아니면 ValueError를 냅니다."""
+    try:
+        limit = int(request.GET.get("limit", default))
+    except ValueError:
+        raise ValueError("limit은 숫자여야 합니다.")
+    return min(max(limit, 1), maximum)
+
+
+def serialize_message(message):
+    return {
+        "id": message.id,
+        "type": message.message_type,
+        "content": message.content,
+        "status": message.status,
+        "timestamp": message.timestamp.isoformat(),
+    }
+
+
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def get_messages(request, session_id):
-    """특정 세션의 메시지들을 가져오는 API"""
+    """특정 세션의 메시지들을 가져오는 API
+
+    쿼리 파라미터:
+    - since: 클라이언트가 가진 마지막 메시지 id. 이보다 새 메시지만 오래된 순으로 반환하고,
+      limit보다 많이 남아 있으면 has_more가 true입니다.
+    - cursor: 이전 응답의 next_cursor. 그보다 오래된 메시지를 반환합니다.
+    - limit: 한 번에 가져올 메시지 수 (기본 50, 최대 200)
+    비동기 모드로 만든 봇 메시지는 status가 pending으로 먼저 내려가고, 답변이 채워지면 같은 id로
+    done(또는 failed)이 됩니다. since=<사용자 메시지 id>로 다시 조회하면 바뀐 상태를 받을 수 있습니다.
+    둘 다 없으면 최신 메시지 limit개를 반환합니다. 모든 조회는 (session, timestamp) 인덱스를
+    타므로 대화가 길어져도 조회 비용은 limit에만 비례합니다.
+    """
     try:
+        try:
+            limit = parse_limit(request, MESSAGE_PAGE_SIZE, MAX_MESSAGE_PAGE_SIZE)
+        except ValueError as e:
+            return JsonResponse({"error": str(e)}, status=400)
+
         session = get_object_or_404(
             ChatSession, session_id=session_id, is_active=True, user=request.user
         )
-        messages = session.messages.all()
-
-        message_list = []
-        for message in messages:
-            message_list.append(
+        messages = ChatMessage.objects.filter(session=session)
+
+        since = request.GET.get("since")
+        if since:
+            # since 메시지의 시각 이후를 (timestamp, id) 순서로 이어서 가져옵니다.
+            last = (
+                messages.filter(pk=since).values_list("timestamp", flat=True).first()
+                if since.isdigit()
+                else None
+            )
+            if last is None:
+                return JsonResponse({"error": "잘못된 since 값입니다."}, status=400)
+            page = list(
+                messages.filter(
+                    Q(timestamp__gt=last) | Q(timestamp=last, id__gt=int(since))
+                ).order_by("timestamp", "id")[: limit + 1]
+            )
+            return JsonResponse(
                 {
-                    "id": message.id,
-                    "type": message.message_type,
-                    "content": message.content,
-                    "timestamp": message.timestamp.isoformat(),
+                    "success": True,
+                    "messages": [serialize_message(m) for m in page[:limit]],
+                    "has_more": len(page) > limit,
                 }
             )
 
-        return JsonResponse({"success": True, "messages": message_list})
-
-    except Exception as e:
-        return JsonResponse({"error": str(e)}, status=500)
-
-
-def generate_session_summary(session):
-    """채팅 세션의 요약을 생성합니다."""
-    try:
-        # 세션의 모든 메시지 가져오기
-        messages = session.messages.all()
-        if not messages.exists():
-            return "빈 대화"
-
-        # 첫 번째 사용자 메시지로 요약 생성
-        first_user_message = messages.filter(message_type="user").first()
-        if first_user_message:
-            user_question = (
-                first_user_message.content[:50] + "..."
-                if len(first_user_message.content) > 50
-                else first_user_message.content
+        cursor = request.GET.get("cursor")
+        if cursor:
+            try:
+                before, message_pk = decode_cursor(cursor)
+            except ValueError as e:
+                return JsonResponse({"error": str(e)}, status=400)
+            messages = messages.filter(
+                Q(timestamp__lt=before) | Q(timestamp=before, id__lt=message_pk)
             )
-            return f"질문: {user_question}"
 
-        return "대화 내용"
+        # 최신순으로 하나 더 가져와 더 오래된 메시지가 있는지 확인한 뒤 시간순으로 뒤집습니다.
+        page = list(messages.order_by("-timestamp", "-id")[: limit + 1])
+        has_older = len(page) > limit
+        page = page[:limit]
+        page.reverse()
+
+        return JsonResponse(
+            {
+                "success": True,
+                "messages": [serialize_message(m) for m in page],
+                "next_cursor": (
+                    encode_cursor(page[0].timestamp, page[0].id) if has_older else None
+                ),
+            }
+        )
 
     except Exception as e:
-        print(f"세션 요약 생성 오류: {e}")
-        return "대화 내용"
+        return JsonResponse({"error": str(e)}, status=500)
 
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def get_sessions(request):
-    """사용자의 모든 채팅 세션 목록을 가져오는 API"""
+    """사용자의 채팅 세션 목록을 커서 기반으로 나눠 가져오는 API
+
+    쿼리 파라미터: limit (기본 20, 최대 100), cursor (이전 응답의 next_cursor)
+    세션 수와 관계없이 쿼리 한 번으로 메시지 수와 마지막 메시지 시간까지 가져옵니다.
+    """
     try:
-        # 현재 로그인한 사용자의 활성 세션들 조회
-        sessions = ChatSession.objects.filter(
-            user=request.user, is_active=True
-        ).order_by("-created_at")
+        try:
+            limit = parse_limit(request, SESSION_PAGE_SIZE, MAX_SESSION_PAGE_SIZE)
+        except ValueError as e:
+            return JsonResponse({"error": str(e)}, status=400)
+
+        # 현재 로그인한 사용자의 활성 세션들 조회 (최신순)
+        sessions = (
+            ChatSession.objects.filter(user=request.user, is_active=True)
+            .annotate(
+                message_count=Count("messages"),
+                last_message_time=Max("messages__timestamp"),
+            )
+            .order_by("-created_at", "-id")
+        )
+
+        cursor = request.GET.get("cursor")
+        if cursor:
+            try:
+                created_at, session_pk = decode_cursor(cursor)
+            except ValueError as e:
+                return JsonResponse({"error": str(e)}, status=400)
+            sessions = sessions.filter(
+                Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=session_pk)
+            )
+
+        # 다음 페이지가 있는지 알기 위해 하나 더 가져옵니다.
+        page = list(sessions[: limit + 1])
+        has_next = len(page) > limit
+        page = page[:limit]
 
         session_list = []
-        for session in sessions:
-            # 세션 요약 생성
-            summary = generate_session_summary(session)
-            message_count = session.messages.count()
-            last_message = session.messages.last()
+        for session in page:
+            if session.summary:
+                summary = session.summary
+            else:
+                summary = "대화 내용" if session.message_count else "빈 대화"
 
             session_list.append(
                 {
@@ -433,14 +769,46 @@ def get_sessions(request):
                     "created_at": session.created_at.isoformat(),
                     "updated_at": session.updated_at.isoformat(),
                     "summary": summary,
-                    "message_count": message_count,
+                    "message_count": session.message_count,
                     "last_message_time": (
-                        last_message.timestamp.isoformat() if last_message else None
+                        session.last_message_time.isoformat()
+                        if session.last_message_time
+                        else None
                     ),
                 }
             )
 
-        return JsonResponse({"success": True, "sessions": session_list})
+        return JsonResponse(
+            {
+                "success": True,
+                "sessions": session_list,
+                "next_cursor": (
+                    encode_cursor(page[-1].created_at, page[-1].id) if has_next else None
+                ),
+            }
+        )
 
     except Exception as e:
         return JsonResponse({"error": str(e)}, status=500)
+
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def metrics_api(request):
+    """챗봇 파이프라인 계측 요약을 보여주는 관리자 전용 API (이 프로세스 기준)"""
+    try:
+        # 0이나 음수는 슬라이스가 뒤집혀 전체 기록이 나가므로 1~200으로 제한합니다.
+        recent = max(1, min(int(request.GET.get("recent", 20)), 200))
+    except (TypeError, ValueError):
+        return JsonResponse({"error": "recent는 숫자여야 합니다."}, status=400)
+
+    metrics = telemetry.snapshot(recent=recent)
+    metrics["counters"] = {
+        "answer_cache": answer_cache.stats(),
+        "keyword_fast_path": keyword_fast_path.stats(),
+        "memory": memory_stats.stats(),
+        "context": context_stats.stats(),
+        "single_flight": single_flight.stats(),
+        "llm": llm_stats(),
+    }
+    return JsonResponse({"success": True, "metrics": metrics})